@@ -0,0 +1,39 @@
+"""
+Benchmarks for the TaskNinja API.
+
+Every module runs on its own against a throwaway test database, e.g.:
+
+    python -m bench.auth
+"""
+import contextlib
+import os
+import time
+
+def setup():
+    """Configure Django for a standalone benchmark run"""
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'taskninja.settings')
+    import django
+    django.setup()
+
+@contextlib.contextmanager
+def test_database():
+    """Create the test databases (and test settings) for the duration of a benchmark"""
+    from django.test.runner import DiscoverRunner
+    from django.test.utils import setup_test_environment, teardown_test_environment
+
+    runner = DiscoverRunner(verbosity=0, interactive=False)
+    setup_test_environment()
+    old_config = runner.setup_databases()
+    try:
+        yield
+    finally:
+        runner.teardown_databases(old_config)
+        teardown_test_environment()
+
+def measure(func, iterations):
+    """Call func() `iterations` times and return the calls per second"""
+    started = time.perf_counter()
+    for _ in range(iterations):
+        func()
+    elapsed = time.perf_counter() - started
+    return iterations / elapsed if elapsed else float('inf')
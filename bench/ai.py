@@ -0,0 +1,107 @@
+"""
+Measure AI subtask generation throughput against the offline stub backend.
+
+    python -m bench.ai [--requests 200] [--tasks 50] [--clients 16] [--latency 0.05]
+
+Requests pick tasks with a skewed (Zipf-like) popularity from a pool of
+--tasks distinct tasks, sent by --clients concurrent callers. The direct
+run makes one blocking backend call per request, as generate_subtasks()
+did before the shared generator; the generator run adds the bounded pool,
+request coalescing and the result cache. The batch run then breaks
+--tasks distinct tasks down one call per task and AI_BATCH_SIZE per call,
+and the stream run times the first streamed subtask against the full answer.
+"""
+import argparse
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+from . import setup
+
+def workload(requests, tasks, seed=0):
+    rng = random.Random(seed)
+    weights = [1 / (rank + 1) for rank in range(tasks)]
+    picks = rng.choices(range(tasks), weights=weights, k=requests)
+    return [(f'Task {i}', f'Description of task {i}', '2030-01-01T12:00:00') for i in picks]
+
+def run(requests, tasks, clients, latency):
+    from django.conf import settings
+    from tasks.ai_utils import (
+        StubBackend, SubtaskGenerator, build_batch_prompt, build_prompt, parse_subtasks
+    )
+
+    jobs = workload(requests, tasks)
+
+    def direct(job):
+        backend = StubBackend(latency=latency)
+        return parse_subtasks(backend.generate(build_prompt(*job)), job[2])
+
+    generator = SubtaskGenerator(backend=StubBackend(latency=latency))
+
+    results = {}
+    for name, call in [('direct', direct), ('generator', lambda job: generator.generate(*job))]:
+        with ThreadPoolExecutor(max_workers=clients) as pool:
+            started = time.perf_counter()
+            answers = list(pool.map(call, jobs))
+            elapsed = time.perf_counter() - started
+        assert all(answers)
+        results[name] = requests / elapsed
+    generator.shutdown()
+    results['stats'] = generator.stats
+
+    distinct = [(f'Batch task {i}', f'Description of batch task {i}', '2030-01-01T12:00:00') for i in range(tasks)]
+    results['prompt_chars'] = {
+        'single': sum(len(build_prompt(*job)) for job in distinct),
+        'batch': sum(
+            len(build_batch_prompt(distinct[i:i + settings.AI_BATCH_SIZE]))
+            for i in range(0, tasks, settings.AI_BATCH_SIZE)
+        ),
+    }
+    for name in ['single', 'batch']:
+        generator = SubtaskGenerator(backend=StubBackend(latency=latency))
+        started = time.perf_counter()
+        if name == 'single':
+            answers = [future.result() for future in [generator.submit(*job) for job in distinct]]
+        else:
+            answers = generator.generate_batch(distinct)
+        results[name] = tasks / (time.perf_counter() - started)
+        assert all(answers)
+        generator.shutdown()
+
+    generator = SubtaskGenerator(backend=StubBackend(latency=latency))
+    started = time.perf_counter()
+    stream = generator.stream('Streamed task', None, '2030-01-01T12:00:00')
+    next(stream)
+    results['first_subtask'] = time.perf_counter() - started
+    list(stream)
+    results['full_answer'] = time.perf_counter() - started
+    generator.shutdown()
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--requests', type=int, default=200)
+    parser.add_argument('--tasks', type=int, default=50)
+    parser.add_argument('--clients', type=int, default=16)
+    parser.add_argument('--latency', type=float, default=0.05)
+    args = parser.parse_args()
+
+    setup()
+    results = run(args.requests, args.tasks, args.clients, args.latency)
+    stats = results['stats']
+
+    print(f"Subtask generation ({args.requests} requests, {args.tasks} tasks, "
+          f"{args.clients} clients, {args.latency * 1000:.0f} ms per call)")
+    print(f"  Direct:      {results['direct']:8.1f} req/s")
+    print(f"  Generator:   {results['generator']:8.1f} req/s")
+    print(f"  Cache hits:  {stats['hits'] / stats['requests']:8.1%}")
+    print(f"  Coalesced:   {stats['coalesced'] / stats['requests']:8.1%}")
+    print(f"  Model calls: {stats['calls']:8d} (direct: {args.requests})")
+    print(f"Breaking down {args.tasks} distinct tasks")
+    print(f"  One per call: {results['single']:8.1f} tasks/s, {results['prompt_chars']['single']} prompt chars")
+    print(f"  Batched:      {results['batch']:8.1f} tasks/s, {results['prompt_chars']['batch']} prompt chars")
+    print("Streaming one task")
+    print(f"  First subtask: {results['first_subtask'] * 1000:7.1f} ms")
+    print(f"  Full answer:   {results['full_answer'] * 1000:7.1f} ms")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,57 @@
+"""
+Compare GET /api/tasks/ throughput under Basic and token authentication.
+
+    python -m bench.auth [--requests 20] [--tasks 20]
+
+Basic auth runs the password hasher on every request; token auth checks an
+HMAC once and then serves the token from the in-memory cache.
+"""
+import argparse
+import base64
+from . import setup, test_database, measure
+
+def run(requests, tasks):
+    from datetime import timedelta
+    from django.contrib.auth.models import User
+    from django.test import Client
+    from django.urls import reverse
+    from django.utils import timezone
+    from tasks.authentication import issue_token
+    from tasks.models import Task
+
+    user = User.objects.create_user(username='bench', email='bench@example.com', password='benchpass123')
+    Task.objects.bulk_create(
+        Task(user=user, title=f'Task {i}', due_date=timezone.now() + timedelta(days=1))
+        for i in range(tasks)
+    )
+    client = Client()
+    url = reverse('task-list')
+    basic = 'Basic ' + base64.b64encode(b'bench:benchpass123').decode()
+    token = 'Token ' + issue_token(user)[0]
+
+    def get(header):
+        response = client.get(url, HTTP_AUTHORIZATION=header)
+        assert response.status_code == 200, response.status_code
+
+    return {
+        'basic': measure(lambda: get(basic), requests),
+        'token': measure(lambda: get(token), requests),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--requests', type=int, default=20)
+    parser.add_argument('--tasks', type=int, default=20)
+    args = parser.parse_args()
+
+    setup()
+    with test_database():
+        results = run(args.requests, args.tasks)
+
+    print(f"GET /api/tasks/ ({args.requests} requests, {args.tasks} tasks)")
+    print(f"  Basic auth: {results['basic']:8.1f} req/s")
+    print(f"  Token auth: {results['token']:8.1f} req/s")
+    print(f"  Speedup:    {results['token'] / results['basic']:8.1f}x")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,153 @@
+"""
+Measure API reads while the reminder sender writes, per SQLite journal mode.
+
+    python -m bench.database [--readers 8] [--duration 5] [--users 50] [--tasks 100]
+
+The test database is a file (WAL does not apply to in-memory databases).
+Each run has --readers threads listing a random user's tasks through the
+API (response cache off) while one thread keeps adding due reminders and
+sending them with check_and_send_reminders(), like `send_reminders` does.
+The same workload runs with SQLite's default journaling and with the
+tuned SQLITE_* settings, each on fresh connections.
+"""
+import argparse
+import os
+import random
+import statistics
+import tempfile
+import threading
+import time
+from . import setup, test_database
+
+MODES = {
+    'default': {
+        'SQLITE_JOURNAL_MODE': 'DELETE', 'SQLITE_SYNCHRONOUS': 'FULL',
+        'SQLITE_BUSY_TIMEOUT': 5000, 'SQLITE_MMAP_SIZE': 0,
+    },
+    'tuned': {
+        'SQLITE_JOURNAL_MODE': 'WAL', 'SQLITE_SYNCHRONOUS': 'NORMAL',
+        'SQLITE_BUSY_TIMEOUT': 5000, 'SQLITE_MMAP_SIZE': 256 * 1024 * 1024,
+    },
+}
+
+def seed(users, tasks):
+    from datetime import timedelta
+    from django.contrib.auth.models import User
+    from django.utils import timezone
+    from tasks.models import Task
+
+    User.objects.bulk_create(
+        User(username=f'db{i}', email=f'db{i}@example.com') for i in range(users)
+    )
+    accounts = list(User.objects.filter(username__startswith='db'))
+    now = timezone.now()
+    Task.objects.bulk_create(
+        Task(user=user, title=f'Task {i}', due_date=now + timedelta(days=1, minutes=i))
+        for user in accounts for i in range(tasks)
+    )
+    task_ids = list(Task.objects.values_list('id', flat=True))
+    return accounts, task_ids
+
+def reader(accounts, stop, latencies, errors):
+    from django.db import connections
+    from rest_framework.test import APIClient
+
+    rng = random.Random(threading.get_ident())
+    client = APIClient()
+    try:
+        while not stop.is_set():
+            client.force_authenticate(rng.choice(accounts))
+            started = time.perf_counter()
+            try:
+                response = client.get('/api/tasks/')
+                assert response.status_code == 200, response.status_code
+                latencies.append(time.perf_counter() - started)
+            except Exception as e:
+                errors.append(str(e))
+    finally:
+        connections.close_all()
+
+def writer(task_ids, stop, stats, errors):
+    from django.core import mail
+    from django.db import connections
+    from django.utils import timezone
+    from tasks.models import Reminder
+    from tasks.utils import check_and_send_reminders
+
+    rng = random.Random(0)
+    try:
+        while not stop.is_set():
+            try:
+                now = timezone.now()
+                Reminder.objects.bulk_create(
+                    Reminder(task_id=task_id, remind_at=now) for task_id in rng.sample(task_ids, 200)
+                )
+                run = check_and_send_reminders(batch_size=50)
+                stats['sent'] += run['sent']
+                stats['batches'] += run['batches']
+            except Exception as e:
+                errors.append(str(e))
+            mail.outbox = []
+    finally:
+        connections.close_all()
+
+def run_mode(mode, accounts, task_ids, readers, duration):
+    from django.db import connections
+    from django.test import override_settings
+
+    connections.close_all()
+    with override_settings(**MODES[mode], TASK_CACHE_TTL=0):
+        stop = threading.Event()
+        latencies, errors = [], []
+        stats = {'sent': 0, 'batches': 0}
+        threads = [threading.Thread(target=reader, args=(accounts, stop, latencies, errors)) for _ in range(readers)]
+        threads.append(threading.Thread(target=writer, args=(task_ids, stop, stats, errors)))
+        for thread in threads:
+            thread.start()
+        time.sleep(duration)
+        stop.set()
+        for thread in threads:
+            thread.join()
+    connections.close_all()
+
+    latencies.sort()
+    return {
+        'reads': len(latencies) / duration,
+        'p50': statistics.median(latencies) * 1000 if latencies else 0,
+        'p99': latencies[max(int(len(latencies) * 0.99) - 1, 0)] * 1000 if latencies else 0,
+        'max': latencies[-1] * 1000 if latencies else 0,
+        'sent': stats['sent'] / duration,
+        'errors': errors,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--readers', type=int, default=8)
+    parser.add_argument('--duration', type=float, default=5)
+    parser.add_argument('--users', type=int, default=50)
+    parser.add_argument('--tasks', type=int, default=100)
+    args = parser.parse_args()
+
+    setup()
+    from django.db import connections
+
+    with tempfile.TemporaryDirectory() as directory:
+        connections['default'].settings_dict['TEST']['NAME'] = os.path.join(directory, 'bench.sqlite3')
+        with test_database():
+            accounts, task_ids = seed(args.users, args.tasks)
+            results = {mode: run_mode(mode, accounts, task_ids, args.readers, args.duration) for mode in MODES}
+
+    print(f"{args.readers} reader threads + 1 reminder sender, {args.duration:g} s per mode, "
+          f"{args.users} users x {args.tasks} tasks")
+    for mode, result in results.items():
+        settings = MODES[mode]
+        print(f"{mode} (journal_mode={settings['SQLITE_JOURNAL_MODE']}, synchronous={settings['SQLITE_SYNCHRONOUS']})")
+        print(f"  Reads:              {result['reads']:8.0f} requests/s")
+        print(f"  Read p50/p99/max:   {result['p50']:8.2f} / {result['p99']:.2f} / {result['max']:.2f} ms")
+        print(f"  Reminders sent:     {result['sent']:8.0f} /s")
+        print(f"  Errors:             {len(result['errors']):8d}")
+        for error in sorted(set(result['errors']))[:3]:
+            print(f"    {error}")
+
+if __name__ == '__main__':
+    main()
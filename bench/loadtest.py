@@ -0,0 +1,128 @@
+"""
+Load-test a running TaskNinja server with concurrent read requests.
+
+    python -m bench.loadtest --url http://127.0.0.1:8000 [--concurrency 32] [--requests 2000]
+
+Run it once against each deployment to compare them, e.g.
+
+    gunicorn taskninja.wsgi -w 1 --threads 32     # WSGI
+    uvicorn taskninja.asgi:application            # ASGI (async read views)
+
+The script registers a throwaway user through the API, creates --tasks
+tasks with a subtask each, then spreads GET requests for the task list,
+task detail, task subtasks and reminder list over --concurrency
+keep-alive connections. It only talks HTTP, so it needs no Django setup.
+"""
+import argparse
+import http.client
+import json
+import random
+import statistics
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from urllib.parse import urlsplit
+
+class Connection:
+    """One keep-alive HTTP connection that speaks JSON"""
+    def __init__(self, url, token=None):
+        parts = urlsplit(url)
+        self.connection = http.client.HTTPConnection(parts.hostname, parts.port or 80, timeout=30)
+        self.headers = {'Content-Type': 'application/json', 'Accept': 'application/json'}
+        if token:
+            self.headers['Authorization'] = f'Token {token}'
+
+    def request(self, method, path, body=None):
+        payload = json.dumps(body) if body is not None else None
+        self.connection.request(method, path, payload, self.headers)
+        response = self.connection.getresponse()
+        data = response.read()
+        if response.status >= 400:
+            raise RuntimeError(f'{method} {path}: {response.status} {data[:200]!r}')
+        return json.loads(data) if data else None
+
+def prepare(url, tasks):
+    """Create a user with `tasks` tasks and return its token and the URLs to request"""
+    api = Connection(url)
+    username = f'load-{uuid.uuid4().hex[:8]}'
+    api.request('POST', '/api/register/', {
+        'username': username, 'email': f'{username}@example.com', 'password': 'loadtest-pass-123'
+    })
+    token = api.request('POST', '/api/login/', {'username': username, 'password': 'loadtest-pass-123'})['token']
+
+    api = Connection(url, token)
+    due_date = datetime.now(timezone.utc) + timedelta(days=7)
+    task_ids = []
+    for start in range(0, tasks, 500):
+        created = api.request('POST', '/api/tasks/bulk/', [
+            {'title': f'Load task {i}', 'description': f'Task number {i}', 'due_date': (due_date + timedelta(hours=i)).isoformat()}
+            for i in range(start, min(start + 500, tasks))
+        ])
+        task_ids += [task['id'] for task in created]
+    for start in range(0, len(task_ids), 500):
+        api.request('POST', '/api/subtasks/bulk/', [
+            {'task': task_id, 'title': 'Load subtask'} for task_id in task_ids[start:start + 500]
+        ])
+
+    paths = ['/api/tasks/', '/api/reminders/']
+    paths += [f'/api/tasks/{task_id}/' for task_id in task_ids[:20]]
+    paths += [f'/api/tasks/{task_id}/subtasks/' for task_id in task_ids[:20]]
+    return token, paths
+
+def run(url, token, paths, concurrency, requests, seed=0):
+    """Send `requests` GETs over `concurrency` connections; returns req/s and latencies"""
+    rng = random.Random(seed)
+    schedule = [rng.choice(paths) for _ in range(requests)]
+    position = iter(range(requests))
+    lock = threading.Lock()
+    latencies = []
+
+    def worker():
+        api = Connection(url, token)
+        timings = []
+        while True:
+            with lock:
+                index = next(position, None)
+            if index is None:
+                break
+            started = time.perf_counter()
+            api.request('GET', schedule[index])
+            timings.append(time.perf_counter() - started)
+        with lock:
+            latencies.extend(timings)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        for future in [pool.submit(worker) for _ in range(concurrency)]:
+            future.result()
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        'throughput': requests / elapsed,
+        'p50': statistics.median(latencies),
+        'p95': latencies[int(len(latencies) * 0.95) - 1],
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--url', default='http://127.0.0.1:8000')
+    parser.add_argument('--concurrency', type=int, default=32)
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--tasks', type=int, default=200)
+    args = parser.parse_args()
+
+    token, paths = prepare(args.url, args.tasks)
+    # Warm up connections, caches and the search index lookup
+    run(args.url, token, paths, args.concurrency, args.concurrency * 2)
+    results = run(args.url, token, paths, args.concurrency, args.requests)
+
+    print(f"{args.url} ({args.requests} GETs, {args.concurrency} connections, {args.tasks} tasks)")
+    print(f"  Throughput: {results['throughput']:8.1f} req/s")
+    print(f"  p50:        {results['p50'] * 1000:8.1f} ms")
+    print(f"  p95:        {results['p95'] * 1000:8.1f} ms")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,159 @@
+"""
+Measure WebSocket change push fan-out with thousands of idle connections.
+
+    python -m bench.push [--connections 5000] [--users 1000] [--events 2000]
+
+Connections are opened directly against the ASGI application (no network),
+spread evenly over --users users, and left idle. Events are then published
+from another thread, as request threads do after a commit, to random users
+and finally to a single user with --devices connections. The benchmark
+reports the memory held per idle connection and the time from publish()
+until the last connection of the group has been handed the message.
+"""
+import argparse
+import asyncio
+import random
+import statistics
+import threading
+import time
+import tracemalloc
+from . import setup, test_database
+
+class Connection:
+    def __init__(self, application, token, deliveries):
+        self.inbox = asyncio.Queue()
+        scope = {'type': 'websocket', 'path': '/ws/tasks/', 'query_string': f'token={token}'.encode(), 'headers': []}
+        self.accepted = asyncio.get_running_loop().create_future()
+        self.deliveries = deliveries
+        self.task = asyncio.ensure_future(application(scope, self.inbox.get, self.send))
+        self.inbox.put_nowait({'type': 'websocket.connect'})
+
+    async def send(self, message):
+        if message['type'] == 'websocket.accept':
+            self.accepted.set_result(True)
+        elif message['type'] == 'websocket.send':
+            self.deliveries.append((time.perf_counter(), message['text']))
+
+    def close(self):
+        self.inbox.put_nowait({'type': 'websocket.disconnect', 'code': 1000})
+
+async def open_connections(application, tokens, count, deliveries):
+    connections = [Connection(application, tokens[i % len(tokens)], deliveries) for i in range(count)]
+    await asyncio.gather(*(connection.accepted for connection in connections))
+    return connections
+
+async def publish_and_wait(groups, deliveries, expected):
+    """Publish one event per group from a worker thread; returns the latency of each event"""
+    from tasks.push import get_channel_layer
+    layer = get_channel_layer()
+    published = {}
+
+    def publisher():
+        for number, group in enumerate(groups):
+            text = f'{{"type":"bench","n":{number}}}'
+            published[text] = time.perf_counter()
+            layer.publish(group, text)
+
+    del deliveries[:]
+    thread = threading.Thread(target=publisher)
+    started = time.perf_counter()
+    thread.start()
+    while len(deliveries) < expected:
+        await asyncio.sleep(0.001)
+    elapsed = time.perf_counter() - started
+    thread.join()
+
+    last_delivery = {}
+    for delivered_at, text in deliveries:
+        last_delivery[text] = max(delivered_at, last_delivery.get(text, 0))
+    latencies = sorted(last_delivery[text] - published[text] for text in published)
+    return elapsed, latencies
+
+def summarize(latencies):
+    return {
+        'p50': statistics.median(latencies) * 1000,
+        'p99': latencies[max(int(len(latencies) * 0.99) - 1, 0)] * 1000,
+    }
+
+async def run_async(connections, users, events, devices):
+    from django.contrib.auth.models import User
+    from asgiref.sync import sync_to_async
+    from taskninja.asgi import application
+    from tasks.authentication import issue_token
+
+    def create_users():
+        User.objects.bulk_create(User(username=f'push{i}') for i in range(users + 1))
+        return [issue_token(user)[0] for user in User.objects.filter(username__startswith='push').order_by('id')]
+
+    tokens = await sync_to_async(create_users)()
+    user_ids = await sync_to_async(
+        lambda: list(User.objects.filter(username__startswith='push').order_by('id').values_list('id', flat=True))
+    )()
+    deliveries = []
+    results = {}
+
+    started = time.perf_counter()
+    idle = await open_connections(application, tokens[:users], connections, deliveries)
+    results['connect_time'] = time.perf_counter() - started
+
+    # Memory of a sample of extra connections, once the token cache is warm
+    sample = 500
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    extra = await open_connections(application, tokens[:users], sample, [])
+    results['bytes_per_connection'] = (tracemalloc.get_traced_memory()[0] - before) / sample
+    tracemalloc.stop()
+    for connection in extra:
+        connection.close()
+    await asyncio.gather(*(connection.task for connection in extra))
+
+    # Targeted events: every user has connections / users devices. First one
+    # event at a time (latency on an idle server), then all at once (throughput)
+    rng = random.Random(0)
+    groups = [f'user.{rng.choice(user_ids[:users])}' for _ in range(events)]
+    per_user = connections // users
+    latencies = []
+    for group in groups[:200]:
+        latencies += (await publish_and_wait([group], deliveries, per_user))[1]
+    elapsed = (await publish_and_wait(groups, deliveries, events * per_user))[0]
+    results['targeted'] = {'rate': events / elapsed, **summarize(sorted(latencies))}
+
+    # One user with many devices while the idle connections stay open
+    crowd = await open_connections(application, tokens[users:], devices, deliveries)
+    broadcast_events = 50
+    elapsed, latencies = await publish_and_wait(
+        [f'user.{user_ids[users]}'] * broadcast_events, deliveries, broadcast_events * devices
+    )
+    results['broadcast'] = {'rate': broadcast_events * devices / elapsed, **summarize(latencies)}
+
+    for connection in idle + crowd:
+        connection.close()
+    await asyncio.gather(*(connection.task for connection in idle + crowd))
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--connections', type=int, default=5000)
+    parser.add_argument('--users', type=int, default=1000)
+    parser.add_argument('--events', type=int, default=2000)
+    parser.add_argument('--devices', type=int, default=1000)
+    args = parser.parse_args()
+
+    setup()
+    with test_database():
+        results = asyncio.run(run_async(args.connections, args.users, args.events, args.devices))
+
+    print(f"{args.connections} idle connections over {args.users} users")
+    print(f"  Connect:            {results['connect_time']:8.2f} s")
+    print(f"  Memory/connection:  {results['bytes_per_connection'] / 1024:8.1f} KiB")
+    targeted = results['targeted']
+    print(f"{args.events} events to random users ({args.connections // args.users} connections each)")
+    print(f"  Throughput:         {targeted['rate']:8.0f} events/s")
+    print(f"  Latency p50/p99:    {targeted['p50']:8.2f} / {targeted['p99']:.2f} ms (one event at a time)")
+    broadcast = results['broadcast']
+    print(f"50 events to one user with {args.devices} connections")
+    print(f"  Deliveries:         {broadcast['rate']:8.0f} messages/s")
+    print(f"  Latency p50/p99:    {broadcast['p50']:8.2f} / {broadcast['p99']:.2f} ms (to the last connection)")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,80 @@
+"""
+Compare task search with the full-text index against SearchFilter's LIKE scan.
+
+    python -m bench.search [--tasks 100000] [--requests 20]
+
+Runs GET /api/tasks/?search=... for a single user owning every task, once
+with the FTS-backed filter and once with DRF's plain SearchFilter.
+"""
+import argparse
+from unittest import mock
+from . import setup, test_database, measure
+
+SYLLABLES = 'ba be bi bo bu da de di do du ka ke ki ko ku la le li lo lu ma me mi mo mu na ne ni no nu ra re ri ro ru sa se si so su ta te ti to tu'.split()
+
+def vocabulary(rng, size=5000):
+    """Distinct made-up words, so a term matches a realistic fraction of tasks"""
+    words = set()
+    while len(words) < size:
+        words.add(''.join(rng.choices(SYLLABLES, k=rng.randint(2, 4))))
+    return sorted(words)
+
+def run(tasks, requests):
+    import random
+    from datetime import timedelta
+    from django.contrib.auth.models import User
+    from django.test import override_settings
+    from django.urls import reverse
+    from django.utils import timezone
+    from rest_framework import filters
+    from rest_framework.test import APIClient
+    from tasks.models import Task
+    from tasks.views import TaskViewSet
+
+    rng = random.Random(42)
+    words = vocabulary(rng)
+    user = User.objects.create_user(username='bench', email='bench@example.com', password='benchpass123')
+    due = timezone.now() + timedelta(days=1)
+    for start in range(0, tasks, 5000):
+        Task.objects.bulk_create(
+            Task(
+                user=user,
+                title=' '.join(rng.choices(words, k=4)),
+                description=' '.join(rng.choices(words, k=60)),
+                due_date=due + timedelta(minutes=i),
+            )
+            for i in range(start, min(start + 5000, tasks))
+        )
+
+    client = APIClient()
+    client.force_authenticate(user)
+    url = reverse('task-list')
+    results = {}
+    with override_settings(TASK_CACHE_TTL=0):
+        # A single word (~1% of tasks), a prefix, and two words that rarely co-occur
+        for term in (words[100], words[200][:3], f'{words[300]} {words[400]}'):
+            fts = measure(lambda: client.get(url, {'search': term}), requests)
+            with mock.patch.object(TaskViewSet, 'filter_backends', [filters.SearchFilter, filters.OrderingFilter]):
+                like = measure(lambda: client.get(url, {'search': term}), requests)
+            results[term] = {'fts_ms': 1000 / fts, 'like_ms': 1000 / like}
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--tasks', type=int, default=100000)
+    parser.add_argument('--requests', type=int, default=20)
+    args = parser.parse_args()
+
+    setup()
+    with test_database():
+        results = run(args.tasks, args.requests)
+
+    print(f"GET /api/tasks/?search= ({args.tasks} tasks, first page)")
+    for term, timing in results.items():
+        print(
+            f"  {term!r:24} FTS {timing['fts_ms']:8.2f} ms   LIKE {timing['like_ms']:8.2f} ms"
+            f"   ({timing['like_ms'] / timing['fts_ms']:.1f}x)"
+        )
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,69 @@
+"""
+Compare ModelSerializer + JSONRenderer with ValuesSerializer + ORJSONRenderer.
+
+    python -m bench.serialization [--tasks 1000] [--iterations 20]
+
+Both paths read the same --tasks tasks from the database and render them to
+JSON; the benchmark checks that they produce the same bytes.
+"""
+import argparse
+from . import setup, test_database, measure
+
+def run(tasks, iterations):
+    from datetime import timedelta
+    from django.contrib.auth.models import User
+    from django.utils import timezone
+    from rest_framework.renderers import JSONRenderer
+    from tasks.models import Task, Category
+    from tasks.renderers import ORJSONRenderer
+    from tasks.serializers import TaskSerializer, ValuesSerializer
+
+    user = User.objects.create_user(username='bench', password='benchpass123')
+    categories = [Category.objects.create(name=f'Category {i}') for i in range(5)]
+    now = timezone.now()
+    Task.objects.bulk_create(
+        Task(
+            user=user,
+            title=f'Task {i}',
+            description=f'Description of task {i}' if i % 3 else None,
+            priority=['High', 'Normal', 'Low'][i % 3],
+            due_date=now + timedelta(minutes=i * 37),
+            is_completed=i % 4 == 0,
+            category=categories[i % 5] if i % 2 else None,
+        )
+        for i in range(tasks)
+    )
+    queryset = Task.objects.filter(user=user).order_by('due_date', 'id')
+
+    def model_serializer():
+        return JSONRenderer().render(TaskSerializer(queryset.all(), many=True).data)
+
+    values_serializer = ValuesSerializer.for_serializer(TaskSerializer)
+
+    def fast_path():
+        return ORJSONRenderer().render(values_serializer.serialize(queryset.all()))
+
+    assert model_serializer() == fast_path(), 'outputs differ'
+    return {
+        'model': measure(model_serializer, iterations),
+        'fast': measure(fast_path, iterations),
+        'bytes': len(fast_path()),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--tasks', type=int, default=1000)
+    parser.add_argument('--iterations', type=int, default=20)
+    args = parser.parse_args()
+
+    setup()
+    with test_database():
+        results = run(args.tasks, args.iterations)
+
+    print(f"Serializing {args.tasks} tasks ({results['bytes']} bytes, identical output)")
+    print(f"  ModelSerializer:  {1000 / results['model']:8.2f} ms")
+    print(f"  ValuesSerializer: {1000 / results['fast']:8.2f} ms")
+    print(f"  Speedup:          {results['fast'] / results['model']:8.1f}x")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,61 @@
+"""
+Time GET /api/tasks/stats/ for a user with MAX_TASKS_PER_USER tasks.
+
+    python -m bench.stats [--requests 100]
+
+The response cache is disabled so every request runs the aggregate queries.
+"""
+import argparse
+from . import setup, test_database, measure
+
+def run(requests):
+    import random
+    from datetime import timedelta
+    from django.conf import settings
+    from django.contrib.auth.models import User
+    from django.test import override_settings
+    from django.urls import reverse
+    from django.utils import timezone
+    from rest_framework.test import APIClient
+    from tasks.models import Task, SubTask, Category
+
+    user = User.objects.create_user(username='bench', email='bench@example.com', password='benchpass123')
+    categories = Category.objects.bulk_create(Category(name=f'Category {i}') for i in range(10))
+    now = timezone.now()
+    tasks = Task.objects.bulk_create(
+        Task(
+            user=user,
+            title=f'Task {i}',
+            due_date=now + timedelta(hours=random.randint(-500, 500)),
+            priority=random.choice(['High', 'Normal', 'Low']),
+            category=random.choice(categories + [None]),
+            is_completed=random.random() < 0.3,
+        )
+        for i in range(settings.MAX_TASKS_PER_USER)
+    )
+    SubTask.objects.bulk_create(
+        SubTask(task=task, title=f'Step {i}', minutes=random.randint(5, 90), is_completed=random.random() < 0.5)
+        for task in tasks for i in range(3)
+    )
+
+    client = APIClient()
+    client.force_authenticate(user)
+    url = reverse('task-stats')
+    with override_settings(TASK_CACHE_TTL=0):
+        rate = measure(lambda: client.get(url), requests)
+    return {'tasks': len(tasks), 'ms_per_request': 1000 / rate}
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--requests', type=int, default=100)
+    args = parser.parse_args()
+
+    setup()
+    with test_database():
+        results = run(args.requests)
+
+    print(f"GET /api/tasks/stats/ ({results['tasks']} tasks, {args.requests} requests)")
+    print(f"  {results['ms_per_request']:.2f} ms/request")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,258 @@
+"""
+Timed API scenarios on generated data, compared against a stored baseline.
+
+    python -m bench.suite [--users 20] [--tasks 200] [--iterations 20] [--rounds 5]
+                          [--output results.json] [--baseline bench/baseline.json]
+                          [--threshold 0.25] [--min-delta 2] [--update-baseline]
+
+The data comes from the seed_data command (the same --seed gives the same
+rows). Scenarios go through the Django test client with the response cache
+off. They take turns for --rounds rounds of one warm-up and --iterations
+timed iterations each; a scenario's result is its fastest round median, as
+other load on the machine only ever adds time. With a baseline, the run fails
+(exit status 1) when a scenario's median is more than --threshold (a
+fraction) and more than --min-delta milliseconds slower than in the
+baseline; the floor keeps jitter on millisecond-long scenarios from
+failing the run. Baselines only compare runs with
+the same parameters on the same machine; refresh bench/baseline.json with
+--update-baseline after an intended change or on new hardware. The
+baseline records a hash of the application code, and the run warns when
+the code has changed since.
+"""
+import argparse
+import glob
+import hashlib
+import io
+import json
+import os
+import platform
+import sqlite3
+import statistics
+import sys
+import time
+from . import setup, test_database
+
+BASELINE = os.path.join(os.path.dirname(__file__), 'baseline.json')
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Reminders sent by one reminder_dispatch iteration
+DISPATCH_SIZE = 200
+# Tasks broken down by one ai_parse iteration (one batch prompt)
+AI_BATCH = 10
+
+class Scenario:
+    """A timed operation; prepare() runs untimed before each iteration"""
+    def __init__(self, name, run, prepare=None):
+        self.name = name
+        self.run = run
+        self.prepare = prepare
+
+    def measure(self, iterations):
+        """Times of `iterations` iterations after a warm-up one"""
+        times = []
+        for iteration in range(iterations + 1):
+            if self.prepare:
+                self.prepare()
+            started = time.perf_counter()
+            self.run()
+            elapsed = time.perf_counter() - started
+            if iteration:
+                times.append(elapsed)
+        return times
+
+def measure_all(scenarios, iterations, rounds):
+    rounds_times = {scenario.name: [] for scenario in scenarios}
+    for _ in range(rounds):
+        for scenario in scenarios:
+            rounds_times[scenario.name].append(scenario.measure(iterations))
+
+    results = {}
+    for name, rounds_list in rounds_times.items():
+        times = sorted(elapsed for times in rounds_list for elapsed in times)
+        results[name] = {
+            'median_ms': round(min(statistics.median(times) for times in rounds_list) * 1000, 3),
+            'p95_ms': round(times[max(int(len(times) * 0.95) - 1, 0)] * 1000, 3),
+        }
+    return results
+
+def build_scenarios(prefix):
+    from django.contrib.auth.models import User
+    from django.utils import timezone
+    from rest_framework.test import APIClient
+    from tasks.ai_utils import StubBackend, build_batch_prompt, parse_batch_subtasks
+    from tasks.models import Task, SubTask, Reminder
+    from tasks.utils import check_and_send_reminders
+
+    user = User.objects.filter(username__startswith=prefix).order_by('id').first()
+    client = APIClient()
+    client.force_authenticate(user)
+    tasks = Task.objects.filter(user=user).order_by('id')
+    word = tasks.exclude(description=None).values_list('title', flat=True).first().split()[-1]
+    task_id = tasks.values_list('id', flat=True).first()
+    subtask_id = SubTask.objects.filter(task__user=user).order_by('id').values_list('id', flat=True).first()
+
+    def get(url):
+        def run():
+            response = client.get(url)
+            assert response.status_code == 200, (url, response.status_code)
+        return run
+
+    def toggle_subtask():
+        response = client.put(f'/api/subtasks/{subtask_id}/complete/')
+        assert response.status_code == 200, response.status_code
+
+    # The dispatch scenario resends the same due reminders every iteration
+    now = timezone.now()
+    Reminder.objects.filter(sent=False).update(sent=True)
+    dispatch_ids = list(
+        Reminder.objects.filter(remind_at__lte=now, task__is_completed=False)
+        .order_by('id').values_list('id', flat=True)[:DISPATCH_SIZE]
+    )
+
+    def reset_reminders():
+        from django.core import mail
+        mail.outbox = []
+        Reminder.objects.filter(id__in=dispatch_ids).update(sent=False, claimed_by=None, claimed_at=None)
+
+    def dispatch_reminders():
+        stats = check_and_send_reminders(batch_size=50)
+        assert stats['sent'] == len(dispatch_ids), stats
+
+    backend = StubBackend(latency=0)
+    ai_tasks = [
+        (task.title, task.description, task.due_date.isoformat())
+        for task in tasks.filter(is_completed=False)[:AI_BATCH]
+    ]
+
+    def parse_ai_answer():
+        results = parse_batch_subtasks(backend.generate(build_batch_prompt(ai_tasks)), ai_tasks)
+        assert all(results), 'a task got no subtasks'
+
+    return [
+        Scenario('task_list', get('/api/tasks/')),
+        Scenario('task_list_ordered', get('/api/tasks/?ordering=-priority')),
+        Scenario('task_list_expanded', get('/api/tasks/?expand=subtasks,reminders,category')),
+        Scenario('task_search', get(f'/api/tasks/?search={word}')),
+        Scenario('task_detail', get(f'/api/tasks/{task_id}/')),
+        Scenario('task_stats', get('/api/tasks/stats/')),
+        Scenario('subtask_toggle', toggle_subtask),
+        Scenario('reminder_dispatch', dispatch_reminders, prepare=reset_reminders),
+        Scenario('ai_parse', parse_ai_answer),
+    ]
+
+def run(parameters):
+    from django.core.management import call_command
+    from django.test import override_settings
+
+    prefix = 'bench'
+    call_command(
+        'seed_data', users=parameters['users'], tasks=parameters['tasks'], subtasks=parameters['subtasks'],
+        prefix=prefix, seed=parameters['seed'], stdout=io.StringIO()
+    )
+    with override_settings(TASK_CACHE_TTL=0, EMAIL_BACKEND='django.core.mail.backends.locmem.EmailBackend'):
+        return measure_all(build_scenarios(prefix), parameters['iterations'], parameters['rounds'])
+
+def environment():
+    import django
+    return {
+        'python': platform.python_version(),
+        'django': django.get_version(),
+        'sqlite': sqlite3.sqlite_version,
+        'machine': platform.machine(),
+    }
+
+def code_version():
+    """Hash of the benchmarked code: the application modules, without tests and migrations"""
+    digest = hashlib.sha256()
+    for pattern in ('taskninja/*.py', 'tasks/*.py', 'tasks/management/commands/*.py'):
+        for path in sorted(glob.glob(os.path.join(ROOT, pattern))):
+            digest.update(os.path.relpath(path, ROOT).encode())
+            with open(path, 'rb') as f:
+                digest.update(f.read())
+    return digest.hexdigest()[:16]
+
+def compare(results, baseline, threshold, min_delta):
+    """(name, baseline ms, current ms, ratio, regressed) per scenario of this run"""
+    rows = []
+    for name, result in results['scenarios'].items():
+        before = baseline['scenarios'].get(name)
+        if before is None:
+            rows.append((name, None, result['median_ms'], None, False))
+            continue
+        ratio = result['median_ms'] / before['median_ms'] if before['median_ms'] else 1
+        regressed = ratio > 1 + threshold and result['median_ms'] - before['median_ms'] > min_delta
+        rows.append((name, before['median_ms'], result['median_ms'], ratio, regressed))
+    return rows
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--users', type=int, default=20)
+    parser.add_argument('--tasks', type=int, default=200, help='Tasks per user')
+    parser.add_argument('--subtasks', type=int, default=3, help='Subtasks per task')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--iterations', type=int, default=20, help='Timed iterations per round')
+    parser.add_argument('--rounds', type=int, default=5)
+    parser.add_argument('--output', help='Write the results to this JSON file')
+    parser.add_argument('--baseline', default=BASELINE)
+    parser.add_argument('--threshold', type=float, default=0.25, help='Allowed slowdown, e.g. 0.25 for 25%%')
+    parser.add_argument('--min-delta', type=float, default=2.0, help='Slowdowns below this many ms never fail')
+    parser.add_argument('--update-baseline', action='store_true', help='Store this run as the baseline')
+    args = parser.parse_args()
+    parameters = {
+        'users': args.users, 'tasks': args.tasks, 'subtasks': args.subtasks,
+        'seed': args.seed, 'iterations': args.iterations, 'rounds': args.rounds,
+    }
+
+    setup()
+    with test_database():
+        scenarios = run(parameters)
+    results = {
+        'parameters': parameters, 'environment': environment(), 'code': code_version(), 'scenarios': scenarios,
+    }
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+    if args.update_baseline:
+        with open(args.baseline, 'w') as f:
+            json.dump(results, f, indent=2)
+            f.write('\n')
+        print(f'Baseline written to {args.baseline}')
+
+    baseline = None
+    if not args.update_baseline and os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        if baseline['parameters'] != parameters:
+            print(f'Baseline parameters {baseline["parameters"]} differ from this run; not comparing')
+            baseline = None
+        elif baseline['environment'] != results['environment']:
+            print(f'Warning: the baseline was recorded on {baseline["environment"]}')
+        if baseline is not None and baseline.get('code') != results['code']:
+            print(
+                'Warning: the code changed since the baseline was recorded; '
+                're-record it with --update-baseline once the change is intended'
+            )
+
+    print(f"{args.users} users x {args.tasks} tasks, best median of {args.rounds} rounds of {args.iterations} iterations")
+    if baseline is None:
+        for name, result in scenarios.items():
+            print(f"  {name:20s} {result['median_ms']:9.2f} ms  (p95 {result['p95_ms']:.2f} ms)")
+        return
+
+    regressions = []
+    print(f"  {'scenario':20s} {'baseline':>9s} {'current':>9s}  change")
+    for name, before, current, ratio, regressed in compare(results, baseline, args.threshold, args.min_delta):
+        if before is None:
+            print(f"  {name:20s} {'-':>9s} {current:9.2f}  new")
+            continue
+        flag = '  REGRESSION' if regressed else ''
+        print(f"  {name:20s} {before:9.2f} {current:9.2f}  {(ratio - 1) * 100:+5.0f}%{flag}")
+        if regressed:
+            regressions.append(name)
+    if regressions:
+        print(f"{len(regressions)} scenario(s) more than {args.threshold:.0%} slower than the baseline: {', '.join(regressions)}")
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
@@ -2,6 +2,9 @@
 ASGI config for taskninja project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
+Requests are routed with ASGI_URLCONF, which serves the hot task read
+endpoints from native async views. WebSocket connections get the change
+push of tasks.push.
 
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
@@ -9,8 +12,26 @@ https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
 
 import os
 
-from django.core.asgi import get_asgi_application
+import django
+from django.conf import settings
+from django.core.handlers.asgi import ASGIHandler
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'taskninja.settings')
 
-application = get_asgi_application()
+django.setup(set_prefix=False)
+
+from tasks.push import websocket_application  # noqa: E402 (needs the apps loaded)
+
+class TaskNinjaASGIHandler(ASGIHandler):
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'websocket':
+            return await websocket_application(scope, receive, send)
+        return await super().__call__(scope, receive, send)
+
+    def create_request(self, scope, body_file):
+        request, error_response = super().create_request(scope, body_file)
+        if request is not None:
+            request.urlconf = settings.ASGI_URLCONF
+        return request, error_response
+
+application = TaskNinjaASGIHandler()
@@ -0,0 +1,10 @@
+"""
+URL configuration used under ASGI: the async read views of tasks.async_urls
+take precedence over the synchronous API.
+"""
+from django.urls import path, include
+from .urls import urlpatterns as wsgi_urlpatterns
+
+urlpatterns = [
+    path('api/', include('tasks.async_urls')),
+] + wsgi_urlpatterns
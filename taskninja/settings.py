@@ -3,6 +3,7 @@ Django settings for taskninja project.
 """
 import os
 from pathlib import Path
+import django
 from dotenv import load_dotenv
 
 # Load environment variables
@@ -33,6 +34,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    # First, so its timings cover the other middleware too
+    'tasks.metrics.MetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'corsheaders.middleware.CorsMiddleware',
@@ -44,6 +47,8 @@ MIDDLEWARE = [
 ]
 
 ROOT_URLCONF = 'taskninja.urls'
+# Used by taskninja/asgi.py; adds the async read views in front of ROOT_URLCONF
+ASGI_URLCONF = os.getenv('ASGI_URLCONF', 'taskninja.asgi_urls')
 
 TEMPLATES = [
     {
@@ -63,11 +68,58 @@ TEMPLATES = [
 
 WSGI_APPLICATION = 'taskninja.wsgi.application'
 
-# Database
-DATABASES = {
+# Database (SQLite by default; set DB_ENGINE=django.db.backends.postgresql and
+# the DB_* variables to use PostgreSQL)
+DB_ENGINE = os.getenv('DB_ENGINE', 'django.db.backends.sqlite3')
+if DB_ENGINE == 'django.db.backends.sqlite3':
+    DATABASES = {
+        'default': {
+            'ENGINE': DB_ENGINE,
+            'NAME': os.getenv('DB_NAME', str(BASE_DIR / 'db.sqlite3')),
+            # Take the write lock when a transaction starts, so a transaction that
+            # reads before it writes waits for busy_timeout instead of failing (Django 5.1+)
+            'OPTIONS': {'transaction_mode': 'IMMEDIATE'} if django.VERSION >= (5, 1) else {},
+        }
+    }
+else:
+    DATABASES = {
+        'default': {
+            'ENGINE': DB_ENGINE,
+            'NAME': os.getenv('DB_NAME', 'taskninja'),
+            'USER': os.getenv('DB_USER', ''),
+            'PASSWORD': os.getenv('DB_PASSWORD', ''),
+            'HOST': os.getenv('DB_HOST', 'localhost'),
+            'PORT': os.getenv('DB_PORT', '5432'),
+            # Keep each worker thread's connection open between requests
+            'CONN_MAX_AGE': int(os.getenv('DB_CONN_MAX_AGE', '60')),
+            'CONN_HEALTH_CHECKS': True,
+            'OPTIONS': {},
+        }
+    }
+    DB_POOL_MAX_SIZE = int(os.getenv('DB_POOL_MAX_SIZE', '0'))
+    if DB_POOL_MAX_SIZE:
+        # psycopg 3 connection pool shared by the threads of a worker (Django 5.1+);
+        # pooled connections replace persistent ones
+        DATABASES['default']['CONN_MAX_AGE'] = 0
+        DATABASES['default']['OPTIONS']['pool'] = {
+            'min_size': int(os.getenv('DB_POOL_MIN_SIZE', '2')),
+            'max_size': DB_POOL_MAX_SIZE,
+            'timeout': int(os.getenv('DB_POOL_TIMEOUT', '10')),  # Seconds to wait for a free connection
+        }
+
+# Applied to every new SQLite connection (tasks/db.py). WAL lets API reads go on
+# while the reminder sender writes; NORMAL only syncs at checkpoints in WAL mode
+SQLITE_JOURNAL_MODE = os.getenv('SQLITE_JOURNAL_MODE', 'WAL')
+SQLITE_SYNCHRONOUS = os.getenv('SQLITE_SYNCHRONOUS', 'NORMAL')
+SQLITE_BUSY_TIMEOUT = int(os.getenv('SQLITE_BUSY_TIMEOUT', '5000'))  # Milliseconds a writer waits for the lock
+SQLITE_MMAP_SIZE = int(os.getenv('SQLITE_MMAP_SIZE', str(256 * 1024 * 1024)))  # Bytes of the file read through mmap
+
+# Cache (locmem is per process; point CACHE_BACKEND at Redis or Memcached when
+# running several workers so cache invalidation reaches all of them)
+CACHES = {
     'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+        'BACKEND': os.getenv('CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.getenv('CACHE_LOCATION', 'taskninja'),
     }
 }
 
@@ -114,11 +166,52 @@ EMAIL_HOST_PASSWORD = os.getenv('EMAIL_HOST_PASSWORD', '')
 # Rest Framework settings
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
+        'tasks.authentication.TokenAuthentication',
         'rest_framework.authentication.BasicAuthentication',
     ],
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
     ],
+    'DEFAULT_RENDERER_CLASSES': [
+        'tasks.renderers.ORJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+}
+
+# API tokens issued by /api/login/
+AUTH_TOKEN_TTL = int(os.getenv('AUTH_TOKEN_TTL', str(7 * 24 * 60 * 60)))  # Seconds
+AUTH_TOKEN_CACHE_SIZE = int(os.getenv('AUTH_TOKEN_CACHE_SIZE', '10000'))
+AUTH_TOKEN_CACHE_TTL = int(os.getenv('AUTH_TOKEN_CACHE_TTL', '60'))  # Seconds a verified token is trusted without a DB check
+
+# Seconds a cached task list/detail payload is kept (0 disables the cache)
+TASK_CACHE_TTL = int(os.getenv('TASK_CACHE_TTL', '300'))
+
+# Pagination for the task, subtask and reminder lists
+API_PAGE_SIZE = int(os.getenv('API_PAGE_SIZE', '50'))
+API_MAX_PAGE_SIZE = int(os.getenv('API_MAX_PAGE_SIZE', '200'))
+API_MAX_BULK_SIZE = int(os.getenv('API_MAX_BULK_SIZE', '500'))
+
+# WebSocket change push (ws://<host>/ws/tasks/)
+PUSH_CHANNEL_LAYER = os.getenv('PUSH_CHANNEL_LAYER', 'tasks.push.InMemoryChannelLayer')
+PUSH_QUEUE_SIZE = int(os.getenv('PUSH_QUEUE_SIZE', '100'))  # Unsent events per connection before it must resync
+
+# Delta sync (/api/sync/)
+SYNC_WATERMARK_LAG = int(os.getenv('SYNC_WATERMARK_LAG', '5'))  # Seconds the returned watermark trails the clock
+SYNC_TOMBSTONE_DAYS = int(os.getenv('SYNC_TOMBSTONE_DAYS', '30'))  # Days deletions are kept for sync clients
+
+# Request metrics (/api/metrics/, staff only)
+SERVER_TIMING = os.getenv('SERVER_TIMING', 'False').lower() == 'true'  # Add a Server-Timing header to responses
+
+# Errors of the reminder sender and the AI generator go to stderr
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        'tasks': {'handlers': ['console'], 'level': os.getenv('LOG_LEVEL', 'INFO')},
+    },
 }
 
 # AI settings
@@ -126,7 +219,22 @@ GEMINI_API_KEY = os.getenv('GEMINI_API_KEY', '')
 AI_MODEL = os.getenv('AI_MODEL', 'gemini-2.0-flash')
 AI_TEMPERATURE = float(os.getenv('AI_TEMPERATURE', '0.7'))
 AI_MAX_TOKENS = int(os.getenv('AI_MAX_TOKENS', '8192'))
+AI_BACKEND = os.getenv('AI_BACKEND', 'tasks.ai_utils.GeminiBackend')
+AI_MAX_CONCURRENCY = int(os.getenv('AI_MAX_CONCURRENCY', '4'))  # Model calls running at once
+AI_CACHE_SIZE = int(os.getenv('AI_CACHE_SIZE', '1000'))
+AI_CACHE_TTL = int(os.getenv('AI_CACHE_TTL', '3600'))  # Seconds generated subtasks are reused
+AI_BATCH_SIZE = int(os.getenv('AI_BATCH_SIZE', '10'))  # Tasks packed into one batch prompt
+AI_BATCH_RETRIES = int(os.getenv('AI_BATCH_RETRIES', '1'))  # Retries for tasks missing from a batch answer
+AI_STUB_LATENCY = float(os.getenv('AI_STUB_LATENCY', '0.5'))  # Seconds per call for tasks.ai_utils.StubBackend
 
 # Task settings
 DEFAULT_TASK_REMINDER_TIMES = [int(x) for x in os.getenv('DEFAULT_TASK_REMINDER_TIMES', '30,120,1440,4320').split(',')]
 MAX_TASKS_PER_USER = int(os.getenv('MAX_TASKS_PER_USER', '1000'))
+
+# Reminder settings
+REMINDER_BATCH_SIZE = int(os.getenv('REMINDER_BATCH_SIZE', '500'))
+REMINDER_CLAIM_TIMEOUT = int(os.getenv('REMINDER_CLAIM_TIMEOUT', '600'))  # Seconds before a stale claim is retaken
+REMINDER_MAX_ATTEMPTS = int(os.getenv('REMINDER_MAX_ATTEMPTS', '5'))  # Failed deliveries before a reminder is dead-lettered
+REMINDER_RETRY_DELAY = int(os.getenv('REMINDER_RETRY_DELAY', '300'))  # Seconds before the first retry, doubling after each failure
+REMINDER_RETRY_MAX_DELAY = int(os.getenv('REMINDER_RETRY_MAX_DELAY', str(6 * 60 * 60)))  # Longest wait between retries
+REMINDER_DIGEST_WINDOW = int(os.getenv('REMINDER_DIGEST_WINDOW', '3600'))  # Seconds ahead a digest also covers
@@ -1,4 +1,5 @@
 from django.contrib import admin
+from django.utils import timezone
 from .models import Task, SubTask, Category, Reminder
 
 @admin.register(Task)
@@ -7,13 +8,15 @@ class TaskAdmin(admin.ModelAdmin):
     list_filter = ('is_completed', 'priority', 'category')
     search_fields = ('title', 'description')
     ordering = ('-due_date',)
+    list_select_related = ('user', 'category')
 
 @admin.register(SubTask)
 class SubTaskAdmin(admin.ModelAdmin):
     list_display = ('title', 'task', 'minutes', 'is_completed', 'created_at')
     list_filter = ('is_completed',)
-    search_fields = ('title', 'task')
+    search_fields = ('title', 'task__title')
     ordering = ('created_at',)
+    list_select_related = ('task',)
 
 @admin.register(Category)
 class CategoryAdmin(admin.ModelAdmin):
@@ -23,6 +26,20 @@ class CategoryAdmin(admin.ModelAdmin):
 
 @admin.register(Reminder)
 class ReminderAdmin(admin.ModelAdmin):
-    list_display = ('task', 'remind_at', 'sent')
-    list_filter = ('sent',)
+    list_display = ('task', 'remind_at', 'sent', 'attempts', 'next_attempt_at', 'dead_lettered')
+    list_filter = ('sent', 'dead_lettered')
     ordering = ('remind_at',)
+    list_select_related = ('task',)
+    readonly_fields = ('attempts', 'last_error')
+    actions = ('retry_reminders',)
+
+    @admin.action(description='Retry selected reminders now')
+    def retry_reminders(self, request, queryset):
+        reminders = list(queryset.filter(sent=False))
+        now = timezone.now()
+        for reminder in reminders:
+            reminder.reset_attempts()
+            # Bumped so a running scheduler picks the reminders up again
+            reminder.updated_at = now
+        Reminder.objects.bulk_update(reminders, Reminder.RETRY_FIELDS)
+        self.message_user(request, f'{len(reminders)} reminders will be retried on the next run.')
@@ -1,28 +1,52 @@
+import asyncio
+import copy
+import hashlib
+import json
+import logging
+import re
+import threading
+import time
+from collections import Counter, OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
 import google.generativeai as genai
 from django.conf import settings
+from django.db import transaction
+from django.utils.module_loading import import_string
+from .cache import invalidate_user_cache
+from .metrics import outbound, timed
+from .push import publish_changed
+from .models import SubTask
 from datetime import datetime, timedelta
 
+logger = logging.getLogger(__name__)
+
 def setup_gemini():
     """Configure the Gemini API"""
     genai.configure(api_key=settings.GEMINI_API_KEY)
-    model = genai.GenerativeModel('gemini-pro')
+    model = genai.GenerativeModel(
+        settings.AI_MODEL,
+        generation_config={
+            'temperature': settings.AI_TEMPERATURE,
+            'max_output_tokens': settings.AI_MAX_TOKENS,
+        }
+    )
     return model
 
-def generate_subtasks(task_title, task_description=None, task_due_date=None):
-    """
-    Generate subtasks for a given task using Google's Gemini AI
-    """
-    # Format due date for prompt
-    due_date_str = ""
-    if task_due_date:
-        try:
-            due_date = datetime.fromisoformat(task_due_date.replace('Z', '+00:00'))
-            due_date_str = f"\nMain task due date: {due_date.strftime('%Y-%m-%d %H:%M')}"
-        except:
-            due_date_str = ""
+def parse_due_date(task_due_date):
+    """Parse an ISO due date string, returning None when it is missing or invalid"""
+    if not task_due_date:
+        return None
+    try:
+        return datetime.fromisoformat(str(task_due_date).replace('Z', '+00:00'))
+    except ValueError:
+        return None
 
-    # Construct the prompt
-    prompt = f"""
+def build_prompt(task_title, task_description=None, task_due_date=None):
+    """Build the subtask generation prompt for a task"""
+    due_date = parse_due_date(task_due_date)
+    due_date_str = f"\nMain task due date: {due_date.strftime('%Y-%m-%d %H:%M')}" if due_date else ""
+
+    return f"""
     Break down the following task into 3-5 specific, actionable subtasks:
     Task: {task_title}
     {f'Description: {task_description}' if task_description else ''}
@@ -31,52 +55,603 @@ def generate_subtasks(task_title, task_description=None, task_due_date=None):
     For each subtask, provide:
     - Title: [subtask description]
     - Due: [YYYY-MM-DD HH:MM]
+    - Minutes: [estimated minutes of work]
 
     Note: Keep responses in simple format, no markdown or formatting.
     """
 
-    try:
-        model = setup_gemini()
-        response = model.generate_content(prompt)
-        
-        if not response.text:
-            return []
+BATCH_HEADER_RE = re.compile(r'^[#*\s]*task\s+(\d+)\W*$', re.IGNORECASE)
+
+def build_batch_prompt(tasks):
+    """
+    Build one prompt that asks for the subtasks of several tasks.
+    `tasks` is a list of (title, description, due_date) tuples; each task
+    gets a numbered "### Task N" section that the answer has to repeat.
+    """
+    sections = []
+    for number, (task_title, task_description, task_due_date) in enumerate(tasks, 1):
+        lines = [f'### Task {number}', f'Task: {task_title}']
+        if task_description:
+            lines.append(f'Description: {task_description}')
+        due_date = parse_due_date(task_due_date)
+        if due_date:
+            lines.append(f"Main task due date: {due_date.strftime('%Y-%m-%d %H:%M')}")
+        sections.append('\n'.join(lines))
+
+    return (
+        'Break down each of the following tasks into 3-5 specific, actionable subtasks.\n\n'
+        + '\n\n'.join(sections)
+        + '\n\nAnswer with one section per task, starting with its header line exactly as given '
+        '(for example "### Task 1"). In each section, provide for every subtask:\n'
+        'Title: [subtask description]\n'
+        'Due: [YYYY-MM-DD HH:MM]\n'
+        'Minutes: [estimated minutes of work]\n\n'
+        'Note: Keep responses in simple format, no other text, markdown or formatting.'
+    )
 
-        # Parse the response into structured data
+def parse_batch_subtasks(text, tasks):
+    """
+    Split a batch answer into one subtask list per task, in the order of
+    `tasks`. Tasks whose section is missing or unparseable get [].
+    """
+    sections = {}
+    number = None
+    for line in (text or '').split('\n'):
+        header = BATCH_HEADER_RE.match(line.strip())
+        if header:
+            number = int(header.group(1))
+            sections.setdefault(number, [])
+        elif number is not None:
+            sections[number].append(line)
+
+    if not sections and len(tasks) == 1:
+        # A single task answered without its header
+        sections[1] = (text or '').split('\n')
+
+    return [
+        parse_subtasks('\n'.join(sections.get(number, [])), task_due_date)
+        for number, (_, _, task_due_date) in enumerate(tasks, 1)
+    ]
+
+class SubtaskStreamParser:
+    """
+    Incremental "Title: / Due: / Minutes:" parser. feed() takes the model
+    response as it arrives and returns every subtask completed so far; a
+    subtask is complete once all three lines are in, or when the next
+    subtask starts.
+    """
+    def __init__(self, task_due_date=None):
+        self.default_due = parse_due_date(task_due_date)
+        self.buffer = ''
+        self.current = {}
+
+    def feed(self, text):
+        self.buffer += text
+        *lines, self.buffer = self.buffer.split('\n')
+        return [subtask for line in lines for subtask in self.parse_line(line)]
+
+    def close(self):
+        """Parse whatever is left once the response has ended"""
+        subtasks = self.parse_line(self.buffer)
+        self.buffer = ''
+        return subtasks + self.finish()
+
+    def parse_line(self, line):
+        # Remove any markdown symbols and clean up
+        line = line.strip().replace('*', '').lstrip('- ').strip()
+        lowered = line.lower()
         subtasks = []
-        current_subtask = {}
-        
-        # Split into lines and clean up
-        lines = [line.strip() for line in response.text.split('\n') if line.strip()]
-        
+
+        if lowered.startswith('title:'):
+            subtasks = self.finish()
+            self.current = {'title': line[6:].strip()}
+        elif lowered.startswith('due:'):
+            try:
+                due_date = datetime.strptime(line[4:].strip(), '%Y-%m-%d %H:%M')
+                self.current['due_date'] = due_date.isoformat()
+            except ValueError:
+                if self.default_due:
+                    self.current['due_date'] = (self.default_due - timedelta(hours=1)).isoformat()
+        elif lowered.startswith('minutes:'):
+            minutes = re.search(r'\d+', line[8:])
+            if self.current and minutes:
+                self.current['minutes'] = int(minutes.group())
+
+        if {'title', 'due_date', 'minutes'} <= self.current.keys():
+            subtasks += self.finish()
+        return subtasks
+
+    def finish(self):
+        subtask, self.current = self.current, {}
+        return [subtask] if 'title' in subtask and 'due_date' in subtask else []
+
+def parse_subtasks(text, task_due_date=None):
+    """Parse a "Title: / Due:" model response into subtask dicts"""
+    parser = SubtaskStreamParser(task_due_date)
+    return parser.feed(text or '') + parser.close()
+
+class GeminiBackend:
+    """Calls the Gemini API through one model client shared by every request"""
+    def __init__(self):
+        self.model = None
+        self.lock = threading.Lock()
+
+    def get_model(self):
+        with self.lock:
+            if self.model is None:
+                self.model = setup_gemini()
+            return self.model
+
+    def generate(self, prompt):
+        response = self.get_model().generate_content(prompt)
+        return response.text
+
+    def stream(self, prompt):
+        """Yield the response text in chunks as the model produces it"""
+        for chunk in self.get_model().generate_content(prompt, stream=True):
+            try:
+                yield chunk.text
+            except ValueError:
+                # Chunks without text parts (e.g. safety metadata)
+                continue
+
+class StubBackend:
+    """
+    Offline backend that answers after AI_STUB_LATENCY seconds with canned
+    subtasks in the Gemini response format. Streamed answers arrive one
+    line at a time, spread over the same latency. Used for tests and
+    benchmarks.
+    """
+    def __init__(self, latency=None):
+        self.latency = settings.AI_STUB_LATENCY if latency is None else latency
+        self.calls = 0
+        self.lock = threading.Lock()
+
+    def generate(self, prompt):
+        with self.lock:
+            self.calls += 1
+        if self.latency:
+            time.sleep(self.latency)
+        return self.respond(prompt)
+
+    def stream(self, prompt):
+        with self.lock:
+            self.calls += 1
+        lines = self.respond(prompt).splitlines(keepends=True)
         for line in lines:
-            # Remove any markdown symbols and clean up
-            line = line.replace('*', '').replace('**', '').strip()
-            
-            if line.lower().startswith('title:'):
-                if current_subtask and 'title' in current_subtask and 'due_date' in current_subtask:
-                    subtasks.append(current_subtask.copy())
-                current_subtask = {'title': line[6:].strip()}
-            elif line.lower().startswith('due:'):
-                try:
-                    due_str = line[4:].strip()
-                    due_date = datetime.strptime(due_str, '%Y-%m-%d %H:%M')
-                    current_subtask['due_date'] = due_date.isoformat()
-                except:
-                    if task_due_date:
-                        default_due = datetime.fromisoformat(task_due_date.replace('Z', '+00:00')) - timedelta(hours=1)
-                        current_subtask['due_date'] = default_due.isoformat()
-
-        # Add the last subtask if complete
-        if current_subtask and 'title' in current_subtask and 'due_date' in current_subtask:
-            subtasks.append(current_subtask)
-
-        print(f"Generated {len(subtasks)} subtasks")  # Debug log
+            if self.latency:
+                time.sleep(self.latency / len(lines))
+            yield line
+
+    def respond(self, prompt):
+        sections = []
+        header = None
+        for line in prompt.splitlines():
+            line = line.strip()
+            if BATCH_HEADER_RE.match(line):
+                header = line
+            elif line.startswith('Task:'):
+                sections.append({'header': header, 'title': line[5:].strip(),
+                                 'due_date': datetime.now() + timedelta(days=1)})
+            elif line.startswith('Main task due date:') and sections:
+                sections[-1]['due_date'] = datetime.strptime(line[19:].strip(), '%Y-%m-%d %H:%M')
+
+        return '\n\n'.join(self.answer(section) for section in sections)
+
+    def answer(self, section):
+        steps = ['Plan', 'Prepare for', 'Complete', 'Review']
+        lines = [section['header']] if section['header'] else []
+        for i, step in enumerate(steps):
+            due_date = section['due_date'] - timedelta(hours=len(steps) - i)
+            lines += [
+                f"Title: {step} {section['title']}",
+                f"Due: {due_date.strftime('%Y-%m-%d %H:%M')}",
+                f"Minutes: {30 * (i + 1)}",
+            ]
+        return '\n'.join(lines)
+
+class ResultCache:
+    """Thread-safe LRU cache whose entries expire `ttl` seconds after being stored"""
+    def __init__(self, max_size, ttl):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if expires_at <= time.monotonic():
+                del self.entries[key]
+                return None
+            self.entries.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        if self.max_size <= 0 or self.ttl <= 0:
+            return
+        with self.lock:
+            self.entries[key] = (value, time.monotonic() + self.ttl)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_size:
+                self.entries.popitem(last=False)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+def request_key(task_title, task_description=None, task_due_date=None):
+    """
+    Cache key for a generation request. Case and whitespace are normalized
+    and the due date is reduced to the minute, the precision of the prompt.
+    """
+    def normalize(text):
+        return ' '.join(str(text or '').split()).lower()
+
+    due_date = parse_due_date(task_due_date)
+    payload = json.dumps([
+        normalize(task_title),
+        normalize(task_description),
+        due_date.strftime('%Y-%m-%d %H:%M') if due_date else '',
+    ])
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+class SubtaskGenerator:
+    """
+    Runs subtask generation on a bounded thread pool.
+
+    Results are cached for AI_CACHE_TTL seconds, and a request identical to
+    one already in flight waits for that call instead of making its own, so
+    the backend sees each distinct task at most once at a time.
+    """
+    def __init__(self, backend=None, max_workers=None, cache_size=None, cache_ttl=None):
+        self.backend = backend or import_string(settings.AI_BACKEND)()
+        self.executor = ThreadPoolExecutor(
+            max_workers=max_workers or settings.AI_MAX_CONCURRENCY,
+            thread_name_prefix='subtask-generator'
+        )
+        self.cache = ResultCache(
+            settings.AI_CACHE_SIZE if cache_size is None else cache_size,
+            settings.AI_CACHE_TTL if cache_ttl is None else cache_ttl
+        )
+        self.in_flight = {}
+        # Requests waiting on each in-flight key, besides the one making the call
+        self.joined = Counter()
+        self.lock = threading.Lock()
+        self.stats = {'requests': 0, 'hits': 0, 'coalesced': 0, 'calls': 0, 'errors': 0, 'retried': 0}
+
+    def submit(self, task_title, task_description=None, task_due_date=None):
+        """Start generating subtasks and return a Future of the subtask list"""
+        key = request_key(task_title, task_description, task_due_date)
+        with self.lock:
+            self.stats['requests'] += 1
+            cached = self.cache.get(key)
+            if cached is not None:
+                self.stats['hits'] += 1
+                return self._resolved(cached)
+            shared = self.in_flight.get(key)
+            if shared is not None:
+                self.stats['coalesced'] += 1
+                self.joined[key] += 1
+            else:
+                self.stats['calls'] += 1
+                shared = self.executor.submit(
+                    self._generate, key, task_title, task_description, task_due_date
+                )
+                self.in_flight[key] = shared
+
+        # Every caller gets its own copy of the shared result
+        future = Future()
+        shared.add_done_callback(lambda done: self._copy_result(done, future))
+        return future
+
+    def generate(self, task_title, task_description=None, task_due_date=None, timeout=None):
+        """Generate subtasks, blocking until they are ready"""
+        with timed('ai'):
+            return self.submit(task_title, task_description, task_due_date).result(timeout)
+
+    async def agenerate(self, task_title, task_description=None, task_due_date=None):
+        """Generate subtasks without blocking the event loop"""
+        with timed('ai'):
+            return await asyncio.wrap_future(self.submit(task_title, task_description, task_due_date))
+
+    def stream(self, task_title, task_description=None, task_due_date=None):
+        """
+        Yield subtasks one at a time as the model streams its answer.
+        Cached results, and requests already in flight, are replayed all at
+        once instead; identical requests made meanwhile wait for this one.
+        """
+        key = request_key(task_title, task_description, task_due_date)
+        subtasks, shared, owned = self._begin_stream(key)
+        if shared is not None:
+            subtasks = shared.result()
+        if owned is None:
+            yield from copy.deepcopy(subtasks)
+            return
+        yield from self._stream_call(key, owned, task_title, task_description, task_due_date)
+
+    async def astream(self, task_title, task_description=None, task_due_date=None):
+        """
+        Async version of stream(). The model call runs on the generator's
+        thread pool; stopping the iteration early also stops the call.
+        Waiting for an identical request in flight happens on the event
+        loop, so no pool thread blocks on work queued behind it.
+        """
+        key = request_key(task_title, task_description, task_due_date)
+        subtasks, shared, owned = self._begin_stream(key)
+        if shared is not None:
+            subtasks = await asyncio.wrap_future(shared)
+        if owned is None:
+            for subtask in copy.deepcopy(subtasks):
+                yield subtask
+            return
+
+        loop = asyncio.get_running_loop()
+        queue = asyncio.Queue()
+        finished = object()
+        stopped = threading.Event()
+
+        def put(item):
+            if stopped.is_set():
+                return
+            try:
+                loop.call_soon_threadsafe(queue.put_nowait, item)
+            except RuntimeError:
+                # The event loop has closed under us
+                stopped.set()
+
+        def produce():
+            subtasks = self._stream_call(key, owned, task_title, task_description, task_due_date)
+            try:
+                for subtask in subtasks:
+                    if stopped.is_set():
+                        break
+                    put(subtask)
+            except Exception as e:
+                put(e)
+            finally:
+                subtasks.close()
+                put(finished)
+
+        self.executor.submit(produce)
+        try:
+            while True:
+                item = await queue.get()
+                if item is finished:
+                    break
+                if isinstance(item, Exception):
+                    raise item
+                yield item
+        finally:
+            stopped.set()
+
+    def _begin_stream(self, key):
+        """
+        (cached subtasks, in-flight future to wait for, future this stream
+        must resolve) for a stream request; only one of them is set. A
+        stream that makes its own call registers it in in_flight, as
+        submit() does.
+        """
+        with self.lock:
+            self.stats['requests'] += 1
+            cached = self.cache.get(key)
+            if cached is not None:
+                self.stats['hits'] += 1
+                return cached, None, None
+            shared = self.in_flight.get(key)
+            if shared is not None:
+                self.stats['coalesced'] += 1
+                self.joined[key] += 1
+                return None, shared, None
+            self.stats['calls'] += 1
+            owned = self.in_flight[key] = Future()
+            return None, None, owned
+
+    def _stream_call(self, key, owned, task_title, task_description, task_due_date):
+        """Stream a model call and resolve `owned` with its subtasks"""
+        parser = SubtaskStreamParser(task_due_date)
+        subtasks = []
+        completed = False
+        try:
+            for chunk in self.backend.stream(build_prompt(task_title, task_description, task_due_date)):
+                for subtask in parser.feed(chunk):
+                    subtasks.append(subtask)
+                    yield copy.deepcopy(subtask)
+            for subtask in parser.close():
+                subtasks.append(subtask)
+                yield copy.deepcopy(subtask)
+            completed = True
+        except Exception as e:
+            logger.exception('Error in stream: %s', e)
+            with self.lock:
+                self.stats['errors'] += 1
+            subtasks, completed = [], True
+        finally:
+            self._finish_stream(key, owned, subtasks if completed else None,
+                                (task_title, task_description, task_due_date))
+
+    def _finish_stream(self, key, owned, subtasks, task):
+        """
+        Resolve a stream's future. A stream stopped early (subtasks None)
+        that other requests joined hands over to a regular call, whose
+        result they get; without them there is nothing left to do.
+        """
+        handoff = None
+        with self.lock:
+            if subtasks is None and self.joined.get(key):
+                self.stats['calls'] += 1
+                handoff = self.executor.submit(self._generate, key, *task)
+            else:
+                if subtasks:
+                    self.cache.set(key, subtasks)
+                self.in_flight.pop(key, None)
+                self.joined.pop(key, None)
+        if handoff is not None:
+            handoff.add_done_callback(lambda done: self._copy_result(done, owned))
+        else:
+            owned.set_result(subtasks or [])
+
+    def generate_batch(self, tasks, batch_size=None, retries=None):
+        """
+        Generate subtasks for many (title, description, due_date) tuples,
+        packing up to `batch_size` tasks (default AI_BATCH_SIZE) into each
+        model call. Tasks whose answer does not parse are retried, in a
+        smaller batch of just those tasks, up to `retries` times (default
+        AI_BATCH_RETRIES). Returns one subtask list per task, [] for the
+        tasks that still failed.
+        """
+        batch_size = batch_size or settings.AI_BATCH_SIZE
+        retries = settings.AI_BATCH_RETRIES if retries is None else retries
+        tasks = list(tasks)
+        results = [None] * len(tasks)
+
+        # Serve cached tasks and send each distinct one only once
+        pending = {}
+        with self.lock:
+            for index, task in enumerate(tasks):
+                key = request_key(*task)
+                self.stats['requests'] += 1
+                cached = self.cache.get(key)
+                if cached is not None:
+                    self.stats['hits'] += 1
+                    results[index] = copy.deepcopy(cached)
+                else:
+                    pending.setdefault(key, []).append(index)
+
+        for attempt in range(retries + 1):
+            if not pending:
+                break
+            keys = list(pending)
+            chunks = [keys[i:i + batch_size] for i in range(0, len(keys), batch_size)]
+            with self.lock:
+                self.stats['calls'] += len(chunks)
+                if attempt:
+                    self.stats['retried'] += len(keys)
+            futures = [
+                self.executor.submit(self._generate_batch, [tasks[pending[key][0]] for key in chunk])
+                for chunk in chunks
+            ]
+
+            failed = {}
+            for chunk, future in zip(chunks, futures):
+                with timed('ai'):
+                    answers = future.result()
+                for key, subtasks in zip(chunk, answers):
+                    if not validate_subtasks(subtasks):
+                        failed[key] = pending[key]
+                        continue
+                    self.cache.set(key, subtasks)
+                    for index in pending[key]:
+                        results[index] = copy.deepcopy(subtasks)
+            pending = failed
+
+        return [subtasks or [] for subtasks in results]
+
+    def _generate_batch(self, tasks):
+        try:
+            with outbound('ai'):
+                text = self.backend.generate(build_batch_prompt(tasks))
+            return parse_batch_subtasks(text, tasks)
+        except Exception as e:
+            logger.exception('Error in generate_batch: %s', e)
+            with self.lock:
+                self.stats['errors'] += 1
+            return [[] for _ in tasks]
+
+    def _generate(self, key, task_title, task_description, task_due_date):
+        try:
+            prompt = build_prompt(task_title, task_description, task_due_date)
+            with outbound('ai'):
+                text = self.backend.generate(prompt)
+            subtasks = parse_subtasks(text, task_due_date)
+        except Exception as e:
+            logger.exception('Error in generate_subtasks: %s', e)
+            with self.lock:
+                self.stats['errors'] += 1
+            subtasks = []
+
+        with self.lock:
+            # Failures and empty answers are not cached, so the next request retries
+            if subtasks:
+                self.cache.set(key, subtasks)
+            self.in_flight.pop(key, None)
+            self.joined.pop(key, None)
         return subtasks
 
-    except Exception as e:
-        print(f"Error in generate_subtasks: {str(e)}")  # Debug log
-        return []
+    @staticmethod
+    def _copy_result(shared, future):
+        if shared.cancelled():
+            future.cancel()
+        elif shared.exception() is not None:
+            future.set_exception(shared.exception())
+        else:
+            future.set_result(copy.deepcopy(shared.result()))
+
+    @staticmethod
+    def _resolved(subtasks):
+        future = Future()
+        future.set_result(copy.deepcopy(subtasks))
+        return future
+
+    def shutdown(self, wait=True):
+        self.executor.shutdown(wait=wait)
+
+_generator = None
+_generator_lock = threading.Lock()
+
+def get_generator():
+    """The process-wide SubtaskGenerator, created on first use"""
+    global _generator
+    with _generator_lock:
+        if _generator is None:
+            _generator = SubtaskGenerator()
+        return _generator
+
+def generate_subtasks(task_title, task_description=None, task_due_date=None):
+    """
+    Generate subtasks for a given task using Google's Gemini AI
+    """
+    return get_generator().generate(task_title, task_description, task_due_date)
+
+async def agenerate_subtasks(task_title, task_description=None, task_due_date=None):
+    """
+    Async version of generate_subtasks()
+    """
+    return await get_generator().agenerate(task_title, task_description, task_due_date)
+
+def create_generated_subtasks(tasks, batch_size=None):
+    """
+    Generate subtasks for many Task objects in batched model calls and save
+    them with one bulk_create. Returns the created SubTask rows and the
+    tasks nothing could be generated for.
+    """
+    tasks = list(tasks)
+    results = get_generator().generate_batch(
+        [(task.title, task.description, task.due_date.isoformat()) for task in tasks],
+        batch_size=batch_size
+    )
+
+    subtasks, failed = [], []
+    for task, generated in zip(tasks, results):
+        if not generated:
+            failed.append(task)
+        for subtask in generated:
+            subtasks.append(SubTask(
+                task=task,
+                title=subtask['title'][:255],
+                minutes=subtask.get('minutes', SubTask._meta.get_field('minutes').default)
+            ))
+
+    with transaction.atomic():
+        # bulk_create skips the post_save signal that invalidates cached responses
+        for user_id in {task.user_id for task in tasks}:
+            invalidate_user_cache(user_id)
+            publish_changed(user_id)
+        created = SubTask.objects.bulk_create(subtasks)
+    return created, failed
 
 def validate_subtasks(subtasks):
     """
@@ -84,10 +659,10 @@ def validate_subtasks(subtasks):
     """
     if not isinstance(subtasks, list):
         return False
-        
+
     if len(subtasks) < 1:
         return False
-        
+
     for subtask in subtasks:
         if not isinstance(subtask, dict):
             return False
@@ -95,5 +670,5 @@ def validate_subtasks(subtasks):
             return False
         if not isinstance(subtask['title'], str) or not subtask['title']:
             return False
-            
+
     return True
@@ -6,3 +6,5 @@ class TasksConfig(AppConfig):
 
     def ready(self):
         import tasks.models  # Import models to ensure signals are registered
+        import tasks.db  # SQLite connection tuning
+        import tasks.metrics  # Query timing on every database connection
@@ -0,0 +1,11 @@
+from django.urls import path
+from . import async_views
+
+# Served ahead of tasks.urls under ASGI (see taskninja/asgi_urls.py). JSON GET
+# requests run natively async; everything else falls through to the DRF views.
+urlpatterns = [
+    path('tasks/', async_views.task_list, name='async-task-list'),
+    path('tasks/<int:pk>/', async_views.task_detail, name='async-task-detail'),
+    path('tasks/<int:pk>/subtasks/', async_views.task_subtasks, name='async-task-subtasks'),
+    path('reminders/', async_views.reminder_list, name='async-reminder-list'),
+]
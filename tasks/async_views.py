@@ -0,0 +1,194 @@
+import json
+from asgiref.sync import sync_to_async
+from django.http import Http404, HttpResponse, JsonResponse, StreamingHttpResponse
+from django.views.decorators.http import require_GET
+from rest_framework import exceptions
+from rest_framework.request import Request
+from rest_framework.settings import api_settings
+from .ai_utils import get_generator
+from .models import Task, SubTask
+from .search import ahas_fts_index
+from .renderers import ORJSONRenderer
+from .serializers import SubTaskSerializer, ValuesSerializer
+from .views import TaskViewSet, ReminderViewSet
+
+async def authenticate(request):
+    """
+    Authenticate a plain Django request with the REST framework
+    authentication classes. Returns (user, error_response).
+
+    Classes with an `aauthenticate` coroutine (TokenAuthentication) run on
+    the event loop; the others run in a worker thread.
+    """
+    user = None
+    try:
+        for authentication_class in api_settings.DEFAULT_AUTHENTICATION_CLASSES:
+            authenticator = authentication_class()
+            if hasattr(authenticator, 'aauthenticate'):
+                result = await authenticator.aauthenticate(request)
+            else:
+                result = await sync_to_async(authenticator.authenticate)(request)
+            if result is not None:
+                user = result[0]
+                break
+    except exceptions.AuthenticationFailed as e:
+        return None, JsonResponse({'detail': str(e.detail)}, status=401)
+    if user is None:
+        return None, JsonResponse(
+            {'detail': 'Authentication credentials were not provided.'},
+            status=401,
+            headers={'WWW-Authenticate': 'Token'}
+        )
+    return user, None
+
+def sse_event(event, data):
+    """Format one server-sent event"""
+    return f'event: {event}\ndata: {json.dumps(data)}\n\n'
+
+async def subtask_events(task):
+    count = 0
+    async for subtask in get_generator().astream(task.title, task.description, task.due_date.isoformat()):
+        count += 1
+        yield sse_event('subtask', subtask)
+    if count:
+        yield sse_event('done', {'count': count})
+    else:
+        yield sse_event('error', {'error': 'Could not generate subtasks'})
+
+@require_GET
+async def stream_task_subtasks(request, pk):
+    """
+    Stream AI-generated subtask suggestions for a task as server-sent
+    events: one `subtask` event per subtask as soon as the model has
+    written it, then `done` (or `error` when nothing could be generated).
+
+    Under ASGI the stream holds no worker thread while waiting on the model.
+    """
+    user, error = await authenticate(request)
+    if error:
+        return error
+    try:
+        task = await Task.objects.aget(pk=pk, user=user)
+    except Task.DoesNotExist:
+        return JsonResponse({'detail': 'Not found.'}, status=404)
+
+    response = StreamingHttpResponse(subtask_events(task), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    # Stop proxies such as nginx from buffering the stream
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+def json_response(data, status=200, headers=None):
+    """
+    Render `data` like the REST framework JSON renderer. The data is
+    kept on the response, like on a DRF Response, for the response cache.
+    """
+    content = ORJSONRenderer().render(data) if data is not None else b''
+    response = HttpResponse(content, status=status, headers=headers, content_type='application/json')
+    response.data = data
+    return response
+
+def accepts_json(request):
+    """Whether the request wants JSON rather than the browsable API"""
+    requested_format = request.GET.get(api_settings.URL_FORMAT_OVERRIDE)
+    if requested_format:
+        return requested_format == 'json'
+    return 'text/html' not in request.headers.get('Accept', '')
+
+class AsyncReadMixin:
+    """
+    Native async versions of a viewset's read actions.
+
+    The viewset itself supplies the queryset, filter backends, paginator and
+    serializer, so the async endpoints answer exactly like the synchronous
+    ones; only the queries run through the async ORM.
+    """
+    @classmethod
+    def for_request(cls, request, user, action, args, kwargs):
+        """A viewset instance set up like APIView.initial() would, for an authenticated user"""
+        drf_request = Request(request)
+        drf_request.user = user
+        drf_request.accepted_renderer = ORJSONRenderer()
+        drf_request.accepted_media_type = ORJSONRenderer.media_type
+        return cls(request=drf_request, action=action, args=args, kwargs=kwargs, format_kwarg=None, headers={})
+
+    def make_cached_response(self, data, status_code, etag):
+        return json_response(data, status_code, {'ETag': etag})
+
+    async def aget_object(self, pk):
+        queryset = self.get_queryset()
+        try:
+            return await queryset.aget(pk=pk)
+        except queryset.model.DoesNotExist:
+            raise Http404(f'No {queryset.model._meta.object_name} matches the given query.')
+
+    async def alist(self):
+        values_serializer = self.get_values_serializer()
+        queryset = self.filter_queryset(self.get_queryset())
+        if values_serializer is not None:
+            queryset = values_serializer.values(queryset)
+        page = await self.paginator.apaginate_queryset(queryset, self.request, view=self)
+        if values_serializer is not None:
+            data = values_serializer.to_representation(page)
+        else:
+            data = self.get_serializer(page, many=True).data
+        return json_response(self.paginator.get_paginated_response(data).data)
+
+    async def aretrieve(self, pk):
+        instance = await self.aget_object(pk)
+        return json_response(self.get_serializer(instance).data)
+
+class AsyncTaskViewSet(AsyncReadMixin, TaskViewSet):
+    async def alist(self):
+        if self.request.query_params.get(api_settings.SEARCH_PARAM):
+            # Look the search index up outside the (synchronous) filter backend
+            await ahas_fts_index(Task.objects.db)
+        return await self.acached_response(self.request, super().alist)
+
+    async def aretrieve(self, pk):
+        return await self.acached_response(self.request, lambda: super(AsyncTaskViewSet, self).aretrieve(pk))
+
+    async def asubtasks(self, pk):
+        task = await self.aget_object(pk)
+        values_serializer = ValuesSerializer.for_serializer(SubTaskSerializer)
+        rows = [row async for row in values_serializer.values(SubTask.objects.filter(task=task))]
+        return json_response(values_serializer.to_representation(rows))
+
+class AsyncReminderViewSet(AsyncReadMixin, ReminderViewSet):
+    pass
+
+def async_read_view(async_viewset, sync_viewset, actions):
+    """
+    Build a view that answers JSON GET requests with the native async
+    action of `async_viewset` and hands every other request (writes, the
+    browsable API) to the synchronous DRF view of `sync_viewset`.
+    """
+    sync_view = sync_to_async(sync_viewset.as_view(actions))
+    action = actions['get']
+
+    async def view(request, *args, **kwargs):
+        if request.method != 'GET' or not accepts_json(request):
+            return await sync_view(request, *args, **kwargs)
+        user, error = await authenticate(request)
+        if error:
+            return error
+
+        viewset = async_viewset.for_request(request, user, action, args, kwargs)
+        try:
+            return await getattr(viewset, f'a{action}')(**kwargs)
+        except Http404 as e:
+            return json_response({'detail': str(e)}, status=404)
+        except exceptions.APIException as e:
+            data = e.detail if isinstance(e.detail, (list, dict)) else {'detail': e.detail}
+            return json_response(data, status=e.status_code)
+
+    # Like DRF views: the REST framework authentication classes do their own CSRF checks
+    view.csrf_exempt = True
+    return view
+
+task_list = async_read_view(AsyncTaskViewSet, TaskViewSet, {'get': 'list', 'post': 'create'})
+task_detail = async_read_view(AsyncTaskViewSet, TaskViewSet, {
+    'get': 'retrieve', 'put': 'update', 'patch': 'partial_update', 'delete': 'destroy'
+})
+task_subtasks = async_read_view(AsyncTaskViewSet, TaskViewSet, {'get': 'subtasks'})
+reminder_list = async_read_view(AsyncReminderViewSet, ReminderViewSet, {'get': 'list', 'post': 'create'})
@@ -0,0 +1,152 @@
+import asyncio
+import threading
+import time
+from collections import OrderedDict
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core import signing
+from rest_framework import authentication, exceptions
+
+TOKEN_SALT = 'tasks.authentication.token'
+
+def issue_token(user):
+    """
+    Create a signed, expiring API token for a user.
+    Returns the token and its expiry as a unix timestamp.
+
+    The token carries the user's session auth hash, so changing the
+    password invalidates every token issued before the change.
+    """
+    expires_at = int(time.time()) + settings.AUTH_TOKEN_TTL
+    token = signing.dumps(
+        {'u': user.pk, 'h': user.get_session_auth_hash(), 'e': expires_at},
+        salt=TOKEN_SALT,
+        compress=True,
+    )
+    return token, expires_at
+
+class TokenCache:
+    """
+    Thread-safe LRU cache of verified tokens.
+
+    Entries expire after AUTH_TOKEN_CACHE_TTL seconds (never later than the
+    token itself), which bounds how long a deactivated user keeps access.
+    """
+    def __init__(self, max_size):
+        self.max_size = max_size
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, token):
+        with self.lock:
+            entry = self.entries.get(token)
+            if entry is None:
+                return None
+            user, expires_at = entry
+            if expires_at <= time.monotonic():
+                del self.entries[token]
+                return None
+            self.entries.move_to_end(token)
+            return user
+
+    def set(self, token, user, ttl):
+        with self.lock:
+            self.entries[token] = (user, time.monotonic() + ttl)
+            self.entries.move_to_end(token)
+            while len(self.entries) > self.max_size:
+                self.entries.popitem(last=False)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+token_cache = TokenCache(settings.AUTH_TOKEN_CACHE_SIZE)
+
+# Token verifications in progress in async code, by (event loop, token)
+_verifications = {}
+
+class TokenAuthentication(authentication.BaseAuthentication):
+    """
+    Authenticate with "Authorization: Token <token>" using tokens from
+    issue_token().
+
+    Checking a token is an HMAC and one primary-key lookup instead of a
+    full password hash, and repeat requests are served from token_cache
+    without touching the database.
+    """
+    keyword = 'Token'
+
+    def authenticate(self, request):
+        token = self.get_token(request)
+        if token is None:
+            return None
+        user = token_cache.get(token)
+        if user is None:
+            user, expires_in = self.verify_token(token)
+            token_cache.set(token, user, min(settings.AUTH_TOKEN_CACHE_TTL, expires_in))
+        return (user, token)
+
+    async def aauthenticate(self, request):
+        """authenticate() for async views; cached tokens never leave the event loop"""
+        token = self.get_token(request)
+        if token is None:
+            return None
+        return (await self.aget_user(token), token)
+
+    async def aget_user(self, token):
+        """
+        The user of a token, verified in a worker thread unless it is cached.
+        Concurrent calls for the same token (clients reconnecting all at
+        once) share one verification.
+        """
+        user = token_cache.get(token)
+        if user is not None:
+            return user
+        loop = asyncio.get_running_loop()
+        verification = _verifications.get((loop, token))
+        if verification is None:
+            verification = loop.create_task(self._averify(token))
+            _verifications[(loop, token)] = verification
+            verification.add_done_callback(lambda _: _verifications.pop((loop, token), None))
+        return await asyncio.shield(verification)
+
+    async def _averify(self, token):
+        user, expires_in = await sync_to_async(self.verify_token)(token)
+        token_cache.set(token, user, min(settings.AUTH_TOKEN_CACHE_TTL, expires_in))
+        return user
+
+    def get_token(self, request):
+        """The token from the Authorization header, or None for other schemes"""
+        auth = authentication.get_authorization_header(request).split()
+        if not auth or auth[0].lower() != self.keyword.lower().encode():
+            return None
+        if len(auth) != 2:
+            raise exceptions.AuthenticationFailed('Invalid token header.')
+        try:
+            return auth[1].decode()
+        except UnicodeError:
+            raise exceptions.AuthenticationFailed('Invalid token header.')
+
+    def verify_token(self, token):
+        """Return the token's user and the seconds left before it expires"""
+        try:
+            payload = signing.loads(token, salt=TOKEN_SALT)
+            user_id, auth_hash, expires_at = payload['u'], payload['h'], payload['e']
+        except (signing.BadSignature, KeyError, TypeError):
+            raise exceptions.AuthenticationFailed('Invalid token.')
+
+        expires_in = expires_at - time.time()
+        if expires_in <= 0:
+            raise exceptions.AuthenticationFailed('Token has expired.')
+
+        try:
+            user = User.objects.get(pk=user_id)
+        except User.DoesNotExist:
+            raise exceptions.AuthenticationFailed('Invalid token.')
+        if not user.is_active or auth_hash != user.get_session_auth_hash():
+            raise exceptions.AuthenticationFailed('Invalid token.')
+        return user, expires_in
+
+    def authenticate_header(self, request):
+        return self.keyword
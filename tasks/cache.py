@@ -0,0 +1,131 @@
+import hashlib
+import time
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import DEFAULT_CACHE_ALIAS, cache, caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.db import transaction
+from rest_framework import status
+from rest_framework.response import Response
+
+def _version_key(user_id):
+    return f'tasks:user:{user_id}:version'
+
+def get_user_version(user_id):
+    """Current cache version for a user's task data"""
+    key = _version_key(user_id)
+    version = cache.get(key)
+    if version is None:
+        # Start from the clock rather than 1, so an evicted counter can never
+        # come back to a version that still has payloads cached under it
+        version = time.time_ns()
+        if not cache.add(key, version, None):
+            version = cache.get(key, version)
+    return version
+
+async def acache(method, *args):
+    """
+    Call a cache method from async code.
+
+    The in-process cache only takes a lock for a moment, so it is called
+    directly. Other backends run in a worker thread; Django's own async
+    cache methods would queue them on the request's single database thread.
+    """
+    if isinstance(caches[DEFAULT_CACHE_ALIAS], LocMemCache):
+        return getattr(cache, method)(*args)
+    return await sync_to_async(getattr(cache, method), thread_sensitive=False)(*args)
+
+async def aget_user_version(user_id):
+    """Async version of get_user_version()"""
+    key = _version_key(user_id)
+    version = await acache('get', key)
+    if version is None:
+        version = time.time_ns()
+        if not await acache('add', key, version, None):
+            version = await acache('get', key, version)
+    return version
+
+def bump_user_version(user_id):
+    """Invalidate every cached task payload of a user"""
+    try:
+        cache.incr(_version_key(user_id))
+    except ValueError:
+        cache.set(_version_key(user_id), time.time_ns(), None)
+
+def invalidate_user_cache(user_id):
+    """
+    Invalidate a user's cached payloads once the current transaction commits.
+
+    Bumping only after commit stops a concurrent request from caching the
+    pre-commit data under the new version.
+    """
+    if user_id is not None:
+        transaction.on_commit(lambda: bump_user_version(user_id))
+
+class CachedResponseMixin:
+    """
+    Caches serialized responses per user and per request fingerprint.
+
+    Entries are keyed on the user's version counter, which the model
+    signals bump on every change, so stale entries are never read again
+    and simply expire after TASK_CACHE_TTL. Responses carry an ETag built
+    from the same version; a matching If-None-Match gets a 304 without
+    touching the database or the serializer.
+
+    Payloads that also depend on something other than the user's data
+    (such as the current time) pass that as `variant`, which becomes part
+    of the key and the ETag.
+    """
+    def cached_response(self, request, render, variant=None):
+        if not settings.TASK_CACHE_TTL:
+            return render()
+
+        version = get_user_version(request.user.pk)
+        etag, key = self.get_response_cache_key(request, version, variant)
+        if etag in request.headers.get('If-None-Match', ''):
+            return self.make_cached_response(None, status.HTTP_304_NOT_MODIFIED, etag)
+
+        data = cache.get(key)
+        if data is not None:
+            return self.make_cached_response(data, status.HTTP_200_OK, etag)
+
+        response = render()
+        if response.status_code == status.HTTP_200_OK:
+            cache.set(key, response.data, settings.TASK_CACHE_TTL)
+            response['ETag'] = etag
+        return response
+
+    async def acached_response(self, request, render, variant=None):
+        """cached_response() for async views; `render` is a coroutine function"""
+        if not settings.TASK_CACHE_TTL:
+            return await render()
+
+        version = await aget_user_version(request.user.pk)
+        etag, key = self.get_response_cache_key(request, version, variant)
+        if etag in request.headers.get('If-None-Match', ''):
+            return self.make_cached_response(None, status.HTTP_304_NOT_MODIFIED, etag)
+
+        data = await acache('get', key)
+        if data is not None:
+            return self.make_cached_response(data, status.HTTP_200_OK, etag)
+
+        response = await render()
+        if response.status_code == status.HTTP_200_OK:
+            await acache('set', key, response.data, settings.TASK_CACHE_TTL)
+            response['ETag'] = etag
+        return response
+
+    def get_response_cache_key(self, request, version, variant=None):
+        """The ETag and cache key of a request at a given user version"""
+        fingerprint = hashlib.sha1('\n'.join([
+            request.build_absolute_uri(request.path),
+            repr(sorted(request.query_params.lists())),
+            request.accepted_renderer.format,
+            repr(variant),
+        ]).encode()).hexdigest()
+        etag = f'"{version:x}-{fingerprint[:16]}"'
+        key = f'tasks:user:{request.user.pk}:{version}:{fingerprint}'
+        return etag, key
+
+    def make_cached_response(self, data, status_code, etag):
+        return Response(data, status=status_code, headers={'ETag': etag})
@@ -0,0 +1,43 @@
+"""
+Per-connection database tuning.
+"""
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+JOURNAL_MODES = {'DELETE', 'TRUNCATE', 'PERSIST', 'MEMORY', 'WAL', 'OFF'}
+SYNCHRONOUS_MODES = {'OFF', 'NORMAL', 'FULL', 'EXTRA'}
+
+def sqlite_pragmas():
+    """The PRAGMA statements for the SQLITE_* settings"""
+    journal_mode = settings.SQLITE_JOURNAL_MODE.upper()
+    synchronous = settings.SQLITE_SYNCHRONOUS.upper()
+    if journal_mode not in JOURNAL_MODES:
+        raise ImproperlyConfigured(f'Unknown SQLITE_JOURNAL_MODE: {settings.SQLITE_JOURNAL_MODE}')
+    if synchronous not in SYNCHRONOUS_MODES:
+        raise ImproperlyConfigured(f'Unknown SQLITE_SYNCHRONOUS: {settings.SQLITE_SYNCHRONOUS}')
+    return [
+        # First, so that switching the journal mode waits for other connections too
+        f'PRAGMA busy_timeout = {int(settings.SQLITE_BUSY_TIMEOUT)}',
+        f'PRAGMA journal_mode = {journal_mode}',
+        f'PRAGMA synchronous = {synchronous}',
+        f'PRAGMA mmap_size = {int(settings.SQLITE_MMAP_SIZE)}',
+    ]
+
+@receiver(connection_created)
+def configure_sqlite(sender, connection, **kwargs):
+    """
+    Tune each new SQLite connection.
+
+    In WAL mode readers never wait for the writer, so API requests keep
+    being answered while the reminder sender marks batches as sent, and
+    busy_timeout makes concurrent writers (several workers) queue for the
+    lock instead of failing with "database is locked". The journal mode of
+    an in-memory database (the test database) stays "memory".
+    """
+    if connection.vendor != 'sqlite':
+        return
+    # On the raw connection, so the pragmas are not logged as queries
+    for pragma in sqlite_pragmas():
+        connection.connection.execute(pragma)
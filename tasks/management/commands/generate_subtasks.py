@@ -0,0 +1,73 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db.models import Exists, OuterRef
+from tasks.ai_utils import create_generated_subtasks
+from tasks.models import Task, SubTask
+
+class Command(BaseCommand):
+    help = 'Generate AI subtasks for existing tasks that have none'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=None,
+            help='Number of tasks broken down per model call (default: AI_BATCH_SIZE)',
+        )
+        parser.add_argument(
+            '--user',
+            default=None,
+            help='Only backfill the tasks of this username',
+        )
+        parser.add_argument(
+            '--limit',
+            type=int,
+            default=None,
+            help='Stop after this many tasks',
+        )
+        parser.add_argument(
+            '--include-completed',
+            action='store_true',
+            help='Also backfill completed tasks',
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size'] or settings.AI_BATCH_SIZE
+        tasks = Task.objects.filter(
+            ~Exists(SubTask.objects.filter(task=OuterRef('pk')))
+        ).order_by('id')
+        if options['user']:
+            tasks = tasks.filter(user__username=options['user'])
+        if not options['include_completed']:
+            tasks = tasks.filter(is_completed=False)
+        if options['limit']:
+            tasks = tasks[:options['limit']]
+
+        # Hand the generator enough tasks per round to keep every worker busy
+        chunk_size = batch_size * settings.AI_MAX_CONCURRENCY
+        self.totals = {'tasks': 0, 'failed': 0, 'subtasks': 0}
+        chunk = []
+        for task in tasks.iterator(chunk_size=chunk_size):
+            chunk.append(task)
+            if len(chunk) == chunk_size:
+                self.backfill(chunk, batch_size)
+                chunk = []
+        if chunk:
+            self.backfill(chunk, batch_size)
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Created {self.totals['subtasks']} subtasks for "
+                f"{self.totals['tasks'] - self.totals['failed']} tasks"
+            )
+        )
+        if self.totals['failed']:
+            self.stdout.write(
+                self.style.WARNING(f"Could not generate subtasks for {self.totals['failed']} tasks")
+            )
+
+    def backfill(self, tasks, batch_size):
+        created, failed = create_generated_subtasks(tasks, batch_size=batch_size)
+        self.totals['tasks'] += len(tasks)
+        self.totals['failed'] += len(failed)
+        self.totals['subtasks'] += len(created)
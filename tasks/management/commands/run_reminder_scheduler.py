@@ -0,0 +1,63 @@
+import signal
+from datetime import timedelta
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from tasks.scheduler import ReminderScheduler
+
+class Command(BaseCommand):
+    help = 'Run a long-lived scheduler that sends reminders as soon as they are due'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--poll-interval',
+            type=float,
+            default=1.0,
+            help='Seconds between checks for new or changed reminders',
+        )
+        parser.add_argument(
+            '--lookahead',
+            type=int,
+            default=60,
+            help='Minutes of upcoming reminders kept in memory',
+        )
+        parser.add_argument(
+            '--sweep-interval',
+            type=float,
+            default=300.0,
+            help='Seconds between full sweeps for missed or failed reminders',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=None,
+            help='Number of reminders sent per SMTP batch (default: REMINDER_BATCH_SIZE)',
+        )
+
+    def handle(self, *args, **options):
+        scheduler = ReminderScheduler(
+            lookahead=timedelta(minutes=options['lookahead']),
+            poll_interval=options['poll_interval'],
+            sweep_interval=options['sweep_interval'],
+            batch_size=options['batch_size'],
+        )
+
+        def shutdown(signum, frame):
+            self.stdout.write(self.style.WARNING('Stopping reminder scheduler'))
+            scheduler.stop()
+
+        signal.signal(signal.SIGINT, shutdown)
+        signal.signal(signal.SIGTERM, shutdown)
+
+        def report(stats):
+            if not stats['sent'] and not stats['failed']:
+                return
+            self.stdout.write(
+                f"{timezone.now()}: sent {stats['sent']} reminders, {stats['failed']} failed"
+            )
+            if stats['dead_lettered']:
+                self.stdout.write(self.style.ERROR(f"Gave up on {stats['dead_lettered']} reminders"))
+
+        self.stdout.write(
+            self.style.SUCCESS(f'Reminder scheduler started at {timezone.now()}')
+        )
+        scheduler.run(on_dispatch=report)
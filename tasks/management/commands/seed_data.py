@@ -0,0 +1,120 @@
+import random
+import time
+from datetime import timedelta
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+from tasks.models import Task, SubTask, Category, Reminder
+
+SYLLABLES = 'ba be bi bo bu da de di do du ka ke ki ko ku la le li lo lu ma me mi mo mu na ne ni no nu ra re ri ro ru sa se si so su ta te ti to tu'.split()
+
+# Tasks created per bulk_create round, to bound memory with large seeds
+CHUNK_SIZE = 5000
+
+def vocabulary(rng, size=2000):
+    """Distinct made-up words, so search terms match a realistic fraction of tasks"""
+    words = set()
+    while len(words) < size:
+        words.add(''.join(rng.choices(SYLLABLES, k=rng.randint(2, 4))))
+    return sorted(words)
+
+def seed(users, tasks, subtasks, categories, prefix='seed', password='seedpass123', random_seed=0, now=None):
+    """
+    Create `users` users owning `tasks` tasks each, every task with
+    `subtasks` subtasks and reminders at DEFAULT_TASK_REMINDER_TIMES, all
+    through bulk_create. The same arguments always produce the same rows,
+    with dates relative to `now`. Returns the number of rows per model.
+    """
+    rng = random.Random(random_seed)
+    words = vocabulary(rng)
+    now = now or timezone.now()
+    counts = {'users': users, 'tasks': 0, 'subtasks': 0, 'reminders': 0, 'categories': 0}
+
+    names = [f'{prefix} {word}' for word in rng.sample(words, categories)]
+    Category.objects.bulk_create([Category(name=name) for name in names], ignore_conflicts=True)
+    category_list = list(Category.objects.filter(name__in=names).order_by('name'))
+    counts['categories'] = len(category_list)
+
+    # Hashing is slow on purpose; every seeded user gets the same hash
+    password_hash = make_password(password)
+    accounts = User.objects.bulk_create(
+        User(username=f'{prefix}{i}', email=f'{prefix}{i}@example.com', password=password_hash)
+        for i in range(users)
+    )
+
+    offsets = settings.DEFAULT_TASK_REMINDER_TIMES
+    owners = [user for user in accounts for _ in range(tasks)]
+    for start in range(0, len(owners), CHUNK_SIZE):
+        batch = []
+        for user in owners[start:start + CHUNK_SIZE]:
+            # Due dates from two days ago to a month ahead, so some reminders are due
+            batch.append(Task(
+                user=user,
+                title=' '.join(rng.choices(words, k=rng.randint(2, 5))).capitalize(),
+                description=' '.join(rng.choices(words, k=rng.randint(5, 40))) if rng.random() < 0.7 else None,
+                priority=rng.choice(['High', 'Normal', 'Normal', 'Low']),
+                due_date=now + timedelta(minutes=rng.randint(-2 * 24 * 60, 30 * 24 * 60)),
+                is_completed=rng.random() < 0.2,
+                category=rng.choice(category_list) if category_list and rng.random() < 0.6 else None,
+            ))
+        batch = Task.objects.bulk_create(batch)
+
+        SubTask.objects.bulk_create(
+            SubTask(
+                task=task,
+                title=' '.join(rng.choices(words, k=rng.randint(2, 4))).capitalize(),
+                minutes=rng.choice([15, 30, 45, 60, 90]),
+                is_completed=task.is_completed or rng.random() < 0.3,
+            )
+            for task in batch for _ in range(subtasks)
+        )
+        reminders = [
+            Reminder(
+                task=task,
+                remind_at=task.due_date - timedelta(minutes=minutes),
+                offset_minutes=minutes,
+                # Reminders of completed tasks went out before they were completed
+                sent=task.is_completed and task.due_date - timedelta(minutes=minutes) <= now,
+            )
+            for task in batch for minutes in offsets
+        ]
+        Reminder.objects.bulk_create(reminders)
+
+        counts['tasks'] += len(batch)
+        counts['subtasks'] += len(batch) * subtasks
+        counts['reminders'] += len(reminders)
+    return counts
+
+class Command(BaseCommand):
+    help = 'Fill the database with generated users, tasks, subtasks, reminders and categories for benchmarks'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=10, help='Number of users to create')
+        parser.add_argument('--tasks', type=int, default=100, help='Tasks per user')
+        parser.add_argument('--subtasks', type=int, default=3, help='Subtasks per task')
+        parser.add_argument('--categories', type=int, default=8, help='Categories shared by the tasks')
+        parser.add_argument('--prefix', default='seed', help='Prefix of the usernames and category names')
+        parser.add_argument('--password', default='seedpass123', help='Password of every created user')
+        parser.add_argument('--seed', type=int, default=0, help='Random seed; the same seed creates the same data')
+
+    def handle(self, *args, **options):
+        prefix = options['prefix']
+        if User.objects.filter(username__startswith=prefix).exists():
+            raise CommandError(f'Users named {prefix}* exist already; pick another --prefix')
+
+        started = time.monotonic()
+        with transaction.atomic():
+            counts = seed(
+                options['users'], options['tasks'], options['subtasks'], options['categories'],
+                prefix=prefix, password=options['password'], random_seed=options['seed'],
+            )
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Created {counts['users']} users, {counts['tasks']} tasks, {counts['subtasks']} subtasks, "
+                f"{counts['reminders']} reminders and {counts['categories']} categories "
+                f"in {time.monotonic() - started:.1f}s"
+            )
+        )
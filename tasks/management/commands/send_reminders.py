@@ -1,3 +1,4 @@
+from django.conf import settings
 from django.core.management.base import BaseCommand
 from tasks.utils import check_and_send_reminders
 from django.utils import timezone
@@ -5,16 +6,52 @@ from django.utils import timezone
 class Command(BaseCommand):
     help = 'Send email reminders for tasks'
 
-    def handle(self, *args, **kwargs):
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=None,
+            help='Number of reminders sent per SMTP batch (default: REMINDER_BATCH_SIZE)',
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=1,
+            help='Number of concurrent sender threads, each with its own SMTP connection',
+        )
+
+    def handle(self, *args, **options):
         self.stdout.write(
             self.style.SUCCESS(f'Starting to send reminders at {timezone.now()}')
         )
         
         try:
-            check_and_send_reminders()
+            stats = check_and_send_reminders(
+                batch_size=options['batch_size'],
+                workers=options['workers'],
+            )
+            rate = stats['sent'] / stats['elapsed'] if stats['elapsed'] else 0
             self.stdout.write(
-                self.style.SUCCESS('Successfully sent reminders')
+                self.style.SUCCESS(
+                    f"Successfully sent {stats['sent']} reminders in {stats['batches']} batches "
+                    f"({stats['elapsed']:.2f}s, {rate:.1f} reminders/s)"
+                )
             )
+            if stats['digests']:
+                self.stdout.write(
+                    self.style.SUCCESS(f"Sent {stats['digests']} digest emails")
+                )
+            if stats['failed']:
+                self.stdout.write(
+                    self.style.WARNING(f"Failed to send {stats['failed']} reminders")
+                )
+            if stats['dead_lettered']:
+                self.stdout.write(
+                    self.style.ERROR(
+                        f"Gave up on {stats['dead_lettered']} reminders after "
+                        f"{settings.REMINDER_MAX_ATTEMPTS} failed attempts"
+                    )
+                )
         except Exception as e:
             self.stdout.write(
                 self.style.ERROR(f'Error sending reminders: {str(e)}')
@@ -0,0 +1,262 @@
+"""
+Per-request performance metrics.
+
+MetricsMiddleware times every request and, through the timed() blocks and
+the database execute wrapper below, how much of it went to SQL queries,
+serializers and outbound AI and SMTP calls. The measurements are
+aggregated into histograms per view in process memory and exported in the
+Prometheus text format at /api/metrics/. Every worker process keeps its
+own histograms, so scrape each one (or sum them in Prometheus).
+"""
+import bisect
+import contextlib
+import contextvars
+import threading
+import time
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+# Prometheus' default buckets, in seconds
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERY_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100)
+
+# Parts of a request timed separately; AI and SMTP time is only observed for
+# requests that made such calls
+TIMED = ('db', 'serializer', 'ai', 'smtp')
+OUTBOUND = ('ai', 'smtp')
+
+# Other request methods are counted as 'other', so clients cannot add series
+HTTP_METHODS = ('GET', 'HEAD', 'POST', 'PUT', 'PATCH', 'DELETE', 'OPTIONS', 'TRACE', 'CONNECT')
+
+PROMETHEUS_CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+class Histogram:
+    """Cumulative buckets, sum and count of observed values"""
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative(self):
+        total = 0
+        for bound, count in zip((*self.buckets, '+Inf'), self.counts):
+            total += count
+            yield bound, total
+
+class MetricsRegistry:
+    """
+    Histograms and counters grouped in families of labelled series.
+    Observations from any thread are serialized by one lock; each only
+    takes a dict lookup and a few additions.
+    """
+    def __init__(self):
+        self.families = {}
+        self.lock = threading.Lock()
+
+    def family(self, name, kind, documentation):
+        family = self.families.get(name)
+        if family is None:
+            family = self.families[name] = {'kind': kind, 'doc': documentation, 'series': {}}
+        return family
+
+    def observe(self, name, labels, value, documentation, buckets=DURATION_BUCKETS):
+        with self.lock:
+            series = self.family(name, 'histogram', documentation)['series']
+            histogram = series.get(labels)
+            if histogram is None:
+                histogram = series[labels] = Histogram(buckets)
+            histogram.observe(value)
+
+    def increment(self, name, labels, documentation):
+        with self.lock:
+            series = self.family(name, 'counter', documentation)['series']
+            series[labels] = series.get(labels, 0) + 1
+
+    def clear(self):
+        with self.lock:
+            self.families.clear()
+
+    def render(self):
+        """The metrics in the Prometheus text exposition format"""
+        lines = []
+        with self.lock:
+            for name, family in sorted(self.families.items()):
+                lines.append(f"# HELP {name} {family['doc']}")
+                lines.append(f"# TYPE {name} {family['kind']}")
+                for labels, value in sorted(family['series'].items()):
+                    if family['kind'] == 'counter':
+                        lines.append(f'{name}{format_labels(labels)} {value}')
+                        continue
+                    for bound, count in value.cumulative():
+                        lines.append(f'{name}_bucket{format_labels(labels + (("le", bound),))} {count}')
+                    lines.append(f'{name}_sum{format_labels(labels)} {value.sum}')
+                    lines.append(f'{name}_count{format_labels(labels)} {value.count}')
+        return '\n'.join(lines) + '\n'
+
+def format_labels(labels):
+    if not labels:
+        return ''
+    escaped = (
+        (name, str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n'))
+        for name, value in labels
+    )
+    return '{' + ','.join(f'{name}="{value}"' for name, value in escaped) + '}'
+
+registry = MetricsRegistry()
+
+class RequestTimings:
+    """Time spent so far by the current request, per part"""
+    def __init__(self):
+        self.durations = dict.fromkeys(TIMED, 0.0)
+        self.queries = 0
+        self.active = set()
+
+_request_timings = contextvars.ContextVar('request_timings', default=None)
+
+@contextlib.contextmanager
+def timed(part):
+    """
+    Count the time spent in the block towards the current request's `part`
+    (one of TIMED). Nested blocks of the same part count once; outside a
+    request this does nothing.
+    """
+    timings = _request_timings.get()
+    if timings is None or part in timings.active:
+        yield
+        return
+    timings.active.add(part)
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings.durations[part] += time.perf_counter() - started
+        timings.active.discard(part)
+
+@contextlib.contextmanager
+def outbound(service):
+    """
+    Time a call to an outside service ('ai' or 'smtp'): it counts towards
+    the current request, if any, and is observed process wide, so calls
+    made by background jobs and worker threads show up too.
+    """
+    started = time.perf_counter()
+    try:
+        with timed(service):
+            yield
+    finally:
+        registry.observe(
+            'taskninja_outbound_call_seconds', (('service', service),), time.perf_counter() - started,
+            'Duration of calls to the AI model and the SMTP server'
+        )
+
+def record_query(execute, sql, params, many, context):
+    """Database execute wrapper counting queries and their time for the current request"""
+    timings = _request_timings.get()
+    if timings is None:
+        return execute(sql, params, many, context)
+    timings.queries += 1
+    with timed('db'):
+        return execute(sql, params, many, context)
+
+@receiver(connection_created)
+def instrument_connection(sender, connection, **kwargs):
+    # Wrappers live on the connection object, which outlives reconnects
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+def view_label(request):
+    """The URL name of the view; bounded, unlike the path"""
+    match = getattr(request, 'resolver_match', None)
+    return match.view_name if match is not None else 'unmatched'
+
+def method_label(request):
+    """The request method, or 'other' for methods outside HTTP_METHODS"""
+    return request.method if request.method in HTTP_METHODS else 'other'
+
+def record_request(request, response, timings, elapsed):
+    labels = (('view', view_label(request)), ('method', method_label(request)))
+    registry.increment(
+        'taskninja_responses_total', labels + (('status', response.status_code),), 'Responses by status code'
+    )
+    registry.observe(
+        'taskninja_request_duration_seconds', labels, elapsed,
+        'Wall time of requests, until the response (or the start of a stream) was returned'
+    )
+    registry.observe(
+        'taskninja_request_db_queries', labels, timings.queries,
+        'SQL queries run by requests', buckets=QUERY_BUCKETS
+    )
+    registry.observe('taskninja_request_db_seconds', labels, timings.durations['db'], 'Time requests spent in SQL queries')
+    registry.observe(
+        'taskninja_request_serializer_seconds', labels, timings.durations['serializer'],
+        'Time requests spent serializing objects'
+    )
+    for service in OUTBOUND:
+        if timings.durations[service]:
+            registry.observe(
+                f'taskninja_request_{service}_seconds', labels, timings.durations[service],
+                f'Time requests spent waiting on {service.upper()} calls, for requests that made them'
+            )
+
+def server_timing(timings, elapsed):
+    """Server-Timing header value, in milliseconds"""
+    durations = timings.durations
+    entries = [
+        f'total;dur={elapsed * 1000:.1f}',
+        f'db;dur={durations["db"] * 1000:.1f};desc="{timings.queries} queries"',
+        f'serializer;dur={durations["serializer"] * 1000:.1f}',
+    ]
+    for service in OUTBOUND:
+        if durations[service]:
+            entries.append(f'{service};dur={durations[service] * 1000:.1f}')
+    return ', '.join(entries)
+
+class MetricsMiddleware:
+    """
+    Record the timings of every request. With SERVER_TIMING on, responses
+    also carry them in a Server-Timing header, which browser dev tools show
+    next to the request.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        timings = RequestTimings()
+        token = _request_timings.set(timings)
+        started = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            _request_timings.reset(token)
+        return self.finish(request, response, timings, time.perf_counter() - started)
+
+    async def __acall__(self, request):
+        timings = RequestTimings()
+        token = _request_timings.set(timings)
+        started = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            _request_timings.reset(token)
+        return self.finish(request, response, timings, time.perf_counter() - started)
+
+    def finish(self, request, response, timings, elapsed):
+        record_request(request, response, timings, elapsed)
+        if settings.SERVER_TIMING:
+            response['Server-Timing'] = server_timing(timings, elapsed)
+        return response
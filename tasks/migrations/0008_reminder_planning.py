@@ -0,0 +1,46 @@
+# Generated by Django 5.2.18 on 2026-10-18 08:44
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+# The reminder times that were hard-coded before DEFAULT_TASK_REMINDER_TIMES was used
+PREVIOUS_OFFSETS = {30, 120, 1440, 4320}
+
+
+def set_offsets(apps, schema_editor):
+    """Mark existing automatic reminders as planned, so they move with their task's due date"""
+    Reminder = apps.get_model('tasks', 'Reminder')
+    reminders = []
+    for reminder in Reminder.objects.filter(sent=False).select_related('task').iterator(chunk_size=2000):
+        minutes = (reminder.task.due_date - reminder.remind_at).total_seconds() / 60
+        if minutes in PREVIOUS_OFFSETS:
+            reminder.offset_minutes = int(minutes)
+            reminders.append(reminder)
+    Reminder.objects.bulk_update(reminders, ['offset_minutes'], batch_size=2000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0007_delta_sync'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='reminder',
+            name='offset_minutes',
+            field=models.IntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.CreateModel(
+            name='ReminderPreference',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('minutes_before', models.JSONField(default=list)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='reminder_preference', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.RunPython(set_offsets, migrations.RunPython.noop),
+    ]
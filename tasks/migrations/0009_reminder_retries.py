@@ -0,0 +1,42 @@
+# Generated by Django 5.2.18 on 2026-10-18 09:09
+
+import django.db.models.functions.comparison
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0008_reminder_planning'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='reminder',
+            name='reminder_unsent_due_idx',
+        ),
+        migrations.AddField(
+            model_name='reminder',
+            name='attempts',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='reminder',
+            name='dead_lettered',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AddField(
+            model_name='reminder',
+            name='last_error',
+            field=models.TextField(blank=True, default='', editable=False),
+        ),
+        migrations.AddField(
+            model_name='reminder',
+            name='next_attempt_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='reminder',
+            index=models.Index(django.db.models.functions.comparison.Coalesce('next_attempt_at', 'remind_at'), condition=models.Q(('dead_lettered', False), ('sent', False)), name='reminder_pending_due_idx'),
+        ),
+    ]
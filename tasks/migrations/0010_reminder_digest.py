@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-18 09:16
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0009_reminder_retries'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='reminderpreference',
+            name='digest',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AlterField(
+            model_name='reminderpreference',
+            name='minutes_before',
+            field=models.JSONField(blank=True, default=None, null=True),
+        ),
+    ]
@@ -1,9 +1,16 @@
+import random
+import threading
+from collections import defaultdict
+from django.conf import settings
 from django.db import models
+from django.db.models.functions import Coalesce
 from django.contrib.auth.models import User
 from django.utils import timezone
-from django.db.models.signals import post_save
+from django.db.models.signals import post_save, post_delete, pre_delete
 from django.dispatch import receiver
 from datetime import timedelta
+from .cache import invalidate_user_cache
+from .push import publish_changed, publish_instance
 
 class Category(models.Model):
     """
@@ -39,22 +46,37 @@ class Task(models.Model):
     def __str__(self):
         return self.title
 
-    def create_default_reminders(self):
-        """Create default reminders for the task"""
-        reminder_times = [
-            timedelta(minutes=30),          # 30 minutes before
-            timedelta(hours=2),             # 2 hours before
-            timedelta(days=1),              # 1 day before
-            timedelta(days=3),              # 3 days before
+    class Meta:
+        indexes = [
+            # TaskViewSet lists a user's tasks ordered or filtered on these
+            models.Index(fields=['user', 'due_date'], name='task_user_due_idx'),
+            models.Index(fields=['user', 'is_completed'], name='task_user_completed_idx'),
+            models.Index(fields=['user', 'created_at'], name='task_user_created_idx'),
+            models.Index(fields=['user', 'priority'], name='task_user_priority_idx'),
+            # Delta sync reads the rows changed after a watermark
+            models.Index(fields=['user', 'updated_at'], name='task_user_updated_idx'),
         ]
 
-        for time_delta in reminder_times:
-            remind_at = self.due_date - time_delta
-            if remind_at > timezone.now():
-                Reminder.objects.create(
-                    task=self,
-                    remind_at=remind_at
-                )
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance.remember_reminder_state()
+        return instance
+
+    def remember_reminder_state(self):
+        """Note the fields reminders are planned from, to tell later whether they changed"""
+        self._reminder_state = (self.__dict__.get('due_date'), self.__dict__.get('is_completed'))
+
+    def reminder_state_changed(self):
+        return getattr(self, '_reminder_state', None) != (self.due_date, self.is_completed)
+
+    def build_default_reminders(self, now=None):
+        """Build (unsaved) default reminders for the task"""
+        return ReminderPlanner(now).build([self])
+
+    def create_default_reminders(self):
+        """Create default reminders for the task"""
+        return ReminderPlanner().create([self])
 
 class SubTask(models.Model):
     """
@@ -65,33 +87,424 @@ class SubTask(models.Model):
     minutes = models.IntegerField(default=30)  # Duration in minutes
     is_completed = models.BooleanField(default=False)
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
 
     def __str__(self):
         return f"{self.title} ({self.task.title})"
 
     class Meta:
         ordering = ['created_at']
+        indexes = [
+            models.Index(fields=['task', 'created_at'], name='subtask_task_created_idx'),
+        ]
+
+def retry_delay(attempts):
+    """
+    Seconds to wait after the `attempts`-th failed delivery: doubling from
+    REMINDER_RETRY_DELAY up to REMINDER_RETRY_MAX_DELAY, with jitter so
+    reminders that failed together (an SMTP outage) are not all retried at
+    the same moment.
+    """
+    delay = min(settings.REMINDER_RETRY_DELAY * 2 ** (attempts - 1), settings.REMINDER_RETRY_MAX_DELAY)
+    return random.uniform(delay / 2, delay)
+
+class ReminderQuerySet(models.QuerySet):
+    def pending(self):
+        """
+        Reminders still to be delivered, annotated with `due_at`: the next
+        attempt after a failure, otherwise remind_at. Lookups on due_at use
+        the reminder_pending_due_idx index.
+        """
+        return self.filter(sent=False, dead_lettered=False).annotate(due_at=Coalesce('next_attempt_at', 'remind_at'))
 
 class Reminder(models.Model):
     """
     Represents a reminder for a task.
+
+    A failed delivery is retried with exponential backoff (retry_delay());
+    after REMINDER_MAX_ATTEMPTS failures the reminder is dead-lettered and
+    no longer tried.
     """
+    # Fields changed by record_failure()
+    RETRY_FIELDS = ['attempts', 'last_error', 'next_attempt_at', 'dead_lettered', 'claimed_by', 'claimed_at', 'updated_at']
+
     task = models.ForeignKey(Task, on_delete=models.CASCADE, related_name='reminders')
     remind_at = models.DateTimeField()
     sent = models.BooleanField(default=False)
+    # Set by the sender that claimed the reminder, so overlapping runs skip it
+    claimed_by = models.CharField(max_length=32, null=True, blank=True, editable=False)
+    claimed_at = models.DateTimeField(null=True, blank=True, editable=False)
+    # Minutes before the due date the reminder was planned at; null for reminders added by hand
+    offset_minutes = models.IntegerField(null=True, blank=True, editable=False)
+    # Failed deliveries so far, and the error of the last one
+    attempts = models.PositiveIntegerField(default=0, editable=False)
+    last_error = models.TextField(blank=True, default='', editable=False)
+    # Not retried before this time after a failure
+    next_attempt_at = models.DateTimeField(null=True, blank=True, editable=False)
+    dead_lettered = models.BooleanField(default=False)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
+
+    objects = ReminderQuerySet.as_manager()
 
     def __str__(self):
         return f"Reminder for {self.task.title} at {self.remind_at}"
 
+    def record_failure(self, error, now=None):
+        """
+        Note a failed delivery and release the claim: schedule the next
+        attempt, or dead-letter the reminder once it has used up
+        REMINDER_MAX_ATTEMPTS. The caller saves RETRY_FIELDS.
+        """
+        now = now or timezone.now()
+        self.attempts += 1
+        self.last_error = str(error)[:1000]
+        self.claimed_by = None
+        self.claimed_at = None
+        self.updated_at = now
+        if self.attempts >= settings.REMINDER_MAX_ATTEMPTS:
+            self.dead_lettered = True
+            self.next_attempt_at = None
+        else:
+            self.next_attempt_at = now + timedelta(seconds=retry_delay(self.attempts))
+
+    def reset_attempts(self):
+        """Start over as a reminder that was never tried (after moving it, or to revive it)"""
+        self.attempts = 0
+        self.last_error = ''
+        self.next_attempt_at = None
+        self.dead_lettered = False
+
+    class Meta:
+        indexes = [
+            # Due-reminder lookups only ever look at pending rows, by their next attempt
+            models.Index(
+                Coalesce('next_attempt_at', 'remind_at'),
+                condition=models.Q(sent=False, dead_lettered=False),
+                name='reminder_pending_due_idx',
+            ),
+        ]
+
+class ReminderPreference(models.Model):
+    """
+    A user's reminder times, overriding DEFAULT_TASK_REMINDER_TIMES unless
+    null. An empty list turns automatic reminders off. With `digest` on,
+    the user's due reminders are sent together in one email instead of one
+    email each (see claim_digest_batch() and send_digest_batch() in
+    tasks.utils, called from check_and_send_reminders()).
+    """
+    user = models.OneToOneField(User, on_delete=models.CASCADE, related_name='reminder_preference')
+    minutes_before = models.JSONField(null=True, blank=True, default=None)  # Minutes before the due date
+    digest = models.BooleanField(default=False)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Reminder times of {self.user}"
+
+class ReminderPlanner:
+    """
+    Plans the automatic reminders of tasks.
+
+    A task gets one reminder per reminder time of its owner (their
+    ReminderPreference, or DEFAULT_TASK_REMINDER_TIMES) that is still in
+    the future, and none once it is completed. Sent reminders and
+    reminders added by hand are left alone, except that a completed task
+    loses all its unsent reminders.
+    """
+    def __init__(self, now=None):
+        self.now = now or timezone.now()
+        self.offsets = {}
+
+    def load_offsets(self, user_ids):
+        """Look up the reminder times of the given users in one query"""
+        missing = set(user_ids) - set(self.offsets)
+        if not missing:
+            return
+        overrides = dict(
+            ReminderPreference.objects.filter(user_id__in=missing).values_list('user_id', 'minutes_before')
+        )
+        for user_id in missing:
+            minutes = overrides.get(user_id)
+            self.offsets[user_id] = settings.DEFAULT_TASK_REMINDER_TIMES if minutes is None else minutes
+
+    def plan(self, task):
+        """The reminders a task should have, as {minutes before due: remind_at}"""
+        if task.is_completed:
+            return {}
+        self.load_offsets([task.user_id])
+        plan = {}
+        for minutes in self.offsets[task.user_id]:
+            remind_at = task.due_date - timedelta(minutes=minutes)
+            if remind_at > self.now:
+                plan[minutes] = remind_at
+        return plan
+
+    def build(self, tasks):
+        """Unsaved reminders for new tasks"""
+        self.load_offsets({task.user_id for task in tasks})
+        return [
+            Reminder(task=task, remind_at=remind_at, offset_minutes=minutes)
+            for task in tasks
+            for minutes, remind_at in self.plan(task).items()
+        ]
+
+    def create(self, tasks):
+        """Create the reminders of new tasks with one INSERT"""
+        return Reminder.objects.bulk_create(self.build(tasks))
+
+    def replan(self, tasks):
+        """
+        Bring the reminders of tasks whose due date or completion changed in
+        line with their plan: unsent reminders are moved, deleted or added
+        as needed. Returns the number of reminders (created, moved, deleted).
+        """
+        tasks = {task.pk: task for task in tasks}
+        if not tasks:
+            return 0, 0, 0
+        self.load_offsets({task.user_id for task in tasks.values()})
+
+        reminders = defaultdict(list)
+        for reminder in Reminder.objects.filter(task__in=list(tasks)):
+            reminders[reminder.task_id].append(reminder)
+
+        created, moved, deleted = [], [], []
+        for task_id, task in tasks.items():
+            plan = self.plan(task)
+            for reminder in reminders[task_id]:
+                if reminder.sent:
+                    # Do not remind twice for the same due date
+                    if plan.get(reminder.offset_minutes) == reminder.remind_at:
+                        del plan[reminder.offset_minutes]
+                elif task.is_completed:
+                    deleted.append(reminder.pk)
+                elif reminder.offset_minutes is None:
+                    continue
+                elif reminder.offset_minutes not in plan:
+                    deleted.append(reminder.pk)
+                else:
+                    remind_at = plan.pop(reminder.offset_minutes)
+                    if reminder.remind_at != remind_at:
+                        # A reminder for the new due date, failed or not
+                        reminder.remind_at = remind_at
+                        reminder.reset_attempts()
+                        reminder.updated_at = self.now
+                        moved.append(reminder)
+            created += [
+                Reminder(task=task, remind_at=remind_at, offset_minutes=minutes)
+                for minutes, remind_at in plan.items()
+            ]
+
+        if created:
+            Reminder.objects.bulk_create(created)
+        if moved:
+            Reminder.objects.bulk_update(
+                moved, ['remind_at', 'attempts', 'last_error', 'next_attempt_at', 'dead_lettered', 'updated_at']
+            )
+        if deleted:
+            Reminder.objects.filter(pk__in=deleted).delete()
+        if created or moved:
+            # bulk_create and bulk_update skip the signals that tell caches and clients
+            for user_id in {task.user_id for task in tasks.values()}:
+                invalidate_user_cache(user_id)
+                publish_changed(user_id)
+        return len(created), len(moved), len(deleted)
+
+class Tombstone(models.Model):
+    """
+    Records a deleted task, subtask or reminder for delta sync clients.
+
+    Subtasks and reminders deleted along with their task are not recorded;
+    the task's tombstone stands for them.
+    """
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='tombstones')
+    model = models.CharField(max_length=20)  # 'task', 'subtask' or 'reminder'
+    object_id = models.IntegerField()
+    deleted_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"Deleted {self.model} {self.object_id}"
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', 'deleted_at'], name='tombstone_user_deleted_idx'),
+        ]
+
+class FullTextField(models.TextField):
+    """Column of a full-text index that supports the `match` lookup"""
+
+@FullTextField.register_lookup
+class Match(models.Lookup):
+    lookup_name = 'match'
+
+    def as_sql(self, compiler, connection):
+        lhs, lhs_params = self.process_lhs(compiler, connection)
+        rhs, rhs_params = self.process_rhs(compiler, connection)
+        return f'{lhs} MATCH {rhs}', lhs_params + rhs_params
+
+class TaskSearchIndex(models.Model):
+    """
+    SQLite FTS5 index over task titles and descriptions.
+
+    The virtual table and the triggers that keep it in sync with tasks_task
+    are created by migration 0006; Django only reads from it.
+    """
+    task = models.OneToOneField(
+        Task, primary_key=True, db_column='rowid',
+        on_delete=models.DO_NOTHING, related_name='search_index'
+    )
+    title = FullTextField()
+    description = FullTextField()
+    # FTS5 exposes a hidden column named after the table that matches across all columns
+    document = FullTextField(db_column='tasks_task_fts')
+    rank = models.FloatField()
+
+    class Meta:
+        managed = False
+        db_table = 'tasks_task_fts'
+
 # Signals
 @receiver(post_save, sender=Task)
-def create_reminders(sender, instance, created, **kwargs):
-    """Create reminders when a task is created"""
+def plan_reminders(sender, instance, created, **kwargs):
+    """Create reminders for new tasks; re-plan them when the due date or completion changes"""
     if created:
         instance.create_default_reminders()
+    elif instance.reminder_state_changed():
+        ReminderPlanner().replan([instance])
+    instance.remember_reminder_state()
 
 @receiver(post_save, sender=Task)
 def sync_subtask_completion(sender, instance, **kwargs):
     """Complete all subtasks when main task is completed"""
     if instance.is_completed:
-        instance.subtasks.all().update(is_completed=True)
+        if instance.subtasks.filter(is_completed=False).update(is_completed=True, updated_at=timezone.now()):
+            publish_changed(instance.user_id)
+
+@receiver(post_save, sender=Task)
+def invalidate_task_cache(sender, instance, **kwargs):
+    """Drop the owner's cached task payloads"""
+    invalidate_user_cache(instance.user_id)
+
+@receiver(post_save, sender=SubTask)
+@receiver(post_save, sender=Reminder)
+def invalidate_task_child_cache(sender, instance, **kwargs):
+    """Drop the cached task payloads of the task's owner"""
+    invalidate_user_cache(get_owner_id(instance))
+
+@receiver(post_save, sender=Category)
+def invalidate_category_cache(sender, instance, created, **kwargs):
+    """
+    Categories are shared, but their names are embedded in task payloads
+    (?expand=category, stats): drop the cache of every user with tasks in it
+    """
+    if created:
+        return
+    for user_id in Task.objects.filter(category=instance).values_list('user_id', flat=True).distinct():
+        invalidate_user_cache(user_id)
+
+@receiver(pre_delete, sender=Category)
+def touch_category_tasks(sender, instance, **kwargs):
+    """
+    Stamp the tasks about to lose their category and drop their owners'
+    cache. SET_NULL clears it with an update() that skips updated_at and the
+    signals; by post_delete the tasks can no longer be told apart.
+    """
+    user_ids = set(Task.objects.filter(category=instance).values_list('user_id', flat=True))
+    if user_ids:
+        Task.objects.filter(category=instance).update(updated_at=timezone.now())
+        for user_id in user_ids:
+            invalidate_user_cache(user_id)
+            publish_changed(user_id)
+
+class DeletionBatch:
+    """The rows one delete() call removes itself, see record_deletion()"""
+    def __init__(self, origin):
+        self.origin = origin  # Keeps id(origin) unique while the batch is open
+        self.expected = 0
+        self.deleted = []
+
+_deletions = threading.local()
+
+def deletion_batches():
+    """This thread's open batches, by id() of their delete() origin"""
+    if not hasattr(_deletions, 'batches'):
+        _deletions.batches = {}
+    return _deletions.batches
+
+@receiver(pre_delete, sender=Task)
+@receiver(pre_delete, sender=SubTask)
+@receiver(pre_delete, sender=Reminder)
+def count_deletion(sender, instance, origin=None, **kwargs):
+    """Count the rows a delete() call removes itself; every pre_delete comes before the first post_delete"""
+    if deleted_directly(sender, origin):
+        batches = deletion_batches()
+        batch = batches.get(id(origin))
+        if batch is None:
+            batch = batches[id(origin)] = DeletionBatch(origin)
+        batch.expected += 1
+
+@receiver(post_delete, sender=Task)
+@receiver(post_delete, sender=SubTask)
+@receiver(post_delete, sender=Reminder)
+def record_deletion(sender, instance, origin=None, **kwargs):
+    """
+    Once the last row of a delete() call is gone, handle them all at once:
+    log tombstones for delta sync with one INSERT, drop the owners' cached
+    payloads and push the deletions. Subtasks and reminders that went with
+    their task, and anything that went with its user, are not recorded.
+    """
+    if not deleted_directly(sender, origin):
+        return
+    batches = deletion_batches()
+    batch = batches.get(id(origin))
+    if batch is None:
+        batch = batches[id(origin)] = DeletionBatch(origin)
+    batch.deleted.append(instance)
+    if len(batch.deleted) < batch.expected:
+        return
+    del batches[id(origin)]
+
+    owner_ids = get_owner_ids(batch.deleted)
+    Tombstone.objects.bulk_create(
+        Tombstone(user_id=user_id, model=sender._meta.model_name, object_id=instance.pk)
+        for instance, user_id in zip(batch.deleted, owner_ids) if user_id is not None
+    )
+    for user_id in set(owner_ids):
+        invalidate_user_cache(user_id)
+    for instance, user_id in zip(batch.deleted, owner_ids):
+        publish_instance(instance, 'deleted', user_id)
+
+@receiver(post_save, sender=Task)
+@receiver(post_save, sender=SubTask)
+@receiver(post_save, sender=Reminder)
+def push_saved(sender, instance, created, **kwargs):
+    """Push the saved row to the owner's connected clients"""
+    publish_instance(instance, 'created' if created else 'updated', get_owner_id(instance))
+
+def deleted_directly(sender, origin):
+    """Whether a row was deleted itself, rather than along with its task or user"""
+    origin_model = origin.model if isinstance(origin, models.QuerySet) else type(origin)
+    return origin_model is sender
+
+def get_owner_id(instance):
+    """The id of the user owning a task, subtask or reminder"""
+    if isinstance(instance, Task):
+        return instance.user_id
+    if not hasattr(instance, '_owner_id'):
+        if type(instance).task.is_cached(instance):
+            instance._owner_id = instance.task.user_id
+        else:
+            instance._owner_id = Task.objects.filter(pk=instance.task_id).values_list('user_id', flat=True).first()
+    return instance._owner_id
+
+def get_owner_ids(instances):
+    """get_owner_id() of each instance, looking up the owners of uncached tasks in one query"""
+    missing = {
+        instance.task_id for instance in instances
+        if not isinstance(instance, Task) and not hasattr(instance, '_owner_id')
+        and not type(instance).task.is_cached(instance)
+    }
+    if missing:
+        owners = dict(Task.objects.filter(pk__in=missing).values_list('id', 'user_id'))
+        for instance in instances:
+            if not isinstance(instance, Task) and instance.task_id in missing:
+                instance._owner_id = owners.get(instance.task_id)
+    return [get_owner_id(instance) for instance in instances]
@@ -0,0 +1,202 @@
+import base64
+import json
+from functools import reduce
+from operator import or_
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+class KeysetCursorPagination(BasePagination):
+    """
+    Cursor pagination that seeks with WHERE clauses on the ordering fields.
+
+    The view's ordering (from OrderingFilter, or the view's `ordering`
+    attribute) is always extended with `id` as a tie-breaker, and the cursor
+    stores the ordering values of the last row on the page. Fetching any
+    page is one indexed range query, so deep pages cost the same as the
+    first one. Clients pick the page size with ?page_size= (default
+    API_PAGE_SIZE), capped at API_MAX_PAGE_SIZE.
+    """
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'page_size'
+    invalid_cursor_message = 'Invalid cursor'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        queryset = self.get_page_queryset(queryset, request, view)
+        return self.finish_page(list(queryset))
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        """paginate_queryset() for async views, fetching the page with the async ORM"""
+        queryset = self.get_page_queryset(queryset, request, view)
+        # Iterating the queryset itself fetches the whole page in one thread hop;
+        # aiterator() would take one hop per chunk plus one to find the end
+        return self.finish_page([row async for row in queryset])
+
+    def get_page_queryset(self, queryset, request, view=None):
+        """The (unevaluated) query for the requested page plus one extra row"""
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        self.ordering = self.get_ordering(request, queryset, view)
+
+        self.cursor = self.decode_cursor(request, queryset)
+        self.reverse = self.cursor is not None and self.cursor['reverse']
+
+        ordering = self.ordering
+        if self.reverse:
+            ordering = [self._flip(field) for field in ordering]
+        queryset = queryset.order_by(*ordering)
+        if self.cursor is not None:
+            queryset = queryset.filter(self.seek_filter(ordering, self.cursor['values']))
+        return queryset[:self.page_size + 1]
+
+    def finish_page(self, rows):
+        has_more = len(rows) > self.page_size
+        rows = rows[:self.page_size]
+        if self.reverse:
+            rows.reverse()
+
+        self.first = rows[0] if rows else None
+        self.last = rows[-1] if rows else None
+        if self.reverse:
+            self.has_next, self.has_previous = bool(rows), has_more
+        else:
+            self.has_next, self.has_previous = has_more, self.cursor is not None
+        return rows
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'previous': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
+
+    def get_page_size(self, request):
+        page_size = settings.API_PAGE_SIZE
+        try:
+            requested = int(request.query_params[self.page_size_query_param])
+            if requested > 0:
+                page_size = requested
+        except (KeyError, ValueError):
+            pass
+        return min(page_size, settings.API_MAX_PAGE_SIZE)
+
+    def get_ordering(self, request, queryset, view):
+        """The view's ordering with `id` appended as a tie-breaker"""
+        ordering = None
+        for backend in getattr(view, 'filter_backends', []):
+            if hasattr(backend, 'get_ordering'):
+                ordering = backend().get_ordering(request, queryset, view)
+                break
+        if not ordering:
+            ordering = getattr(view, 'ordering', None) or queryset.model._meta.ordering or []
+        if isinstance(ordering, str):
+            ordering = [ordering]
+
+        ordering = [field for field in ordering if field.lstrip('-') not in ('id', 'pk')]
+        descending = bool(ordering) and ordering[0].startswith('-')
+        return ordering + ['-id' if descending else 'id']
+
+    def seek_filter(self, ordering, values):
+        """
+        Rows strictly after `values` in `ordering`.
+
+        The leading range condition on the first field lets the database
+        use the (user, field) indexes; the OR chain breaks ties.
+        """
+        clauses = []
+        for position, field in enumerate(ordering):
+            name = field.lstrip('-')
+            lookup = 'lt' if field.startswith('-') else 'gt'
+            equal = {ordering[i].lstrip('-'): values[i] for i in range(position)}
+            clauses.append(Q(**equal, **{f'{name}__{lookup}': values[position]}))
+
+        first = ordering[0]
+        lookup = 'lte' if first.startswith('-') else 'gte'
+        return Q(**{f'{first.lstrip("-")}__{lookup}': values[0]}) & reduce(or_, clauses)
+
+    def decode_cursor(self, request, queryset):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            cursor = json.loads(base64.urlsafe_b64decode(encoded.encode('ascii')))
+            values = cursor['v']
+            reverse = bool(cursor.get('r'))
+        except (TypeError, ValueError, KeyError, UnicodeEncodeError):
+            raise NotFound(self.invalid_cursor_message)
+        # A cursor from a different ordering cannot be applied to this one
+        if cursor.get('o') != self.ordering or not isinstance(values, list) or len(values) != len(self.ordering):
+            raise NotFound(self.invalid_cursor_message)
+        return {'values': self.parse_values(queryset, values), 'reverse': reverse}
+
+    def parse_values(self, queryset, values):
+        """
+        Convert the cursor values with their fields, so a tampered cursor is
+        rejected here instead of failing in the query. Annotations, such as
+        the search rank, are converted with their output field.
+        """
+        parsed = []
+        for field_name, value in zip(self.ordering, values):
+            field_name = field_name.lstrip('-')
+            if field_name in queryset.query.annotations:
+                field = queryset.query.annotations[field_name].output_field
+            else:
+                field = queryset.model._meta.get_field(field_name)
+            try:
+                value = field.to_python(value)
+            except (ValidationError, TypeError):
+                raise NotFound(self.invalid_cursor_message)
+            # The seek filter cannot compare with NULL
+            if value is None:
+                raise NotFound(self.invalid_cursor_message)
+            parsed.append(value)
+        return parsed
+
+    def encode_cursor(self, values, reverse=False):
+        cursor = {'o': self.ordering, 'v': values}
+        if reverse:
+            cursor['r'] = 1
+        encoded = base64.urlsafe_b64encode(
+            # Full isoformat keeps microseconds, which DjangoJSONEncoder would truncate
+            json.dumps(cursor, default=lambda value: value.isoformat()).encode('ascii')
+        ).decode('ascii')
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, encoded)
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        return self.encode_cursor(self._values(self.last))
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        if self.first is None:
+            # Paged past the end, start over from the first page
+            return remove_query_param(self.request.build_absolute_uri(), self.cursor_query_param)
+        return self.encode_cursor(self._values(self.first), reverse=True)
+
+    def _values(self, instance):
+        if isinstance(instance, dict):
+            # A row from .values()
+            return [instance[field.lstrip('-')] for field in self.ordering]
+        return [getattr(instance, field.lstrip('-')) for field in self.ordering]
+
+    @staticmethod
+    def _flip(field):
+        return field[1:] if field.startswith('-') else f'-{field}'
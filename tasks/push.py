@@ -0,0 +1,222 @@
+"""
+Change events pushed to clients over WebSockets.
+
+Every change to a user's tasks, subtasks or reminders is published to the
+user's group once its transaction commits, and each open connection of
+that user (ws://<host>/ws/tasks/?token=<token>) receives it as a JSON text
+message. Connections are served by the ASGI application (taskninja/asgi.py).
+"""
+import asyncio
+import threading
+from urllib.parse import parse_qs
+from django.conf import settings
+from django.db import transaction
+from django.utils.module_loading import import_string
+from rest_framework import exceptions
+from .authentication import TokenAuthentication
+from .renderers import ORJSONRenderer
+
+PUSH_PATH = '/ws/tasks/'
+
+# Close codes sent instead of accepting the connection
+CLOSE_NOT_FOUND = 4404
+CLOSE_UNAUTHORIZED = 4401
+
+def encode(event):
+    return ORJSONRenderer().render(event).decode()
+
+# Replaces the queued events of a client that fell behind
+RESYNC = encode({'type': 'resync'})
+
+class Subscription:
+    """
+    The queue of messages for one connection.
+
+    Messages are only queued on the loop that created the subscription. A
+    client that lets PUSH_QUEUE_SIZE messages pile up loses them and gets a
+    single `resync` message instead, telling it to catch up with /api/sync/.
+    """
+    def __init__(self, group, max_size):
+        self.group = group
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(max_size)
+
+    def deliver(self, message):
+        if self.queue.full():
+            self.clear()
+            message = RESYNC
+        self.queue.put_nowait(message)
+
+    def close(self):
+        """Make get() return None"""
+        self.clear()
+        self.queue.put_nowait(None)
+
+    def clear(self):
+        while not self.queue.empty():
+            self.queue.get_nowait()
+
+    async def get(self):
+        return await self.queue.get()
+
+def deliver_all(subscriptions, message):
+    for subscription in subscriptions:
+        subscription.deliver(message)
+
+class InMemoryChannelLayer:
+    """
+    Channel layer for the connections of this process.
+
+    publish() can be called from any thread. It copies the group under a
+    lock and schedules one delivery per event loop, not one per connection.
+    Deployments with several ASGI processes need a layer backed by a shared
+    broker instead, with the same methods (PUSH_CHANNEL_LAYER).
+    """
+    def __init__(self):
+        self.groups = {}
+        self.lock = threading.Lock()
+
+    def subscribe(self, group, max_size):
+        """Start receiving the group's messages; call from the connection's event loop"""
+        subscription = Subscription(group, max_size)
+        with self.lock:
+            self.groups.setdefault(group, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self.lock:
+            subscriptions = self.groups.get(subscription.group)
+            if subscriptions is not None:
+                subscriptions.discard(subscription)
+                if not subscriptions:
+                    del self.groups[subscription.group]
+
+    def has_subscribers(self, group):
+        """Whether anyone would receive a message; lets publishers skip building it"""
+        return group in self.groups
+
+    def publish(self, group, message):
+        with self.lock:
+            subscriptions = list(self.groups.get(group, ()))
+        by_loop = {}
+        for subscription in subscriptions:
+            by_loop.setdefault(subscription.loop, []).append(subscription)
+
+        try:
+            running_loop = asyncio.get_running_loop()
+        except RuntimeError:
+            running_loop = None
+        for loop, loop_subscriptions in by_loop.items():
+            if loop is running_loop:
+                deliver_all(loop_subscriptions, message)
+                continue
+            try:
+                loop.call_soon_threadsafe(deliver_all, loop_subscriptions, message)
+            except RuntimeError:
+                # The loop is closed; its connections are gone
+                pass
+
+_channel_layer = None
+_channel_layer_lock = threading.Lock()
+
+def get_channel_layer():
+    """The process-wide channel layer (PUSH_CHANNEL_LAYER), created on first use"""
+    global _channel_layer
+    with _channel_layer_lock:
+        if _channel_layer is None:
+            _channel_layer = import_string(settings.PUSH_CHANNEL_LAYER)()
+        return _channel_layer
+
+def user_group(user_id):
+    return f'user.{user_id}'
+
+def publish_event(user_id, event):
+    """
+    Publish an event to a user's connections once the current transaction
+    commits. `event` may be a callable building the event, which is then
+    only called when the user has connections.
+    """
+    if user_id is None:
+        return
+
+    def send():
+        layer = get_channel_layer()
+        group = user_group(user_id)
+        if layer.has_subscribers(group):
+            layer.publish(group, encode(event() if callable(event) else event))
+
+    transaction.on_commit(send)
+
+def publish_changed(user_id):
+    """Tell a user's clients that many rows changed at once; they pull them with /api/sync/"""
+    publish_event(user_id, {'type': 'changed'})
+
+def publish_instance(instance, action, user_id):
+    """Publish `<model>.<action>` for a saved or deleted task, subtask or reminder"""
+    model_name = instance._meta.model_name
+    event = {'type': f'{model_name}.{action}', 'id': instance.pk}
+    if hasattr(instance, 'task_id'):
+        event['task'] = instance.task_id
+    if action == 'deleted':
+        publish_event(user_id, event)
+        return
+
+    def build():
+        # The serializers import the models, which import this module
+        from .serializers import TaskSerializer, SubTaskSerializer, ReminderSerializer
+        serializer_class = {
+            'task': TaskSerializer, 'subtask': SubTaskSerializer, 'reminder': ReminderSerializer,
+        }[model_name]
+        return {**event, 'data': serializer_class(instance).data}
+
+    publish_event(user_id, build)
+
+async def authenticate_websocket(scope):
+    """
+    The user of the token in ?token= (browsers cannot set headers on a
+    WebSocket) or in an "Authorization: Token" header; None if invalid.
+    """
+    query = parse_qs(scope.get('query_string', b'').decode('latin-1'))
+    token = query.get('token', [None])[0]
+    if token is None:
+        auth = dict(scope.get('headers', ())).get(b'authorization', b'').split()
+        if len(auth) == 2 and auth[0].lower() == b'token':
+            token = auth[1].decode('latin-1')
+    if not token:
+        return None
+    try:
+        return await TokenAuthentication().aget_user(token)
+    except exceptions.AuthenticationFailed:
+        return None
+
+async def watch_disconnect(receive, subscription):
+    """Wait for the client to go away; anything it sends (e.g. keepalives) is ignored"""
+    while (await receive())['type'] != 'websocket.disconnect':
+        pass
+    subscription.close()
+
+async def websocket_application(scope, receive, send):
+    """ASGI application for WebSocket connections"""
+    if (await receive())['type'] != 'websocket.connect':
+        return
+    if scope['path'] != PUSH_PATH:
+        await send({'type': 'websocket.close', 'code': CLOSE_NOT_FOUND})
+        return
+    user = await authenticate_websocket(scope)
+    if user is None:
+        await send({'type': 'websocket.close', 'code': CLOSE_UNAUTHORIZED})
+        return
+
+    layer = get_channel_layer()
+    subscription = layer.subscribe(user_group(user.pk), settings.PUSH_QUEUE_SIZE)
+    watcher = asyncio.ensure_future(watch_disconnect(receive, subscription))
+    try:
+        await send({'type': 'websocket.accept'})
+        while (message := await subscription.get()) is not None:
+            await send({'type': 'websocket.send', 'text': message})
+    except OSError:
+        # The server lost the connection before the disconnect message arrived
+        pass
+    finally:
+        watcher.cancel()
+        layer.unsubscribe(subscription)
@@ -0,0 +1,156 @@
+import heapq
+import logging
+import threading
+from datetime import timedelta
+from django.db import close_old_connections
+from django.utils import timezone
+from .models import Reminder
+from .utils import check_and_send_reminders
+
+logger = logging.getLogger(__name__)
+
+# Longest wait, in seconds, after consecutive failed steps
+MAX_ERROR_DELAY = 60
+
+class ReminderScheduler:
+    """
+    Keeps upcoming reminders in a heap ordered by when they are due (their
+    next attempt after a failure, see Reminder.pending()) and sends each one
+    as soon as it is due.
+
+    Only reminders inside a lookahead window are held in memory. Changes are
+    picked up by polling Reminder.updated_at, so the scheduler sees rows
+    written by other processes (the API server, admin, shell). The heap is
+    only a hint: every dispatch claims the rows again, so deleted, already
+    sent or rescheduled reminders are skipped safely.
+    """
+    def __init__(self, lookahead=timedelta(hours=1), poll_interval=1.0,
+                 sweep_interval=300.0, batch_size=None):
+        self.lookahead = lookahead
+        self.poll_interval = poll_interval
+        self.sweep_interval = sweep_interval
+        self.batch_size = batch_size
+        # Rows committed slightly out of updated_at order are caught by re-reading this overlap
+        self.poll_overlap = timedelta(seconds=5)
+        self.heap = []
+        self.scheduled = {}
+        self.window_end = None
+        self.watermark = None
+        self.last_sweep = None
+        self.stop_event = threading.Event()
+
+    def schedule(self, reminder_id, due_at):
+        """Add or move a reminder in the heap"""
+        if self.scheduled.get(reminder_id) == due_at:
+            return
+        self.scheduled[reminder_id] = due_at
+        heapq.heappush(self.heap, (due_at, reminder_id))
+
+    def unschedule(self, reminder_id):
+        """Forget a reminder; its heap entry is dropped lazily when popped"""
+        self.scheduled.pop(reminder_id, None)
+
+    def load(self, now=None):
+        """Load all pending reminders up to the end of the lookahead window"""
+        now = now or timezone.now()
+        window_end = now + self.lookahead
+        rows = list(Reminder.objects.pending().filter(
+            due_at__lte=window_end
+        ).values_list('id', 'due_at'))
+        for reminder_id, due_at in rows:
+            self.schedule(reminder_id, due_at)
+        self.watermark = now
+        self.window_end = window_end
+
+    def extend_window(self, now=None):
+        """Slide the lookahead window forward once half of it has elapsed"""
+        now = now or timezone.now()
+        if now + self.lookahead / 2 < self.window_end:
+            return
+        new_end = now + self.lookahead
+        rows = Reminder.objects.pending().filter(
+            due_at__gt=self.window_end,
+            due_at__lte=new_end
+        ).values_list('id', 'due_at')
+        for reminder_id, due_at in rows:
+            self.schedule(reminder_id, due_at)
+        self.window_end = new_end
+
+    def poll_changes(self):
+        """Apply reminders created or changed since the last poll"""
+        rows = Reminder.objects.filter(
+            updated_at__gte=self.watermark - self.poll_overlap
+        ).values_list('id', 'remind_at', 'next_attempt_at', 'sent', 'dead_lettered', 'updated_at')
+        for reminder_id, remind_at, next_attempt_at, sent, dead_lettered, updated_at in rows:
+            due_at = next_attempt_at or remind_at
+            if sent or dead_lettered or due_at > self.window_end:
+                self.unschedule(reminder_id)
+            else:
+                self.schedule(reminder_id, due_at)
+            self.watermark = max(self.watermark, updated_at)
+
+    def pop_due(self, now=None):
+        """Remove and return the ids of every reminder due at `now`"""
+        now = now or timezone.now()
+        due_ids = []
+        while self.heap and self.heap[0][0] <= now:
+            due_at, reminder_id = heapq.heappop(self.heap)
+            if self.scheduled.get(reminder_id) == due_at:
+                del self.scheduled[reminder_id]
+                due_ids.append(reminder_id)
+        return due_ids
+
+    def seconds_until_next(self, now=None):
+        """Seconds to sleep before the next reminder is due or the next poll"""
+        now = now or timezone.now()
+        wait = self.poll_interval
+        if self.heap:
+            wait = min(wait, (self.heap[0][0] - now).total_seconds())
+        return max(wait, 0)
+
+    def tick(self, now=None):
+        """Run one scheduling step and return the dispatch statistics"""
+        now = now or timezone.now()
+        self.poll_changes()
+        self.extend_window(now)
+
+        due_ids = self.pop_due(now)
+        if self.last_sweep is None or (now - self.last_sweep).total_seconds() >= self.sweep_interval:
+            # Catch reminders that failed earlier or were missed while we were down
+            self.last_sweep = now
+            return check_and_send_reminders(batch_size=self.batch_size)
+        if due_ids:
+            return check_and_send_reminders(batch_size=self.batch_size, reminder_ids=due_ids)
+        return None
+
+    def run(self, on_dispatch=None):
+        """
+        Run until stop() is called. A failed step (the database or SMTP
+        server being unavailable) is logged and retried after a delay that
+        doubles with each consecutive failure, up to MAX_ERROR_DELAY; the
+        next successful step runs a full sweep for anything it missed.
+        Like a request, every step starts and ends by closing database
+        connections that broke or outlived CONN_MAX_AGE.
+        """
+        failures = 0
+        while not self.stop_event.is_set():
+            close_old_connections()
+            try:
+                if self.window_end is None:
+                    self.load()
+                stats = self.tick()
+            except Exception:
+                failures += 1
+                logger.exception('Reminder scheduler step failed (%d in a row)', failures)
+                self.last_sweep = None
+                self.stop_event.wait(min(self.poll_interval * 2 ** failures, MAX_ERROR_DELAY))
+                continue
+            finally:
+                close_old_connections()
+            failures = 0
+            if stats and on_dispatch:
+                on_dispatch(stats)
+            self.stop_event.wait(self.seconds_until_next())
+
+    def stop(self):
+        self.stop_event.set()
@@ -0,0 +1,82 @@
+import re
+from asgiref.sync import sync_to_async
+from django.db import connections
+from django.db.models import BooleanField, F, FloatField
+from django.db.models.expressions import RawSQL
+from rest_framework import filters
+
+WORD_RE = re.compile(r'\w+', re.UNICODE)
+
+_fts_tables = {}
+
+def has_fts_index(connection):
+    """Whether the SQLite FTS5 table exists (it is skipped when FTS5 is unavailable)"""
+    if connection.alias not in _fts_tables:
+        _fts_tables[connection.alias] = 'tasks_task_fts' in connection.introspection.table_names()
+    return _fts_tables[connection.alias]
+
+async def ahas_fts_index(alias):
+    """has_fts_index() for async code; only the first check leaves the event loop"""
+    if alias in _fts_tables:
+        return _fts_tables[alias]
+    # Connections are per thread, so look it up in the thread that runs the query
+    return await sync_to_async(lambda: has_fts_index(connections[alias]))()
+
+def search_words(terms):
+    """Split search terms into plain words, dropping query syntax characters"""
+    return [word for term in terms for word in WORD_RE.findall(term)]
+
+def search_tasks(queryset, terms):
+    """
+    Filter a Task queryset to rows matching every word (as a prefix) and
+    annotate them with `search_rank`, where lower is a better match.
+
+    Returns None when the database has no full-text index, so callers can
+    fall back to LIKE search.
+    """
+    words = search_words(terms)
+    if not words:
+        return None
+    connection = connections[queryset.db]
+
+    if connection.vendor == 'sqlite' and has_fts_index(connection):
+        # "word"* is a prefix query; separate phrases are ANDed
+        query = ' '.join(f'"{word}"*' for word in words)
+        return queryset.filter(search_index__document__match=query).annotate(
+            search_rank=F('search_index__rank')
+        )
+
+    if connection.vendor == 'postgresql':
+        query = ' & '.join(f'{word}:*' for word in words)
+        return queryset.alias(
+            search_match=RawSQL(
+                "tasks_task.search_vector @@ to_tsquery('english', %s)", [query],
+                output_field=BooleanField()
+            )
+        ).filter(search_match=True).annotate(
+            search_rank=RawSQL(
+                "-ts_rank(tasks_task.search_vector, to_tsquery('english', %s))", [query],
+                output_field=FloatField()
+            )
+        )
+
+    return None
+
+class FullTextSearchFilter(filters.SearchFilter):
+    """
+    SearchFilter backed by the full-text index.
+
+    Results are ranked by relevance unless the client asks for another
+    ?ordering=. Databases without an index fall back to the LIKE search
+    of SearchFilter over `search_fields`.
+    """
+    def filter_queryset(self, request, queryset, view):
+        terms = self.get_search_terms(request)
+        if not terms:
+            return queryset
+        results = search_tasks(queryset, terms)
+        if results is None:
+            return super().filter_queryset(request, queryset, view)
+        # Picked up by OrderingFilter and the cursor pagination as the default ordering
+        view.ordering = ['search_rank']
+        return results
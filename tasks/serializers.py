@@ -1,18 +1,63 @@
+import datetime
+import functools
 from rest_framework import serializers
+from rest_framework.settings import api_settings
+from django.conf import settings
 from django.contrib.auth.models import User
-from .models import Task, SubTask, Category, Reminder
+from django.utils import timezone
+from .metrics import timed
+from .models import Task, SubTask, Category, Reminder, ReminderPreference
 
-class CategorySerializer(serializers.ModelSerializer):
+class TimedModelSerializer(serializers.ModelSerializer):
+    """ModelSerializer whose output counts towards the request's serializer time"""
+    def to_representation(self, instance):
+        with timed('serializer'):
+            return super().to_representation(instance)
+
+class CategorySerializer(TimedModelSerializer):
     class Meta:
         model = Category
         fields = ['id', 'name', 'created_at']
 
-class SubTaskSerializer(serializers.ModelSerializer):
+class SubTaskSerializer(TimedModelSerializer):
     class Meta:
         model = SubTask
         fields = ['id', 'task', 'title', 'minutes', 'is_completed', 'created_at']
 
-class TaskSerializer(serializers.ModelSerializer):
+class ReminderSerializer(TimedModelSerializer):
+    class Meta:
+        model = Reminder
+        fields = ['id', 'task', 'remind_at', 'sent']
+
+class ReminderPreferenceSerializer(TimedModelSerializer):
+    """Leaving out minutes_before (or null) keeps DEFAULT_TASK_REMINDER_TIMES"""
+    minutes_before = serializers.ListField(
+        child=serializers.IntegerField(min_value=1, max_value=365 * 24 * 60),
+        max_length=10,
+        required=False,
+        allow_null=True,
+        default=None,
+    )
+
+    class Meta:
+        model = ReminderPreference
+        fields = ['minutes_before', 'digest']
+
+    def validate_minutes_before(self, value):
+        return None if value is None else sorted(set(value))
+
+class TaskSerializer(TimedModelSerializer):
+    """
+    Pass `expand` (names from expandable_fields) in the context to embed
+    related objects: subtasks and reminders as lists, category as an object
+    instead of its id. The view is expected to prefetch them.
+    """
+    expandable_fields = {
+        'subtasks': lambda: SubTaskSerializer(many=True, read_only=True),
+        'reminders': lambda: ReminderSerializer(many=True, read_only=True),
+        'category': lambda: CategorySerializer(read_only=True),
+    }
+
     class Meta:
         model = Task
         fields = [
@@ -21,7 +66,105 @@ class TaskSerializer(serializers.ModelSerializer):
             'created_at', 'updated_at'
         ]
 
-class ReminderSerializer(serializers.ModelSerializer):
-    class Meta:
-        model = Reminder
-        fields = ['id', 'task', 'remind_at', 'sent']
+    def get_fields(self):
+        fields = super().get_fields()
+        expand = self.context.get('expand', ())
+        for name, field in self.expandable_fields.items():
+            if name in expand:
+                fields[name] = field()
+        return fields
+
+def format_datetime(value, tz):
+    """Format a datetime exactly like serializers.DateTimeField with ISO 8601 output"""
+    if tz is not None:
+        if timezone.is_aware(value):
+            value = value.astimezone(tz)
+        else:
+            value = timezone.make_aware(value, tz)
+    elif timezone.is_aware(value):
+        value = timezone.make_naive(value, datetime.timezone.utc)
+    value = value.isoformat()
+    if value.endswith('+00:00'):
+        value = value[:-6] + 'Z'
+    return value
+
+class ValuesSerializer:
+    """
+    Read-only fast path for the output of a ModelSerializer.
+
+    Rows are read with .values() for exactly the serializer's fields and
+    turned into the dicts to_representation() would build: datetimes are
+    converted and ISO formatted in one pass over the rows (UTC values
+    without any conversion when the current time zone is UTC), every other
+    field is passed through as the database returned it. Use
+    for_serializer(), which returns None for serializers whose output this
+    cannot reproduce exactly.
+    """
+    passthrough_fields = (
+        serializers.CharField, serializers.ChoiceField, serializers.IntegerField,
+        serializers.BooleanField, serializers.PrimaryKeyRelatedField,
+    )
+
+    def __init__(self, fields, datetime_fields):
+        self.fields = fields
+        self.datetime_fields = datetime_fields
+
+    @classmethod
+    @functools.lru_cache(maxsize=None)
+    def for_serializer(cls, serializer_class):
+        if serializer_class.to_representation is not TimedModelSerializer.to_representation:
+            return None
+        if api_settings.DATETIME_FORMAT is None or api_settings.DATETIME_FORMAT.lower() != 'iso-8601':
+            return None
+
+        fields, datetime_fields = [], []
+        for name, field in serializer_class().fields.items():
+            if field.write_only:
+                continue
+            if field.source != name:
+                return None
+            if isinstance(field, serializers.DateTimeField):
+                if hasattr(field, 'format') or hasattr(field, 'timezone'):
+                    return None
+                datetime_fields.append(name)
+            elif not isinstance(field, cls.passthrough_fields) or isinstance(field, serializers.ManyRelatedField):
+                return None
+            if isinstance(field, serializers.PrimaryKeyRelatedField) and field.pk_field is not None:
+                return None
+            fields.append(name)
+        return cls(fields, datetime_fields)
+
+    def values(self, queryset):
+        """The queryset as dict rows, keeping selected annotations (e.g. search_rank) for ordering"""
+        return queryset.values(*self.fields, *queryset.query.annotation_select)
+
+    def to_representation(self, rows):
+        with timed('serializer'):
+            return self._to_representation(rows)
+
+    def _to_representation(self, rows):
+        tz = timezone.get_current_timezone() if settings.USE_TZ else None
+        if tz is not None and tz.utcoffset(None) == datetime.timedelta(0) and getattr(tz, 'key', 'UTC') == 'UTC':
+            # Aware values from the database are UTC already
+            tz = datetime.timezone.utc
+        fields, datetime_fields = self.fields, self.datetime_fields
+
+        utc = datetime.timezone.utc
+
+        data = []
+        for row in rows:
+            item = {name: row[name] for name in fields}
+            for name in datetime_fields:
+                value = item[name]
+                if not value:
+                    item[name] = None
+                elif tz is utc and value.tzinfo is utc:
+                    # The common case: skip the conversion, the offset is always +00:00
+                    item[name] = value.isoformat()[:-6] + 'Z'
+                else:
+                    item[name] = format_datetime(value, tz)
+            data.append(item)
+        return data
+
+    def serialize(self, queryset):
+        return self.to_representation(self.values(queryset))
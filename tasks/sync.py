@@ -0,0 +1,72 @@
+import datetime
+from django.conf import settings
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from .models import Task, SubTask, Reminder, Tombstone
+from .serializers import TaskSerializer, SubTaskSerializer, ReminderSerializer, ValuesSerializer
+
+# Response key: (model, lookup of the owning user, serializer)
+SYNCED_MODELS = {
+    'tasks': (Task, 'user', TaskSerializer),
+    'subtasks': (SubTask, 'task__user', SubTaskSerializer),
+    'reminders': (Reminder, 'task__user', ReminderSerializer),
+}
+
+def parse_watermark(value):
+    """The time of a watermark returned by an earlier sync, or None when it is malformed"""
+    try:
+        since = parse_datetime(value)
+    except ValueError:
+        return None
+    if since is not None and timezone.is_naive(since):
+        since = timezone.make_aware(since, datetime.timezone.utc)
+    return since
+
+def format_watermark(value):
+    # 'Z' rather than '+00:00', so the watermark survives being pasted into a query string
+    return value.astimezone(datetime.timezone.utc).isoformat().replace('+00:00', 'Z')
+
+def serialize(serializer_class, queryset):
+    values_serializer = ValuesSerializer.for_serializer(serializer_class)
+    if values_serializer is None:
+        return serializer_class(queryset, many=True).data
+    return values_serializer.serialize(queryset)
+
+def get_changes(user, since=None, now=None):
+    """
+    The user's tasks, subtasks and reminders changed after `since`, and the
+    ids of those deleted after it.
+
+    Without `since`, or when it is older than the tombstones that are kept
+    (SYNC_TOMBSTONE_DAYS), everything is returned with `reset` set and the
+    client should replace its copy. The new watermark trails the clock by
+    SYNC_WATERMARK_LAG, so rows stamped just before a slow transaction
+    committed are picked up by the next sync; clients may see a row twice.
+    """
+    now = now or timezone.now()
+    reset = since is None or since < now - datetime.timedelta(days=settings.SYNC_TOMBSTONE_DAYS)
+    changes = {
+        'watermark': format_watermark(now - datetime.timedelta(seconds=settings.SYNC_WATERMARK_LAG)),
+        'reset': reset,
+    }
+
+    for key, (model, user_lookup, serializer_class) in SYNCED_MODELS.items():
+        queryset = model.objects.filter(**{user_lookup: user})
+        if not reset:
+            queryset = queryset.filter(updated_at__gt=since)
+        changes[key] = serialize(serializer_class, queryset.order_by('id'))
+
+    deleted = {key: [] for key in SYNCED_MODELS}
+    if not reset:
+        keys = {model._meta.model_name: key for key, (model, _, _) in SYNCED_MODELS.items()}
+        tombstones = Tombstone.objects.filter(user=user, deleted_at__gt=since).order_by('id')
+        for model_name, object_id in tombstones.values_list('model', 'object_id'):
+            deleted[keys[model_name]].append(object_id)
+    changes['deleted'] = deleted
+    return changes
+
+def prune_tombstones(now=None):
+    """Delete tombstones older than SYNC_TOMBSTONE_DAYS; returns how many were deleted"""
+    now = now or timezone.now()
+    cutoff = now - datetime.timedelta(days=settings.SYNC_TOMBSTONE_DAYS)
+    return Tombstone.objects.filter(deleted_at__lt=cutoff).delete()[0]
@@ -0,0 +1,343 @@
+import asyncio
+import json
+import threading
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+from asgiref.sync import sync_to_async
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+from ..ai_utils import (
+    ResultCache, StubBackend, SubtaskGenerator, SubtaskStreamParser, parse_batch_subtasks,
+    parse_subtasks, request_key, validate_subtasks
+)
+from ..authentication import issue_token
+from ..models import Task, SubTask
+
+class BlockingBackend(StubBackend):
+    """Stub backend that holds every call until released"""
+    def __init__(self):
+        super().__init__(latency=0)
+        self.started = threading.Event()
+        self.release = threading.Event()
+
+    def generate(self, prompt):
+        self.started.set()
+        self.release.wait(5)
+        return super().generate(prompt)
+
+class BlockingStreamBackend(StubBackend):
+    """Stub backend whose streams hold after their first chunk until released"""
+    def __init__(self):
+        super().__init__(latency=0)
+        self.started = threading.Event()
+        self.release = threading.Event()
+
+    def stream(self, prompt):
+        for index, chunk in enumerate(super().stream(prompt)):
+            yield chunk
+            if index == 0:
+                self.started.set()
+                self.release.wait(5)
+
+class FailingBackend(StubBackend):
+    def generate(self, prompt):
+        super().generate(prompt)
+        raise RuntimeError('model unavailable')
+
+class DroppingBackend(StubBackend):
+    """Stub backend whose first answer leaves out the section of the second task"""
+    def generate(self, prompt):
+        answer = super().generate(prompt)
+        if self.calls == 1:
+            answer = answer.replace('### Task 2', 'Something else entirely')
+        return answer
+
+class SubtaskGeneratorTests(SimpleTestCase):
+    def setUp(self):
+        self.backend = StubBackend(latency=0)
+        self.generator = SubtaskGenerator(backend=self.backend, max_workers=2, cache_size=10, cache_ttl=60)
+
+    def tearDown(self):
+        self.generator.shutdown()
+
+    def test_generates_valid_subtasks(self):
+        """Test that the stub answer is parsed into valid subtasks"""
+        subtasks = self.generator.generate('Write report', 'Quarterly numbers', '2030-01-10T12:00:00Z')
+        self.assertTrue(validate_subtasks(subtasks))
+        self.assertEqual(subtasks[0]['title'], 'Plan Write report')
+        self.assertEqual(subtasks[-1]['due_date'], '2030-01-10T11:00:00')
+
+    def test_cache_hit_skips_backend(self):
+        """Test that a repeated request, differing only in case and spacing, is served from cache"""
+        first = self.generator.generate('Write report', 'Quarterly numbers')
+        second = self.generator.generate('  write   REPORT ', 'quarterly numbers')
+
+        self.assertEqual(first, second)
+        self.assertEqual(self.backend.calls, 1)
+        self.assertEqual(self.generator.stats['hits'], 1)
+
+    def test_results_are_copies(self):
+        """Test that callers cannot modify the cached result"""
+        self.generator.generate('Write report')[0]['title'] = 'changed'
+        self.assertEqual(self.generator.generate('Write report')[0]['title'], 'Plan Write report')
+
+    def test_identical_requests_are_coalesced(self):
+        """Test that identical in-flight requests share one backend call"""
+        backend = BlockingBackend()
+        generator = SubtaskGenerator(backend=backend, max_workers=2, cache_size=10, cache_ttl=60)
+        self.addCleanup(generator.shutdown)
+
+        first = generator.submit('Write report')
+        backend.started.wait(5)
+        second = generator.submit('Write report')
+        backend.release.set()
+
+        self.assertEqual(first.result(5), second.result(5))
+        self.assertEqual(backend.calls, 1)
+        self.assertEqual(generator.stats['coalesced'], 1)
+
+    def test_identical_streams_are_coalesced(self):
+        """Test that requests identical to a stream in flight wait for it instead of calling the model"""
+        backend = BlockingStreamBackend()
+        generator = SubtaskGenerator(backend=backend, max_workers=1, cache_size=10, cache_ttl=60)
+        self.addCleanup(generator.shutdown)
+
+        async def consume():
+            return [subtask async for subtask in generator.astream('Write report')]
+
+        async def run():
+            first = asyncio.create_task(consume())
+            await asyncio.to_thread(backend.started.wait, 5)
+            # With the only pool thread streaming, these must wait outside the pool
+            second = asyncio.create_task(consume())
+            submitted = generator.submit('Write report')
+            await asyncio.sleep(0.05)
+            backend.release.set()
+            return await first, await second, await asyncio.wrap_future(submitted)
+
+        first, second, submitted = asyncio.run(asyncio.wait_for(run(), 5))
+        self.assertEqual(len(first), 4)
+        self.assertEqual(first, second)
+        self.assertEqual(first, submitted)
+        self.assertEqual(backend.calls, 1)
+        self.assertEqual(generator.stats['coalesced'], 2)
+
+    def test_stopped_stream_hands_over_to_waiters(self):
+        """Test that requests joining a stream still get subtasks when it stops early"""
+        backend = BlockingStreamBackend()
+        generator = SubtaskGenerator(backend=backend, max_workers=2, cache_size=10, cache_ttl=60)
+        self.addCleanup(generator.shutdown)
+
+        stream = generator.stream('Write report')
+        reader = threading.Thread(target=lambda: next(stream))
+        reader.start()
+        backend.started.wait(5)
+        waiting = generator.submit('Write report')
+        backend.release.set()
+        reader.join(5)
+        stream.close()
+
+        self.assertEqual(len(waiting.result(5)), 4)
+        self.assertEqual(backend.calls, 2)
+
+    def test_different_due_dates_are_separate(self):
+        """Test that the due date is part of the cache key"""
+        self.generator.generate('Write report', task_due_date='2030-01-10T12:00:00')
+        self.generator.generate('Write report', task_due_date='2030-01-11T12:00:00')
+        self.assertEqual(self.backend.calls, 2)
+
+    def test_failures_are_not_cached(self):
+        """Test that a failed call returns no subtasks and is retried next time"""
+        backend = FailingBackend(latency=0)
+        generator = SubtaskGenerator(backend=backend, max_workers=1, cache_size=10, cache_ttl=60)
+        self.addCleanup(generator.shutdown)
+
+        with self.assertLogs('tasks.ai_utils', 'ERROR'):
+            self.assertEqual(generator.generate('Write report'), [])
+            self.assertEqual(generator.generate('Write report'), [])
+        self.assertEqual(backend.calls, 2)
+        self.assertEqual(generator.stats['errors'], 2)
+
+    def test_agenerate(self):
+        """Test that the async API returns the same subtasks"""
+        subtasks = asyncio.run(self.generator.agenerate('Write report'))
+        self.assertEqual(subtasks, self.generator.generate('Write report'))
+        self.assertEqual(self.backend.calls, 1)
+
+    def test_batch_uses_one_call_per_batch(self):
+        """Test that tasks are packed batch_size at a time and duplicates are sent once"""
+        tasks = [(f'Task {i}', None, '2030-01-10T12:00:00') for i in range(5)] + [('Task 0', None, '2030-01-10T12:00:00')]
+        results = self.generator.generate_batch(tasks, batch_size=3)
+
+        self.assertEqual(self.backend.calls, 2)
+        self.assertEqual(results[1][0]['title'], 'Plan Task 1')
+        self.assertEqual(results[5], results[0])
+        self.assertTrue(all(validate_subtasks(subtasks) for subtasks in results))
+
+    def test_batch_retries_only_failed_tasks(self):
+        """Test that a task missing from the batch answer is retried on its own"""
+        backend = DroppingBackend(latency=0)
+        generator = SubtaskGenerator(backend=backend, max_workers=1, cache_size=10, cache_ttl=60)
+        self.addCleanup(generator.shutdown)
+
+        results = generator.generate_batch([('First', None, None), ('Second', None, None)], retries=1)
+
+        self.assertEqual(backend.calls, 2)
+        self.assertEqual(generator.stats['retried'], 1)
+        self.assertEqual(results[1][0]['title'], 'Plan Second')
+
+    def test_batch_serves_cached_tasks(self):
+        """Test that a batch only sends the tasks missing from the cache"""
+        self.generator.generate('First')
+        self.generator.generate_batch([('First', None, None), ('Second', None, None)])
+        self.assertEqual(self.backend.calls, 2)
+        self.assertEqual(self.generator.stats['hits'], 1)
+
+class ResultCacheTests(SimpleTestCase):
+    def test_lru_eviction(self):
+        """Test that the least recently used entry is evicted first"""
+        cache = ResultCache(max_size=2, ttl=60)
+        cache.set('a', 1)
+        cache.set('b', 2)
+        cache.get('a')
+        cache.set('c', 3)
+        self.assertEqual((cache.get('a'), cache.get('b'), cache.get('c')), (1, None, 3))
+
+    def test_ttl_expiry(self):
+        """Test that entries expire after the TTL"""
+        cache = ResultCache(max_size=2, ttl=60)
+        with mock.patch('tasks.ai_utils.time.monotonic', return_value=1000):
+            cache.set('a', 1)
+        with mock.patch('tasks.ai_utils.time.monotonic', return_value=1061):
+            self.assertIsNone(cache.get('a'))
+
+class ParseSubtasksTests(SimpleTestCase):
+    def test_parse_markdown_response(self):
+        """Test that list markers and bold text are stripped"""
+        text = "- **Title:** Draft outline\n- **Due:** 2030-01-09 10:00\n- Title: Missing due"
+        self.assertEqual(parse_subtasks(text), [
+            {'title': 'Draft outline', 'due_date': '2030-01-09T10:00:00'}
+        ])
+
+    def test_parse_batch_response(self):
+        """Test that a batch answer is split per task and missing sections are empty"""
+        text = "### Task 2\nTitle: Second step\nDue: 2030-01-09 10:00\nMinutes: 45\n## Task 1:\nTitle: First step\nDue: 2030-01-09 09:00"
+        tasks = [('First', None, None), ('Second', None, None), ('Third', None, None)]
+        self.assertEqual(parse_batch_subtasks(text, tasks), [
+            [{'title': 'First step', 'due_date': '2030-01-09T09:00:00'}],
+            [{'title': 'Second step', 'due_date': '2030-01-09T10:00:00', 'minutes': 45}],
+            [],
+        ])
+
+    def test_request_key_ignores_seconds(self):
+        """Test that due dates are compared to the minute, like the prompt"""
+        self.assertEqual(
+            request_key('Task', None, '2030-01-10T12:00:00'),
+            request_key('Task', None, '2030-01-10T12:00:59')
+        )
+
+class GenerateSubtasksEndpointTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='aiuser', password='testpass123')
+        self.other = User.objects.create_user(username='otheruser', password='testpass123')
+        due_date = timezone.now() + timedelta(days=2)
+        self.tasks = [
+            Task.objects.create(user=self.user, title=f'Task {i}', due_date=due_date)
+            for i in range(3)
+        ]
+        self.other_task = Task.objects.create(user=self.other, title='Other', due_date=due_date)
+        self.backend = StubBackend(latency=0)
+        generator = SubtaskGenerator(backend=self.backend, max_workers=2, cache_size=10, cache_ttl=60)
+        self.addCleanup(generator.shutdown)
+        patcher = mock.patch('tasks.ai_utils._generator', generator)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+    @override_settings(AI_BATCH_SIZE=10)
+    def test_generate_for_many_tasks(self):
+        """Test that several tasks are broken down in one model call and saved"""
+        ids = [task.id for task in self.tasks] + [self.other_task.id]
+        response = self.client.post(reverse('task-generate-subtasks'), {'ids': ids}, format='json')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([item['status'] for item in response.data], ['generated'] * 3 + ['not_found'])
+        self.assertEqual(len(response.data[0]['subtasks']), 4)
+        self.assertEqual(response.data[0]['subtasks'][0]['minutes'], 30)
+        self.assertEqual(self.backend.calls, 1)
+        self.assertEqual(SubTask.objects.filter(task__user=self.user).count(), 12)
+        self.assertFalse(SubTask.objects.filter(task=self.other_task).exists())
+
+    def test_backfill_command(self):
+        """Test that the command only fills in open tasks without subtasks"""
+        SubTask.objects.create(task=self.tasks[0], title='Existing')
+        Task.objects.filter(id=self.tasks[1].id).update(is_completed=True)
+        out = StringIO()
+
+        call_command('generate_subtasks', '--user', 'aiuser', stdout=out)
+
+        self.assertIn('Created 4 subtasks for 1 tasks', out.getvalue())
+        self.assertEqual(SubTask.objects.filter(task=self.tasks[0]).count(), 1)
+        self.assertFalse(SubTask.objects.filter(task=self.tasks[1]).exists())
+        self.assertEqual(SubTask.objects.filter(task=self.tasks[2]).count(), 4)
+
+class StreamSubtasksTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='streamuser', password='testpass123')
+        self.task = Task.objects.create(
+            user=self.user, title='Write report', due_date=timezone.now() + timedelta(days=2)
+        )
+        self.backend = StubBackend(latency=0)
+        generator = SubtaskGenerator(backend=self.backend, max_workers=2, cache_size=10, cache_ttl=60)
+        self.addCleanup(generator.shutdown)
+        patcher = mock.patch('tasks.ai_utils._generator', generator)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.url = reverse('task-subtasks-stream', args=[self.task.id])
+        self.headers = {'Authorization': 'Token ' + issue_token(self.user)[0]}
+
+    async def read_events(self, response):
+        body = b''.join([chunk async for chunk in response.streaming_content]).decode()
+        return [
+            (lines[0][len('event: '):], json.loads(lines[1][len('data: '):]))
+            for lines in (block.split('\n') for block in body.strip().split('\n\n'))
+        ]
+
+    async def test_streams_subtask_events(self):
+        """Test that each subtask is sent as its own event, followed by done"""
+        response = await self.async_client.get(self.url, headers=self.headers)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        events = await self.read_events(response)
+        self.assertEqual([name for name, _ in events], ['subtask'] * 4 + ['done'])
+        self.assertEqual(events[0][1]['title'], 'Plan Write report')
+        self.assertEqual(events[-1][1], {'count': 4})
+
+    async def test_requires_authentication(self):
+        """Test that anonymous requests and other users' tasks are rejected"""
+        response = await self.async_client.get(self.url)
+        self.assertEqual(response.status_code, 401)
+
+        other = await User.objects.acreate(username='other')
+        headers = {'Authorization': 'Token ' + (await sync_to_async(issue_token)(other))[0]}
+        response = await self.async_client.get(self.url, headers=headers)
+        self.assertEqual(response.status_code, 404)
+
+class SubtaskStreamParserTests(SimpleTestCase):
+    def test_subtask_emitted_as_soon_as_complete(self):
+        """Test that a subtask is returned once its last line arrives, across chunk boundaries"""
+        parser = SubtaskStreamParser()
+        self.assertEqual(parser.feed('Title: Draft out'), [])
+        self.assertEqual(parser.feed('line\nDue: 2030-01-09 10:00\nMinu'), [])
+        self.assertEqual(parser.feed('tes: 20\nTitle: Rev'), [
+            {'title': 'Draft outline', 'due_date': '2030-01-09T10:00:00', 'minutes': 20}
+        ])
+        self.assertEqual(parser.feed('iew\nDue: 2030-01-09 12:00'), [])
+        self.assertEqual(parser.close(), [{'title': 'Review', 'due_date': '2030-01-09T12:00:00'}])
@@ -0,0 +1,107 @@
+from datetime import timedelta
+from asgiref.sync import sync_to_async
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.contrib.auth.models import User
+from django.utils import timezone
+from ..authentication import issue_token, token_cache
+from ..models import Task, SubTask
+
+@override_settings(ROOT_URLCONF='taskninja.asgi_urls')
+class AsyncReadViewTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        token_cache.clear()
+        self.user = User.objects.create_user(
+            username='asyncuser',
+            email='async@example.com',
+            password='testpass123'
+        )
+        now = timezone.now()
+        self.tasks = [
+            Task.objects.create(user=self.user, title=f'Task {i}', due_date=now + timedelta(days=i + 1))
+            for i in range(3)
+        ]
+        SubTask.objects.create(task=self.tasks[0], title='Step one')
+        self.headers = {'Authorization': 'Token ' + issue_token(self.user)[0]}
+
+    async def get_both(self, url):
+        """GET a URL through the async view and through the synchronous DRF view"""
+        async_response = await self.async_client.get(url, headers=self.headers)
+        with override_settings(ROOT_URLCONF='taskninja.urls', TASK_CACHE_TTL=0):
+            sync_response = await sync_to_async(self.client.get)(url, headers=self.headers)
+        return async_response, sync_response
+
+    async def test_responses_match_sync_views(self):
+        """Test that the async endpoints return the same JSON as the DRF views"""
+        task_id = self.tasks[0].id
+        for url in [
+            '/api/tasks/',
+            '/api/tasks/?ordering=-due_date&page_size=2',
+            '/api/tasks/?search=task',
+            f'/api/tasks/{task_id}/',
+            f'/api/tasks/{task_id}/subtasks/',
+            '/api/reminders/',
+        ]:
+            async_response, sync_response = await self.get_both(url)
+            self.assertEqual(async_response.status_code, 200, url)
+            self.assertEqual(async_response.json(), sync_response.json(), url)
+
+    async def test_cursor_pagination(self):
+        """Test that the next link of an async page leads to the following page"""
+        response = await self.async_client.get('/api/tasks/?page_size=2', headers=self.headers)
+        next_page = await self.async_client.get(response.json()['next'], headers=self.headers)
+
+        titles = [task['title'] for task in response.json()['results'] + next_page.json()['results']]
+        self.assertEqual(titles, ['Task 0', 'Task 1', 'Task 2'])
+        self.assertIsNone(next_page.json()['next'])
+
+    async def test_etag_revalidation(self):
+        """Test that the async list shares the response cache and honors If-None-Match"""
+        response = await self.async_client.get('/api/tasks/', headers=self.headers)
+        etag = response['ETag']
+
+        response = await self.async_client.get(
+            '/api/tasks/', headers={**self.headers, 'If-None-Match': etag}
+        )
+        self.assertEqual(response.status_code, 304)
+
+    async def test_errors(self):
+        """Test missing credentials, unknown objects and bad cursors"""
+        response = await self.async_client.get('/api/tasks/')
+        self.assertEqual(response.status_code, 401)
+
+        other = await User.objects.acreate(username='otherasync')
+        other_task = await Task.objects.acreate(user=other, title='Other', due_date=timezone.now())
+        response = await self.async_client.get(f'/api/tasks/{other_task.id}/', headers=self.headers)
+        self.assertEqual(response.status_code, 404)
+
+        response = await self.async_client.get('/api/tasks/?cursor=bogus', headers=self.headers)
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(response.json(), {'detail': 'Invalid cursor'})
+
+    def test_writes_fall_through_to_drf(self):
+        """Test that non-GET requests on the async routes are handled by the DRF views"""
+        response = self.client.post('/api/tasks/', {
+            'title': 'Created',
+            'due_date': (timezone.now() + timedelta(days=1)).isoformat(),
+        }, content_type='application/json', headers=self.headers)
+        self.assertEqual(response.status_code, 201)
+
+        response = self.client.delete(f'/api/tasks/{self.tasks[1].id}/', headers=self.headers)
+        self.assertEqual(response.status_code, 204)
+        self.assertFalse(Task.objects.filter(id=self.tasks[1].id).exists())
+
+    async def test_expand(self):
+        """Test that expanded async responses match the DRF views"""
+        task_id = self.tasks[0].id
+        for url in [
+            '/api/tasks/?expand=subtasks,reminders,category',
+            f'/api/tasks/{task_id}/?expand=subtasks',
+        ]:
+            async_response, sync_response = await self.get_both(url)
+            self.assertEqual(async_response.status_code, 200, url)
+            self.assertEqual(async_response.json(), sync_response.json(), url)
+
+        response = await self.async_client.get('/api/tasks/?expand=owner', headers=self.headers)
+        self.assertEqual(response.status_code, 400)
@@ -3,9 +3,11 @@ Quick test script to verify authentication is working.
 Run using: python manage.py test tasks.tests.test_auth
 """
 import base64
-from django.test import TestCase, Client
+from unittest import mock
+from django.test import TestCase, Client, override_settings
 from django.contrib.auth.models import User
 from django.urls import reverse
+from ..authentication import issue_token, token_cache
 
 class AuthenticationTests(TestCase):
     def setUp(self):
@@ -50,6 +52,64 @@ class AuthenticationTests(TestCase):
         )
         self.assertEqual(tasks_response.status_code, 200)
 
+# Keep task lists uncached so query counts only reflect authentication
+@override_settings(TASK_CACHE_TTL=0)
+class TokenAuthenticationTests(TestCase):
+    def setUp(self):
+        self.client = Client()
+        self.user = User.objects.create_user(
+            username='tokenuser',
+            email='token@example.com',
+            password='testpass123'
+        )
+        token_cache.clear()
+
+    def get_tasks(self, token):
+        return self.client.get(reverse('task-list'), HTTP_AUTHORIZATION=f'Token {token}')
+
+    def test_login_returns_working_token(self):
+        response = self.client.post(
+            reverse('login'),
+            {'username': 'tokenuser', 'password': 'testpass123'},
+            content_type='application/json'
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('expires_at', response.json())
+
+        self.assertEqual(self.get_tasks(response.json()['token']).status_code, 200)
+
+    def test_verified_tokens_are_cached(self):
+        token, _ = issue_token(self.user)
+        # User lookup and task list
+        with self.assertNumQueries(2):
+            self.get_tasks(token)
+        # Task list only
+        with self.assertNumQueries(1):
+            self.assertEqual(self.get_tasks(token).status_code, 200)
+
+    def test_invalid_token(self):
+        token, _ = issue_token(self.user)
+        self.assertEqual(self.get_tasks(token[:-2] + 'xx').status_code, 401)
+        self.assertEqual(self.get_tasks('garbage').status_code, 401)
+
+    @override_settings(AUTH_TOKEN_TTL=60)
+    def test_expired_token(self):
+        token, expires_at = issue_token(self.user)
+        with mock.patch('tasks.authentication.time.time', return_value=expires_at + 1):
+            response = self.get_tasks(token)
+        self.assertEqual(response.status_code, 401)
+
+    def test_password_change_revokes_tokens(self):
+        token, _ = issue_token(self.user)
+        self.user.set_password('newpass456')
+        self.user.save()
+        self.assertEqual(self.get_tasks(token).status_code, 401)
+
+    def test_basic_auth_still_works(self):
+        credentials = base64.b64encode(b'tokenuser:testpass123').decode()
+        response = self.client.get(reverse('task-list'), HTTP_AUTHORIZATION=f'Basic {credentials}')
+        self.assertEqual(response.status_code, 200)
+
 if __name__ == '__main__':
     from django.core.management import execute_from_command_line
     execute_from_command_line(['manage.py', 'test', 'tasks.tests.test_auth'])
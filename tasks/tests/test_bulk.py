@@ -0,0 +1,177 @@
+from datetime import timedelta
+from django.test import TestCase
+from django.contrib.auth.models import User
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+from ..models import Task, SubTask, Reminder
+
+class BulkEndpointTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='bulkuser',
+            email='bulk@example.com',
+            password='testpass123'
+        )
+        self.other = User.objects.create_user(
+            username='otheruser',
+            email='other@example.com',
+            password='testpass123'
+        )
+        self.api = APIClient()
+        self.api.force_authenticate(self.user)
+        self.due = (timezone.now() + timedelta(days=5)).isoformat()
+
+    def test_bulk_create_tasks(self):
+        items = [{'title': f'Imported {i}', 'due_date': self.due} for i in range(20)]
+        # Savepoint, task INSERT, reminder times lookup, reminder INSERT, release
+        with self.assertNumQueries(5):
+            response = self.api.post(reverse('task-bulk'), items, format='json')
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(len(response.json()), 20)
+        self.assertTrue(all(task['id'] for task in response.json()))
+        self.assertEqual(Task.objects.filter(user=self.user).count(), 20)
+        # Same default reminders as a single create: 4 per task
+        self.assertEqual(Reminder.objects.filter(task__user=self.user).count(), 80)
+
+    def test_bulk_create_is_all_or_nothing(self):
+        items = [
+            {'title': 'Good', 'due_date': self.due},
+            {'title': 'Bad', 'due_date': 'not a date'},
+        ]
+        response = self.api.post(reverse('task-bulk'), items, format='json')
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()[0], {})
+        self.assertIn('due_date', response.json()[1])
+        self.assertFalse(Task.objects.exists())
+
+    def test_bulk_update_tasks(self):
+        tasks = Task.objects.bulk_create(
+            Task(user=self.user, title=f'Task {i}', due_date=timezone.now()) for i in range(3)
+        )
+        SubTask.objects.create(task=tasks[0], title='Step')
+        items = [
+            {'id': tasks[0].id, 'is_completed': True},
+            {'id': tasks[1].id, 'priority': 'High'},
+        ]
+        response = self.api.patch(reverse('task-bulk'), items, format='json')
+
+        self.assertEqual(response.status_code, 200)
+        tasks[0].refresh_from_db()
+        tasks[1].refresh_from_db()
+        self.assertTrue(tasks[0].is_completed)
+        self.assertEqual(tasks[1].priority, 'High')
+        self.assertTrue(SubTask.objects.get(task=tasks[0]).is_completed)
+
+    def test_bulk_update_rejects_foreign_tasks(self):
+        foreign = Task.objects.create(user=self.other, title='Not mine', due_date=timezone.now())
+        response = self.api.patch(
+            reverse('task-bulk'), [{'id': foreign.id, 'title': 'Mine now'}], format='json'
+        )
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json(), [{'id': ['Not found.']}])
+
+    def test_bulk_update_rejects_malformed_ids(self):
+        task = Task.objects.create(user=self.user, title='Mine', due_date=timezone.now())
+        response = self.api.patch(
+            reverse('task-bulk'), [{'id': [task.id], 'title': 'Nope'}, {'id': task.id, 'title': 'Fine'}], format='json'
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json(), [{'id': ['A valid integer is required.']}, {}])
+        task.refresh_from_db()
+        self.assertEqual(task.title, 'Mine')
+
+        response = self.api.patch(
+            reverse('task-bulk'), [{'id': task.id, 'title': 'Once'}, {'id': task.id, 'title': 'Twice'}], format='json'
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json(), [{}, {'id': ['Duplicate id.']}])
+
+    def test_bulk_ids_are_validated(self):
+        task = Task.objects.create(user=self.user, title='Mine', due_date=timezone.now())
+        for ids in ([True], [[task.id]], ['one'], [task.id, task.id]):
+            response = self.api.post(reverse('task-bulk-complete'), {'ids': ids}, format='json')
+            self.assertEqual(response.status_code, 400, ids)
+        self.assertFalse(Task.objects.filter(is_completed=True).exists())
+
+    def test_bulk_complete_tasks(self):
+        tasks = Task.objects.bulk_create(
+            Task(user=self.user, title=f'Task {i}', due_date=timezone.now()) for i in range(3)
+        )
+        SubTask.objects.bulk_create(SubTask(task=task, title='Step') for task in tasks)
+        ids = [task.id for task in tasks] + [999999]
+        response = self.api.post(reverse('task-bulk-complete'), {'ids': ids}, format='json')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()[-1], {'id': 999999, 'status': 'not_found'})
+        self.assertFalse(Task.objects.filter(is_completed=False).exists())
+        self.assertFalse(SubTask.objects.filter(is_completed=False).exists())
+
+    def test_bulk_complete_drops_unsent_reminders(self):
+        due = timezone.now() + timedelta(days=5)
+        task = Task.objects.create(user=self.user, title='Planned', due_date=due)
+        other = Task.objects.create(user=self.user, title='Open', due_date=due)
+        sent = Reminder.objects.create(task=task, remind_at=timezone.now(), sent=True)
+        self.assertTrue(task.reminders.filter(sent=False).exists())
+
+        response = self.api.post(reverse('task-bulk-complete'), {'ids': [task.id]}, format='json')
+
+        self.assertEqual(response.status_code, 200)
+        # Same state as completing the task on its own
+        self.assertEqual(list(task.reminders.all()), [sent])
+        self.assertTrue(other.reminders.filter(sent=False).exists())
+
+    def test_bulk_create_subtasks(self):
+        task = Task.objects.create(user=self.user, title='Parent', due_date=timezone.now())
+        foreign = Task.objects.create(user=self.other, title='Not mine', due_date=timezone.now())
+
+        response = self.api.post(
+            reverse('subtask-bulk'),
+            [{'task': task.id, 'title': 'Step 1'}, {'task': foreign.id, 'title': 'Step 2'}],
+            format='json'
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()[1], {'task': ['Task not found.']})
+        self.assertFalse(SubTask.objects.exists())
+
+        response = self.api.post(
+            reverse('subtask-bulk'),
+            [{'task': task.id, 'title': f'Step {i}', 'minutes': 15} for i in range(5)],
+            format='json'
+        )
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(task.subtasks.count(), 5)
+
+    def test_bulk_complete_subtasks(self):
+        task = Task.objects.create(user=self.user, title='Parent', due_date=timezone.now())
+        subtasks = SubTask.objects.bulk_create(SubTask(task=task, title=f'Step {i}') for i in range(4))
+        ids = [subtask.id for subtask in subtasks]
+
+        response = self.api.put(reverse('subtask-bulk-complete'), {'ids': ids}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(task.subtasks.filter(is_completed=True).count(), 4)
+
+        response = self.api.put(
+            reverse('subtask-bulk-complete'), {'ids': ids[:2], 'is_completed': False}, format='json'
+        )
+        self.assertEqual(task.subtasks.filter(is_completed=True).count(), 2)
+
+        response = self.api.put(
+            reverse('subtask-bulk-complete'), {'ids': ids, 'is_completed': 'false'}, format='json'
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(task.subtasks.filter(is_completed=True).exists())
+
+        response = self.api.put(
+            reverse('subtask-bulk-complete'), {'ids': ids, 'is_completed': 'maybe'}, format='json'
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('is_completed', response.json())
+
+    def test_bulk_size_limit(self):
+        with self.settings(API_MAX_BULK_SIZE=2):
+            response = self.api.post(reverse('task-bulk-complete'), {'ids': [1, 2, 3]}, format='json')
+        self.assertEqual(response.status_code, 400)
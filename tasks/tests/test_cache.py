@@ -0,0 +1,110 @@
+from datetime import timedelta
+from django.core.cache import cache
+from django.test import TestCase
+from django.contrib.auth.models import User
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+from ..models import Task, SubTask, Reminder, Category
+
+class TaskResponseCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            username='cacheuser',
+            email='cache@example.com',
+            password='testpass123'
+        )
+        self.other = User.objects.create_user(
+            username='othercache',
+            email='othercache@example.com',
+            password='testpass123'
+        )
+        self.api = APIClient()
+        self.api.force_authenticate(self.user)
+        self.task = Task.objects.create(
+            user=self.user,
+            title='Cached Task',
+            due_date=timezone.now() + timedelta(days=1)
+        )
+
+    def write(self, func):
+        """Run a write and its on_commit invalidation, as a real request would"""
+        with self.captureOnCommitCallbacks(execute=True):
+            return func()
+
+    def test_repeat_list_is_served_from_cache(self):
+        first = self.api.get(reverse('task-list'))
+        with self.assertNumQueries(0):
+            second = self.api.get(reverse('task-list'))
+        self.assertEqual(first.json(), second.json())
+        self.assertEqual(first['ETag'], second['ETag'])
+
+    def test_query_parameters_are_cached_separately(self):
+        self.api.get(reverse('task-list'))
+        with self.assertNumQueries(1):
+            self.api.get(reverse('task-list'), {'ordering': '-due_date'})
+
+    def test_matching_etag_returns_not_modified(self):
+        etag = self.api.get(reverse('task-detail', args=[self.task.pk]))['ETag']
+        with self.assertNumQueries(0):
+            response = self.api.get(reverse('task-detail', args=[self.task.pk]), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], etag)
+
+    def test_task_change_invalidates(self):
+        etag = self.api.get(reverse('task-list'))['ETag']
+        self.task.title = 'Renamed'
+        self.write(self.task.save)
+
+        response = self.api.get(reverse('task-list'), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['results'][0]['title'], 'Renamed')
+
+    def test_subtask_and_reminder_changes_invalidate(self):
+        for create in (
+            lambda: SubTask.objects.create(task=self.task, title='Step'),
+            lambda: Reminder.objects.create(task=self.task, remind_at=timezone.now()),
+        ):
+            etag = self.api.get(reverse('task-list'))['ETag']
+            self.write(create)
+            self.assertNotEqual(self.api.get(reverse('task-list'))['ETag'], etag)
+
+    def test_category_changes_invalidate(self):
+        category = Category.objects.create(name='Work')
+        self.task.category = category
+        self.write(self.task.save)
+        url = reverse('task-list') + '?expand=category'
+
+        etag = self.api.get(url)['ETag']
+        category.name = 'Renamed'
+        self.write(category.save)
+        response = self.api.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['results'][0]['category']['name'], 'Renamed')
+
+        self.write(category.delete)
+        self.assertIsNone(self.api.get(url).json()['results'][0]['category'])
+
+    def test_other_users_changes_keep_cache(self):
+        etag = self.api.get(reverse('task-list'))['ETag']
+        self.write(lambda: Task.objects.create(
+            user=self.other, title='Not mine', due_date=timezone.now()
+        ))
+        response = self.api.get(reverse('task-list'), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+    def test_bulk_endpoints_invalidate(self):
+        etag = self.api.get(reverse('task-list'))['ETag']
+        self.write(lambda: self.api.post(
+            reverse('task-bulk-complete'), {'ids': [self.task.pk]}, format='json'
+        ))
+        response = self.api.get(reverse('task-list'), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.json()['results'][0]['is_completed'])
+
+    def test_missing_task_is_not_cached(self):
+        foreign = Task.objects.create(user=self.other, title='Not mine', due_date=timezone.now())
+        response = self.api.get(reverse('task-detail', args=[foreign.pk]))
+        self.assertEqual(response.status_code, 404)
+        self.assertNotIn('ETag', response)
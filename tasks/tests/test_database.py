@@ -0,0 +1,42 @@
+import os
+import tempfile
+from django.core.exceptions import ImproperlyConfigured
+from django.db import connection
+from django.db.backends.sqlite3.base import DatabaseWrapper
+from django.test import SimpleTestCase, override_settings
+from ..db import sqlite_pragmas
+
+class SQLiteTuningTests(SimpleTestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, 'tuning.sqlite3')
+
+    def open(self):
+        """A new connection to a database file, set up like the default one"""
+        wrapper = DatabaseWrapper({**connection.settings_dict, 'NAME': self.path}, alias='tuning')
+        wrapper.ensure_connection()
+        self.addCleanup(wrapper.close)
+        return wrapper.connection
+
+    def pragma(self, raw_connection, name):
+        return raw_connection.execute(f'PRAGMA {name}').fetchone()[0]
+
+    def test_new_connections_are_tuned(self):
+        raw_connection = self.open()
+        self.assertEqual(self.pragma(raw_connection, 'journal_mode'), 'wal')
+        self.assertEqual(self.pragma(raw_connection, 'synchronous'), 1)  # NORMAL
+        self.assertEqual(self.pragma(raw_connection, 'busy_timeout'), 5000)
+        self.assertEqual(self.pragma(raw_connection, 'mmap_size'), 256 * 1024 * 1024)
+
+    @override_settings(SQLITE_JOURNAL_MODE='delete', SQLITE_SYNCHRONOUS='full', SQLITE_BUSY_TIMEOUT=100)
+    def test_pragmas_follow_settings(self):
+        raw_connection = self.open()
+        self.assertEqual(self.pragma(raw_connection, 'journal_mode'), 'delete')
+        self.assertEqual(self.pragma(raw_connection, 'synchronous'), 2)  # FULL
+        self.assertEqual(self.pragma(raw_connection, 'busy_timeout'), 100)
+
+    @override_settings(SQLITE_JOURNAL_MODE='WAL; DROP TABLE tasks_task')
+    def test_rejects_unknown_modes(self):
+        with self.assertRaises(ImproperlyConfigured):
+            sqlite_pragmas()
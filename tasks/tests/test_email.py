@@ -1,10 +1,13 @@
 import os
-from django.test import TestCase
+from io import StringIO
+from django.test import TestCase, override_settings
 from django.core import mail
+from django.core.mail.backends import locmem
+from django.core.management import call_command
 from django.contrib.auth.models import User
 from django.utils import timezone
 from datetime import timedelta
-from ..models import Task, Reminder, Category
+from ..models import Task, Reminder, ReminderPreference, Category, retry_delay
 from ..utils import send_task_reminder, check_and_send_reminders
 
 class EmailReminderTests(TestCase):
@@ -40,9 +43,14 @@ class EmailReminderTests(TestCase):
 
     def test_send_single_reminder(self):
         """Test sending a single reminder"""
+        updated_at = self.reminder.updated_at
         success = send_task_reminder(self.reminder)
         self.assertTrue(success)
         self.assertEqual(len(mail.outbox), 1)
+        # Recorded like a batch, so sync clients see the change
+        self.reminder.refresh_from_db()
+        self.assertTrue(self.reminder.sent)
+        self.assertGreater(self.reminder.updated_at, updated_at)
         
         # Check email content
         email = mail.outbox[0]
@@ -96,6 +104,263 @@ class EmailReminderTests(TestCase):
         self.assertTrue(any(r.remind_at == new_task.due_date - timedelta(minutes=30) for r in reminders))
         self.assertTrue(any(r.remind_at == new_task.due_date - timedelta(hours=2) for r in reminders))
 
+class BouncingEmailBackend(locmem.EmailBackend):
+    """Locmem backend that rejects mail to bounce@example.com"""
+    def send_messages(self, messages):
+        for message in messages:
+            if 'bounce@example.com' in message.to:
+                raise ConnectionError('Recipient rejected')
+        return super().send_messages(messages)
+
+class ReminderDispatchTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='batchuser',
+            email='batch@example.com',
+            password='testpass123'
+        )
+        self.task = Task.objects.create(
+            user=self.user,
+            title='Batch Task',
+            due_date=timezone.now() + timedelta(hours=1)
+        )
+        Reminder.objects.all().delete()
+        past = timezone.now() - timedelta(minutes=5)
+        Reminder.objects.bulk_create(
+            Reminder(task=self.task, remind_at=past) for _ in range(25)
+        )
+
+    def test_reminders_sent_in_batches(self):
+        """Test that due reminders are sent in chunks and bulk marked as sent"""
+        stats = check_and_send_reminders(batch_size=10)
+
+        self.assertEqual(stats['sent'], 25)
+        self.assertEqual(stats['failed'], 0)
+        self.assertEqual(stats['batches'], 3)
+        self.assertEqual(len(mail.outbox), 25)
+        self.assertFalse(Reminder.objects.filter(sent=False).exists())
+
+    def test_batch_query_count(self):
+        """Test that a batch costs one SELECT and one UPDATE, not one per reminder"""
+        # Per batch: candidate SELECT, claim UPDATE, claimed rows SELECT, sent UPDATE
+        # plus the empty candidate SELECT that ends the loop and the digest user SELECT
+        with self.assertNumQueries(14):
+            check_and_send_reminders(batch_size=10)
+
+    @override_settings(EMAIL_BACKEND='tasks.tests.test_email.BouncingEmailBackend')
+    def test_failed_reminders_stay_unsent(self):
+        """Test that failures are counted and only delivered reminders are marked"""
+        bouncer = User.objects.create_user(
+            username='bouncer',
+            email='bounce@example.com',
+            password='testpass123'
+        )
+        bounce_task = Task.objects.create(
+            user=bouncer,
+            title='Bounce Task',
+            due_date=timezone.now() + timedelta(hours=1)
+        )
+        Reminder.objects.filter(task=bounce_task).delete()
+        Reminder.objects.bulk_create(
+            Reminder(task=bounce_task, remind_at=timezone.now() - timedelta(minutes=5))
+            for _ in range(3)
+        )
+
+        stats = check_and_send_reminders(batch_size=10)
+
+        self.assertEqual(stats['sent'], 25)
+        self.assertEqual(stats['failed'], 3)
+        self.assertEqual(Reminder.objects.filter(sent=False, task=bounce_task).count(), 3)
+        self.assertFalse(Reminder.objects.filter(sent=False, task=self.task).exists())
+
+    def create_bouncing_reminders(self, count=3):
+        bouncer = User.objects.create_user(username='bouncer', email='bounce@example.com')
+        bounce_task = Task.objects.create(
+            user=bouncer, title='Bounce Task', due_date=timezone.now() + timedelta(hours=1)
+        )
+        Reminder.objects.filter(task=bounce_task).delete()
+        return Reminder.objects.bulk_create(
+            Reminder(task=bounce_task, remind_at=timezone.now() - timedelta(minutes=5))
+            for _ in range(count)
+        )
+
+    def make_retries_due(self):
+        Reminder.objects.filter(next_attempt_at__isnull=False).update(
+            next_attempt_at=timezone.now() - timedelta(seconds=1)
+        )
+
+    @override_settings(
+        EMAIL_BACKEND='tasks.tests.test_email.BouncingEmailBackend',
+        REMINDER_RETRY_DELAY=60, REMINDER_MAX_ATTEMPTS=3
+    )
+    def test_failed_reminders_back_off(self):
+        """Test that failed reminders wait for their next attempt instead of being retried every run"""
+        bouncing = self.create_bouncing_reminders()
+        started = timezone.now()
+        check_and_send_reminders(batch_size=10)
+
+        for reminder in Reminder.objects.filter(id__in=[r.id for r in bouncing]):
+            self.assertEqual(reminder.attempts, 1)
+            self.assertEqual(reminder.last_error, 'Recipient rejected')
+            self.assertIsNone(reminder.claimed_by)
+            self.assertGreaterEqual(reminder.next_attempt_at, started + timedelta(seconds=30))
+            self.assertLessEqual(reminder.next_attempt_at, timezone.now() + timedelta(seconds=60))
+
+        # Not due yet: the next run does not even read them
+        with self.assertNumQueries(2):
+            stats = check_and_send_reminders(batch_size=10)
+        self.assertEqual((stats['sent'], stats['failed']), (0, 0))
+
+        self.make_retries_due()
+        stats = check_and_send_reminders(batch_size=10)
+        self.assertEqual(stats['failed'], 3)
+        self.assertEqual(set(Reminder.objects.filter(task__user__username='bouncer').values_list('attempts', flat=True)), {2})
+
+    @override_settings(EMAIL_BACKEND='tasks.tests.test_email.BouncingEmailBackend', REMINDER_MAX_ATTEMPTS=2)
+    def test_reminders_are_dead_lettered(self):
+        """Test that a reminder is given up on after REMINDER_MAX_ATTEMPTS failures"""
+        self.create_bouncing_reminders()
+        check_and_send_reminders(batch_size=10)
+        self.make_retries_due()
+        stats = check_and_send_reminders(batch_size=10)
+        self.assertEqual(stats['dead_lettered'], 3)
+
+        dead = Reminder.objects.filter(dead_lettered=True)
+        self.assertEqual(dead.count(), 3)
+        self.assertFalse(dead.filter(next_attempt_at__isnull=False).exists())
+        self.assertFalse(dead.filter(sent=True).exists())
+        stats = check_and_send_reminders(batch_size=10)
+        self.assertEqual((stats['sent'], stats['failed']), (0, 0))
+
+    @override_settings(REMINDER_RETRY_DELAY=60, REMINDER_RETRY_MAX_DELAY=300)
+    def test_retry_delay_doubles_up_to_the_cap(self):
+        """Test the jittered exponential backoff"""
+        for attempts, delay in ((1, 60), (2, 120), (3, 240), (4, 300), (10, 300)):
+            for _ in range(20):
+                self.assertTrue(delay / 2 <= retry_delay(attempts) <= delay, attempts)
+
+    def test_reminders_sent_with_workers(self):
+        """Test that a worker pool delivers every reminder exactly once"""
+        stats = check_and_send_reminders(batch_size=4, workers=3)
+
+        self.assertEqual(stats['sent'], 25)
+        self.assertEqual(stats['failed'], 0)
+        self.assertEqual(stats['batches'], 7)
+        self.assertEqual(len(mail.outbox), 25)
+        self.assertFalse(Reminder.objects.filter(sent=False).exists())
+
+    def test_claimed_reminders_are_skipped(self):
+        """Test that reminders claimed by an overlapping run are not sent again"""
+        claimed = list(Reminder.objects.values_list('id', flat=True)[:5])
+        Reminder.objects.filter(id__in=claimed).update(
+            claimed_by='other-run', claimed_at=timezone.now()
+        )
+
+        stats = check_and_send_reminders(batch_size=10)
+
+        self.assertEqual(stats['sent'], 20)
+        self.assertEqual(Reminder.objects.filter(sent=False).count(), 5)
+
+    def test_stale_claims_are_retaken(self):
+        """Test that claims abandoned by a crashed run expire"""
+        Reminder.objects.update(
+            claimed_by='crashed-run', claimed_at=timezone.now() - timedelta(hours=1)
+        )
+
+        stats = check_and_send_reminders(batch_size=10)
+
+        self.assertEqual(stats['sent'], 25)
+
+    def test_command_reports_throughput(self):
+        """Test that the management command reports sent and failed counts"""
+        out = StringIO()
+        call_command('send_reminders', '--batch-size', '10', stdout=out)
+        self.assertIn('Successfully sent 25 reminders in 3 batches', out.getvalue())
+        self.assertIn('reminders/s', out.getvalue())
+
+@override_settings(DEFAULT_TASK_REMINDER_TIMES=[], REMINDER_DIGEST_WINDOW=3600)
+class ReminderDigestTests(TestCase):
+    def setUp(self):
+        self.digester = User.objects.create_user(username='digester', email='digest@example.com')
+        ReminderPreference.objects.create(user=self.digester, digest=True)
+        self.single = User.objects.create_user(username='single', email='single@example.com')
+        self.category = Category.objects.create(name='Work')
+        now = timezone.now()
+        # Two reminders per task due now, one coming up within the window, one after it
+        for user in (self.digester, self.single):
+            for i in range(3):
+                task = Task.objects.create(
+                    user=user, title=f'{user.username} task {i}', due_date=now + timedelta(hours=1),
+                    priority='High' if i == 0 else 'Normal', category=self.category if i == 0 else None
+                )
+                Reminder.objects.bulk_create([
+                    Reminder(task=task, remind_at=now - timedelta(minutes=10)),
+                    Reminder(task=task, remind_at=now - timedelta(minutes=5)),
+                    Reminder(task=task, remind_at=now + timedelta(minutes=30)),
+                    Reminder(task=task, remind_at=now + timedelta(hours=2)),
+                ])
+
+    def test_one_digest_per_user(self):
+        """Test that a digest user gets one email listing each task once"""
+        stats = check_and_send_reminders(batch_size=10)
+
+        digests = [message for message in mail.outbox if message.to == ['digest@example.com']]
+        self.assertEqual(len(digests), 1)
+        self.assertEqual(digests[0].subject, 'Reminder: 3 tasks due soon')
+        for i in range(3):
+            self.assertEqual(digests[0].body.count(f'digester task {i}:'), 1)
+        self.assertIn('priority High, category Work', digests[0].body)
+        self.assertIn('priority Normal, category None', digests[0].body)
+
+        # The other user still gets one email per due reminder
+        self.assertEqual(len([message for message in mail.outbox if message.to == ['single@example.com']]), 6)
+        self.assertEqual((stats['sent'], stats['digests']), (6 + 9, 1))
+
+        # Due reminders and the ones within the window went out with the digest
+        pending = Reminder.objects.filter(task__user=self.digester, sent=False)
+        self.assertEqual(pending.count(), 3)
+        self.assertTrue(all(r.remind_at > timezone.now() + timedelta(hours=1) for r in pending))
+
+    def test_digest_is_marked_sent_in_one_update(self):
+        """Test that sending a digest costs a fixed number of queries, however many reminders it covers"""
+        Reminder.objects.filter(task__user=self.single).delete()
+        # Digest user SELECT, claim UPDATE, claimed rows SELECT, sent UPDATE,
+        # empty digest user SELECT and empty individual candidate SELECT
+        with self.assertNumQueries(6):
+            check_and_send_reminders(batch_size=10)
+        self.assertEqual(len(mail.outbox), 1)
+
+    def test_no_digest_before_a_reminder_is_due(self):
+        """Test that reminders within the window alone do not trigger a digest"""
+        Reminder.objects.filter(remind_at__lte=timezone.now()).delete()
+        stats = check_and_send_reminders(batch_size=10)
+        self.assertEqual((stats['sent'], stats['digests']), (0, 0))
+        self.assertEqual(len(mail.outbox), 0)
+
+    def test_digest_leaves_retries_until_they_are_due(self):
+        """Test that a reminder waiting for a retry is not pulled into a digest early"""
+        now = timezone.now()
+        retry = Reminder.objects.filter(task__user=self.digester, remind_at__lte=now).first()
+        Reminder.objects.filter(pk=retry.pk).update(attempts=1, next_attempt_at=now + timedelta(minutes=20))
+
+        check_and_send_reminders(batch_size=10)
+
+        retry.refresh_from_db()
+        self.assertFalse(retry.sent)
+        self.assertIsNone(retry.claimed_by)
+        self.assertEqual(Reminder.objects.filter(task__user=self.digester, sent=False).count(), 4)
+
+    @override_settings(EMAIL_BACKEND='tasks.tests.test_email.BouncingEmailBackend')
+    def test_failed_digest_retries_its_reminders(self):
+        """Test that every reminder of a bounced digest is scheduled for a retry"""
+        self.digester.email = 'bounce@example.com'
+        self.digester.save()
+        stats = check_and_send_reminders(batch_size=10)
+        self.assertEqual(stats['digests'], 0)
+        failed = Reminder.objects.filter(task__user=self.digester, attempts=1)
+        self.assertEqual(failed.count(), 9)
+        self.assertFalse(failed.filter(next_attempt_at__isnull=True).exists())
+
 if __name__ == '__main__':
     # Quick manual test
     from django.core.management import execute_from_command_line
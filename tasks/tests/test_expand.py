@@ -0,0 +1,82 @@
+from datetime import timedelta
+from django.core.cache import cache
+from django.core import mail
+from django.test import TestCase
+from django.contrib.auth.models import User
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+from ..models import Task, SubTask, Category, Reminder
+from ..utils import check_and_send_reminders
+
+class TaskExpandTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            username='expanduser',
+            email='expand@example.com',
+            password='testpass123'
+        )
+        self.api = APIClient()
+        self.api.force_authenticate(self.user)
+        self.category = Category.objects.create(name='Work')
+        self.task = Task.objects.create(
+            user=self.user,
+            title='Board task',
+            category=self.category,
+            due_date=timezone.now() + timedelta(days=5)
+        )
+        SubTask.objects.create(task=self.task, title='First step')
+        SubTask.objects.create(task=self.task, title='Second step')
+
+    def test_list_embeds_related_objects(self):
+        """Test that expanded tasks carry the same data as the separate endpoints"""
+        response = self.api.get(reverse('task-list'), {'expand': 'subtasks,reminders,category'})
+        self.assertEqual(response.status_code, 200)
+        task = response.json()['results'][0]
+
+        subtasks = self.api.get(reverse('task-subtasks', args=[self.task.id])).json()
+        reminders = self.api.get(reverse('reminder-list')).json()['results']
+        self.assertEqual(task['subtasks'], subtasks)
+        self.assertEqual(task['reminders'], reminders)
+        self.assertEqual(len(task['reminders']), 4)
+        self.assertEqual(task['category']['name'], 'Work')
+
+    def test_detail_and_partial_expand(self):
+        """Test that only the requested relations are embedded"""
+        response = self.api.get(reverse('task-detail', args=[self.task.id]), {'expand': 'subtasks'})
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual([subtask['title'] for subtask in data['subtasks']], ['First step', 'Second step'])
+        self.assertNotIn('reminders', data)
+        self.assertEqual(data['category'], self.category.id)
+
+        data = self.api.get(reverse('task-detail', args=[self.task.id])).json()
+        self.assertNotIn('subtasks', data)
+
+    def test_unknown_field(self):
+        response = self.api.get(reverse('task-list'), {'expand': 'subtasks,owner'})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('expand', response.json())
+
+    def test_writes_ignore_expand(self):
+        """Test that ?expand= does not make category read-only on writes"""
+        other = Category.objects.create(name='Home')
+        response = self.api.patch(
+            reverse('task-detail', args=[self.task.id]) + '?expand=category',
+            {'category': other.id}, format='json'
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['category'], other.id)
+
+    def test_sent_reminders_invalidate_cached_tasks(self):
+        """Test that dispatching reminders refreshes cached expanded tasks"""
+        url = reverse('task-list')
+        self.api.get(url, {'expand': 'reminders'})
+        Reminder.objects.filter(task=self.task).update(remind_at=timezone.now() - timedelta(minutes=1))
+        with self.captureOnCommitCallbacks(execute=True):
+            check_and_send_reminders()
+        self.assertEqual(len(mail.outbox), 4)
+
+        reminders = self.api.get(url, {'expand': 'reminders'}).json()['results'][0]['reminders']
+        self.assertTrue(all(reminder['sent'] for reminder in reminders))
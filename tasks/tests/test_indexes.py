@@ -0,0 +1,72 @@
+"""
+Checks that the hot query paths are served by indexes.
+Run using: python manage.py test tasks.tests.test_indexes
+"""
+import unittest
+from datetime import timedelta
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.db import connection
+from django.contrib.auth.models import User
+from django.utils import timezone
+from ..models import Task, SubTask, Reminder
+from ..utils import claim_reminder_batch
+from ..pagination import KeysetCursorPagination
+
+@unittest.skipUnless(connection.vendor == 'sqlite', 'EXPLAIN QUERY PLAN output is SQLite specific')
+class QueryPlanTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='planuser',
+            email='plan@example.com',
+            password='testpass123'
+        )
+        self.task = Task.objects.create(
+            user=self.user,
+            title='Plan Task',
+            due_date=timezone.now() + timedelta(days=1)
+        )
+
+    def explain(self, sql):
+        with connection.cursor() as cursor:
+            cursor.execute(f'EXPLAIN QUERY PLAN {sql}')
+            return '\n'.join(str(row[-1]) for row in cursor.fetchall())
+
+    def assertIndexBacked(self, plan, index_name=None):
+        for line in plan.splitlines():
+            if 'tasks_' in line:
+                self.assertIn('SEARCH', line, plan)
+        self.assertNotIn('TEMP B-TREE', plan)
+        if index_name:
+            self.assertIn(index_name, plan)
+
+    def test_task_list_ordered_by_due_date(self):
+        plan = Task.objects.filter(user=self.user).order_by('due_date').explain()
+        self.assertIndexBacked(plan, 'task_user_due_idx')
+
+    def test_task_list_cursor_page(self):
+        now = timezone.now()
+        for ordering, values in (
+            (['due_date', 'id'], [now, 10]),
+            (['-created_at', '-id'], [now, 10]),
+            (['priority', 'id'], ['Normal', 10]),
+        ):
+            with self.subTest(ordering=ordering):
+                seek = KeysetCursorPagination().seek_filter(ordering, values)
+                plan = Task.objects.filter(user=self.user).filter(seek).order_by(*ordering).explain()
+                self.assertIndexBacked(plan)
+
+    def test_task_list_filtered_by_completion(self):
+        plan = Task.objects.filter(user=self.user, is_completed=False).explain()
+        self.assertIndexBacked(plan)
+
+    def test_subtasks_for_task(self):
+        plan = SubTask.objects.filter(task=self.task).explain()
+        self.assertIndexBacked(plan, 'subtask_task_created_idx')
+
+    def test_due_reminder_claim(self):
+        Reminder.objects.create(task=self.task, remind_at=timezone.now() - timedelta(minutes=1))
+        with CaptureQueriesContext(connection) as queries:
+            claim_reminder_batch(100)
+        candidate_sql = queries.captured_queries[0]['sql']
+        self.assertIndexBacked(self.explain(candidate_sql), 'reminder_pending_due_idx')
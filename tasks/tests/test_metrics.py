@@ -0,0 +1,111 @@
+from datetime import timedelta
+from asgiref.sync import sync_to_async
+from django.core import mail
+from django.core.mail import get_connection
+from django.contrib.auth.models import User
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+from ..authentication import issue_token
+from ..metrics import MetricsRegistry, registry
+from ..models import Task, Reminder
+from ..utils import send_reminder_batch
+
+def samples(text):
+    """{series: value} for the sample lines of a Prometheus text page"""
+    result = {}
+    for line in text.splitlines():
+        if line and not line.startswith('#'):
+            series, value = line.rsplit(' ', 1)
+            result[series] = float(value)
+    return result
+
+@override_settings(TASK_CACHE_TTL=0)
+class MetricsTests(TestCase):
+    def setUp(self):
+        registry.clear()
+        self.user = User.objects.create_user(username='metricsuser', password='testpass123')
+        self.admin = User.objects.create_user(username='metricsadmin', password='testpass123', is_staff=True)
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.task = Task.objects.create(
+            user=self.user, title='Measured', due_date=timezone.now() + timedelta(days=1)
+        )
+
+    def metrics(self):
+        self.client.force_authenticate(self.admin)
+        response = self.client.get(reverse('metrics'))
+        self.client.force_authenticate(self.user)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response['Content-Type'].startswith('text/plain; version=0.0.4'))
+        return samples(response.content.decode())
+
+    def test_requests_are_recorded_per_view(self):
+        for _ in range(2):
+            self.assertEqual(self.client.get(reverse('task-list')).status_code, 200)
+        self.client.get(reverse('task-detail', args=[self.task.id]))
+
+        metrics = self.metrics()
+        labels = 'view="task-list",method="GET"'
+        self.assertEqual(metrics[f'taskninja_request_duration_seconds_count{{{labels}}}'], 2)
+        self.assertEqual(metrics[f'taskninja_responses_total{{{labels},status="200"}}'], 2)
+        self.assertEqual(metrics[f'taskninja_request_duration_seconds_bucket{{{labels},le="+Inf"}}'], 2)
+        self.assertEqual(metrics[f'taskninja_request_db_queries_sum{{{labels}}}'], 2)
+        self.assertGreater(metrics[f'taskninja_request_db_seconds_sum{{{labels}}}'], 0)
+        self.assertGreater(metrics[f'taskninja_request_serializer_seconds_sum{{{labels}}}'], 0)
+        self.assertEqual(metrics['taskninja_request_duration_seconds_count{view="task-detail",method="GET"}'], 1)
+
+    def test_unknown_methods_share_one_label(self):
+        for method in ('FOO', 'BAR'):
+            self.client.generic(method, reverse('task-list'))
+
+        metrics = self.metrics()
+        self.assertEqual(metrics['taskninja_request_duration_seconds_count{view="task-list",method="other"}'], 2)
+        self.assertFalse(any('method="FOO"' in series for series in metrics))
+
+    def test_metrics_are_staff_only(self):
+        self.assertEqual(self.client.get(reverse('metrics')).status_code, 403)
+
+    def test_server_timing_header(self):
+        response = self.client.get(reverse('task-list'))
+        self.assertNotIn('Server-Timing', response)
+
+        with override_settings(SERVER_TIMING=True):
+            response = self.client.get(reverse('task-list'))
+        entries = [entry.split(';')[0] for entry in response['Server-Timing'].split(', ')]
+        self.assertEqual(entries, ['total', 'db', 'serializer'])
+
+    @override_settings(ROOT_URLCONF='taskninja.asgi_urls')
+    async def test_async_views_count_their_queries(self):
+        token, _ = await sync_to_async(issue_token)(self.user)
+        response = await self.async_client.get('/api/tasks/', headers={'Authorization': f'Token {token}'})
+        self.assertEqual(response.status_code, 200)
+
+        metrics = await sync_to_async(self.metrics)()
+        labels = 'view="async-task-list",method="GET"'
+        self.assertEqual(metrics[f'taskninja_request_duration_seconds_count{{{labels}}}'], 1)
+        self.assertGreaterEqual(metrics[f'taskninja_request_db_queries_sum{{{labels}}}'], 1)
+
+    def test_smtp_calls_are_timed(self):
+        reminder = Reminder.objects.create(task=self.task, remind_at=timezone.now())
+        reminder = Reminder.objects.select_related('task__user', 'task__category').get(pk=reminder.pk)
+        connection = get_connection()
+        self.assertEqual(send_reminder_batch([reminder], connection), [reminder.id])
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(self.metrics()['taskninja_outbound_call_seconds_count{service="smtp"}'], 1)
+
+class MetricsRegistryTests(TestCase):
+    def test_histogram_buckets_are_cumulative(self):
+        metrics = MetricsRegistry()
+        for value in (0.003, 0.005, 0.2, 30):
+            metrics.observe('latency_seconds', (('view', 'a "quoted"\nname'),), value, 'Latency')
+        lines = metrics.render().splitlines()
+        self.assertEqual(lines[:2], ['# HELP latency_seconds Latency', '# TYPE latency_seconds histogram'])
+        result = samples(metrics.render())
+        labels = 'view="a \\"quoted\\"\\nname"'
+        self.assertEqual(result[f'latency_seconds_bucket{{{labels},le="0.005"}}'], 2)
+        self.assertEqual(result[f'latency_seconds_bucket{{{labels},le="0.25"}}'], 3)
+        self.assertEqual(result[f'latency_seconds_bucket{{{labels},le="10"}}'], 3)
+        self.assertEqual(result[f'latency_seconds_bucket{{{labels},le="+Inf"}}'], 4)
+        self.assertEqual(result[f'latency_seconds_count{{{labels}}}'], 4)
@@ -0,0 +1,105 @@
+import base64
+import json
+from datetime import timedelta
+from urllib.parse import parse_qs, urlparse
+from django.test import TestCase, override_settings
+from django.contrib.auth.models import User
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+from ..models import Task, SubTask, Reminder
+
+# Measure the uncached path; the response cache is covered in test_cache
+@override_settings(TASK_CACHE_TTL=0)
+class CursorPaginationTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='pageuser',
+            email='page@example.com',
+            password='testpass123'
+        )
+        self.api = APIClient()
+        self.api.force_authenticate(self.user)
+
+        base = timezone.now() + timedelta(days=1)
+        priorities = ['High', 'Normal', 'Low']
+        # Only 5 distinct due dates, so most pages end inside a run of ties
+        self.tasks = Task.objects.bulk_create(
+            Task(
+                user=self.user,
+                title=f'Task {i}',
+                due_date=base + timedelta(hours=i % 5),
+                priority=priorities[i % 3],
+            )
+            for i in range(23)
+        )
+
+    def walk(self, url, params=None):
+        """Follow `next` links and return the pages"""
+        pages = []
+        response = self.api.get(url, params)
+        while True:
+            self.assertEqual(response.status_code, 200)
+            pages.append(response.json())
+            if not pages[-1]['next']:
+                return pages
+            response = self.api.get(pages[-1]['next'])
+
+    def test_pages_cover_every_task_once_in_order(self):
+        for ordering in ('due_date', '-due_date', 'priority', '-created_at'):
+            with self.subTest(ordering=ordering):
+                pages = self.walk(reverse('task-list'), {'ordering': ordering, 'page_size': 4})
+                ids = [task['id'] for page in pages for task in page['results']]
+
+                expected = Task.objects.order_by(ordering, f"{'-' if ordering.startswith('-') else ''}id")
+                self.assertEqual(ids, list(expected.values_list('id', flat=True)))
+                self.assertEqual(len(pages), 6)
+                self.assertIsNone(pages[0]['previous'])
+
+    def test_previous_link_returns_to_the_prior_page(self):
+        first = self.api.get(reverse('task-list'), {'page_size': 5}).json()
+        second = self.api.get(first['next']).json()
+        back = self.api.get(second['previous']).json()
+
+        self.assertEqual(back['results'], first['results'])
+        self.assertEqual(self.api.get(back['next']).json()['results'], second['results'])
+
+    @override_settings(API_MAX_PAGE_SIZE=10)
+    def test_page_size_is_capped(self):
+        response = self.api.get(reverse('task-list'), {'page_size': 1000})
+        self.assertEqual(len(response.json()['results']), 10)
+
+    def test_deep_page_costs_one_query(self):
+        pages = self.walk(reverse('task-list'), {'page_size': 4})
+        with self.assertNumQueries(1):
+            self.api.get(pages[-2]['next'])
+
+    def test_invalid_cursor(self):
+        response = self.api.get(reverse('task-list'), {'cursor': 'garbage'})
+        self.assertEqual(response.status_code, 404)
+
+    def test_tampered_cursor_values_are_rejected(self):
+        page = self.api.get(reverse('task-list'), {'page_size': 4}).json()
+        cursor = json.loads(base64.urlsafe_b64decode(parse_qs(urlparse(page['next']).query)['cursor'][0]))
+        for values in (['garbage', 1], [None, 1], [cursor['v'][0], 'x'], [[1], 1], {'due_date': 1}):
+            tampered = base64.urlsafe_b64encode(json.dumps({**cursor, 'v': values}).encode()).decode()
+            response = self.api.get(reverse('task-list'), {'page_size': 4, 'cursor': tampered})
+            self.assertEqual(response.status_code, 404, values)
+
+    def test_cursor_from_other_ordering_is_rejected(self):
+        page = self.api.get(reverse('task-list'), {'page_size': 4}).json()
+        response = self.api.get(page['next'] + '&ordering=priority')
+        self.assertEqual(response.status_code, 404)
+
+    def test_subtask_and_reminder_lists_are_paginated(self):
+        task = self.tasks[0]
+        SubTask.objects.bulk_create(SubTask(task=task, title=f'Step {i}') for i in range(7))
+        Reminder.objects.bulk_create(
+            Reminder(task=task, remind_at=task.due_date - timedelta(minutes=i)) for i in range(7)
+        )
+        for name in ('subtask-list', 'reminder-list'):
+            with self.subTest(endpoint=name):
+                pages = self.walk(reverse(name), {'page_size': 3})
+                ids = [row['id'] for page in pages for row in page['results']]
+                self.assertEqual(len(ids), 7)
+                self.assertEqual(len(set(ids)), 7)
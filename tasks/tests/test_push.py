@@ -0,0 +1,130 @@
+import asyncio
+import json
+from datetime import timedelta
+from unittest import mock
+from asgiref.sync import sync_to_async
+from django.test import TestCase
+from django.contrib.auth.models import User
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+from taskninja.asgi import application
+from ..authentication import TokenAuthentication, issue_token, token_cache
+from ..models import Task, SubTask
+from ..push import RESYNC, CLOSE_UNAUTHORIZED, InMemoryChannelLayer
+
+class WebSocket:
+    """Drives one WebSocket connection through the ASGI application"""
+    def __init__(self, path='/ws/tasks/', query=''):
+        self.inbox = asyncio.Queue()
+        self.outbox = asyncio.Queue()
+        scope = {'type': 'websocket', 'path': path, 'query_string': query.encode(), 'headers': []}
+        self.task = asyncio.ensure_future(application(scope, self.inbox.get, self.outbox.put))
+
+    async def connect(self):
+        await self.inbox.put({'type': 'websocket.connect'})
+        return await self.receive()
+
+    async def receive(self):
+        return await asyncio.wait_for(self.outbox.get(), timeout=2)
+
+    async def receive_event(self):
+        message = await self.receive()
+        return json.loads(message['text'])
+
+    async def disconnect(self):
+        await self.inbox.put({'type': 'websocket.disconnect', 'code': 1000})
+        await asyncio.wait_for(self.task, timeout=2)
+
+class PushTests(TestCase):
+    def setUp(self):
+        token_cache.clear()
+        self.user = User.objects.create_user(
+            username='pushuser',
+            email='push@example.com',
+            password='testpass123'
+        )
+        self.other = User.objects.create_user(username='otherpush', password='testpass123')
+        self.api = APIClient()
+        self.api.force_authenticate(self.user)
+        self.task = Task.objects.create(
+            user=self.user, title='Pushed', due_date=timezone.now() + timedelta(days=2)
+        )
+        self.subtask = SubTask.objects.create(task=self.task, title='Step')
+
+    def write(self, func):
+        """Run a write and its on_commit callbacks, as a committed request would"""
+        with self.captureOnCommitCallbacks(execute=True):
+            return func()
+
+    async def connect(self, user):
+        token, _ = issue_token(user)
+        socket = WebSocket(query=f'token={token}')
+        self.assertEqual(await socket.connect(), {'type': 'websocket.accept'})
+        return socket
+
+    async def test_rejects_bad_tokens_and_paths(self):
+        socket = WebSocket(query='token=bogus')
+        message = await socket.connect()
+        self.assertEqual(message, {'type': 'websocket.close', 'code': CLOSE_UNAUTHORIZED})
+
+        socket = WebSocket(path='/ws/other/')
+        self.assertEqual((await socket.connect())['type'], 'websocket.close')
+
+    async def test_saves_and_deletes_reach_the_owner_only(self):
+        socket = await self.connect(self.user)
+        other_socket = await self.connect(self.other)
+
+        await sync_to_async(self.write)(lambda: self.api.patch(
+            reverse('task-detail', args=[self.task.id]), {'title': 'Renamed'}, format='json'
+        ))
+        event = await socket.receive_event()
+        self.assertEqual(event['type'], 'task.updated')
+        self.assertEqual(event['id'], self.task.id)
+        self.assertEqual(event['data']['title'], 'Renamed')
+
+        # Deleting the task does not send one event per subtask and reminder
+        await sync_to_async(self.write)(lambda: self.api.delete(reverse('task-detail', args=[self.task.id])))
+        self.assertEqual(await socket.receive_event(), {'type': 'task.deleted', 'id': self.task.id})
+        self.assertTrue(socket.outbox.empty())
+        self.assertTrue(other_socket.outbox.empty())
+
+        await socket.disconnect()
+        await other_socket.disconnect()
+
+    async def test_subtask_toggle_and_bulk_changes(self):
+        socket = await self.connect(self.user)
+
+        await sync_to_async(self.write)(lambda: self.api.put(reverse('subtask-complete', args=[self.subtask.id])))
+        event = await socket.receive_event()
+        self.assertEqual((event['type'], event['task']), ('subtask.updated', self.task.id))
+        self.assertTrue(event['data']['is_completed'])
+
+        await sync_to_async(self.write)(lambda: self.api.post(
+            reverse('task-bulk-complete'), {'ids': [self.task.id]}, format='json'
+        ))
+        self.assertEqual(await socket.receive_event(), {'type': 'changed'})
+        await socket.disconnect()
+
+    async def test_reconnects_share_token_verification(self):
+        token, _ = issue_token(self.user)
+        with mock.patch.object(
+            TokenAuthentication, 'verify_token', autospec=True, side_effect=TokenAuthentication.verify_token
+        ) as verify_token:
+            sockets = [WebSocket(query=f'token={token}') for _ in range(5)]
+            messages = await asyncio.gather(*(socket.connect() for socket in sockets))
+        self.assertEqual([message['type'] for message in messages], ['websocket.accept'] * 5)
+        self.assertEqual(verify_token.call_count, 1)
+        for socket in sockets:
+            await socket.disconnect()
+
+    async def test_slow_client_is_told_to_resync(self):
+        layer = InMemoryChannelLayer()
+        subscription = layer.subscribe('user.1', max_size=2)
+        for i in range(3):
+            layer.publish('user.1', f'event {i}')
+        self.assertEqual(await subscription.get(), RESYNC)
+        self.assertTrue(subscription.queue.empty())
+
+        layer.unsubscribe(subscription)
+        self.assertFalse(layer.has_subscribers('user.1'))
@@ -0,0 +1,95 @@
+"""
+Query-count regression tests for list endpoints and admin changelists.
+Run using: python manage.py test tasks.tests.test_queries
+
+Every list must cost the same number of queries for 1 row and for 500
+rows, so a new N+1 pattern fails here.
+"""
+from datetime import timedelta
+from django.test import TestCase, override_settings
+from django.db import connection
+from django.contrib.auth.models import User
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+from ..models import Task, SubTask, Category, Reminder
+from ..search import has_fts_index
+
+# Measure the uncached path; the response cache is covered in test_cache
+@override_settings(TASK_CACHE_TTL=0)
+class QueryCountTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_superuser(
+            username='queryuser',
+            email='query@example.com',
+            password='testpass123'
+        )
+        self.api = APIClient()
+        self.api.force_authenticate(self.user)
+        # The full-text index lookup runs once per process, keep it out of the counts
+        has_fts_index(connection)
+
+    def create_rows(self, count):
+        """Create `count` tasks, each with a category, a subtask and a reminder"""
+        due = timezone.now() + timedelta(days=1)
+        categories = Category.objects.bulk_create(
+            Category(name=f'Category {i}') for i in range(count)
+        )
+        tasks = Task.objects.bulk_create(
+            Task(user=self.user, title=f'Task {i}', due_date=due, category=categories[i])
+            for i in range(count)
+        )
+        SubTask.objects.bulk_create(SubTask(task=task, title=f'Step for {task.title}') for task in tasks)
+        Reminder.objects.bulk_create(Reminder(task=task, remind_at=due - timedelta(hours=1)) for task in tasks)
+        return tasks
+
+    def assertQueriesFor(self, num, fetch):
+        """Assert that fetch() costs `num` queries with 1 row and with 500 rows"""
+        for count in (1, 500):
+            with self.subTest(rows=count):
+                Category.objects.all().delete()
+                Task.objects.all().delete()
+                self.create_rows(count)
+                with self.assertNumQueries(num):
+                    response = fetch()
+                self.assertEqual(response.status_code, 200)
+
+    def test_task_list(self):
+        self.assertQueriesFor(1, lambda: self.api.get(reverse('task-list')))
+
+    def test_task_list_search_and_ordering(self):
+        self.assertQueriesFor(1, lambda: self.api.get(
+            reverse('task-list'), {'search': 'Task', 'ordering': '-due_date'}
+        ))
+
+    def test_task_list_expanded(self):
+        # Tasks joined with their category, then one query per prefetched relation
+        self.assertQueriesFor(3, lambda: self.api.get(
+            reverse('task-list'), {'expand': 'subtasks,reminders,category'}
+        ))
+
+    def test_task_subtasks(self):
+        def fetch():
+            task = Task.objects.first()
+            return self.api.get(reverse('task-subtasks', args=[task.pk]))
+        # Task lookup in the test, get_object, subtask list
+        self.assertQueriesFor(3, fetch)
+
+    def test_subtask_list(self):
+        self.assertQueriesFor(1, lambda: self.api.get(reverse('subtask-list')))
+
+    def test_reminder_list(self):
+        self.assertQueriesFor(1, lambda: self.api.get(reverse('reminder-list')))
+
+    def test_category_list(self):
+        self.assertQueriesFor(1, lambda: self.api.get(reverse('category-list')))
+
+    def test_admin_changelists(self):
+        # Session, user, filtered and total counts and the page itself; the
+        # Task changelist also loads its category filter choices
+        admin_queries = {'task': 6, 'subtask': 5, 'reminder': 5, 'category': 5}
+        self.client.force_login(self.user)
+        for model, num in admin_queries.items():
+            with self.subTest(model=model):
+                url = reverse(f'admin:tasks_{model}_changelist')
+                self.assertQueriesFor(num, lambda: self.client.get(url))
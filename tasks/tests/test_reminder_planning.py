@@ -0,0 +1,104 @@
+from datetime import timedelta
+from django.core import mail
+from django.test import TestCase, override_settings
+from django.contrib.auth.models import User
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+from ..models import Task, Reminder
+from ..utils import check_and_send_reminders
+
+@override_settings(DEFAULT_TASK_REMINDER_TIMES=[60, 1440])
+class ReminderPlanningTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='planuser',
+            email='plan@example.com',
+            password='testpass123'
+        )
+        self.api = APIClient()
+        self.api.force_authenticate(self.user)
+        self.due = timezone.now() + timedelta(days=3)
+        self.task = Task.objects.create(user=self.user, title='Planned', due_date=self.due)
+
+    def reminders(self, task=None):
+        return list(Reminder.objects.filter(task=task or self.task).order_by('remind_at'))
+
+    def test_default_times_come_from_settings(self):
+        reminders = self.reminders()
+        self.assertEqual([r.offset_minutes for r in reminders], [1440, 60])
+        self.assertEqual([r.remind_at for r in reminders], [self.due - timedelta(days=1), self.due - timedelta(hours=1)])
+
+    def test_user_preferences(self):
+        url = reverse('reminder-preferences')
+        self.assertEqual(self.api.get(url).json(), {'minutes_before': [60, 1440], 'digest': False, 'default': True})
+
+        response = self.api.put(url, {'minutes_before': [15, 15, 120]}, format='json')
+        self.assertEqual(response.json(), {'minutes_before': [15, 120], 'digest': False, 'default': False})
+        task = Task.objects.create(user=self.user, title='Custom', due_date=self.due)
+        self.assertEqual([r.offset_minutes for r in self.reminders(task)], [120, 15])
+
+        self.assertEqual(self.api.put(url, {'minutes_before': [0]}, format='json').status_code, 400)
+        self.assertTrue(self.api.delete(url).json()['default'])
+
+    def test_digest_preference_keeps_default_times(self):
+        url = reverse('reminder-preferences')
+        response = self.api.put(url, {'digest': True}, format='json')
+        self.assertEqual(response.json(), {'minutes_before': [60, 1440], 'digest': True, 'default': True})
+        with override_settings(DEFAULT_TASK_REMINDER_TIMES=[30]):
+            task = Task.objects.create(user=self.user, title='Digested', due_date=self.due)
+        self.assertEqual([r.offset_minutes for r in self.reminders(task)], [30])
+
+    def test_moving_the_due_date_rewrites_unsent_reminders_only(self):
+        day_before, hour_before = self.reminders()
+        Reminder.objects.filter(pk=day_before.pk).update(sent=True)
+        manual = Reminder.objects.create(task=self.task, remind_at=self.due - timedelta(days=2))
+
+        self.task.due_date = self.due + timedelta(days=1)
+        self.task.save()
+
+        reminders = {r.pk: r for r in self.reminders()}
+        # The unsent planned reminder moved in place, the hand-made one stayed
+        self.assertEqual(reminders[hour_before.pk].remind_at, self.task.due_date - timedelta(hours=1))
+        self.assertEqual(reminders[manual.pk].remind_at, manual.remind_at)
+        # The sent one is kept, and the new due date gets its own day-before reminder
+        self.assertEqual(reminders[day_before.pk].remind_at, day_before.remind_at)
+        new = [r for r in reminders.values() if r.pk not in (day_before.pk, hour_before.pk, manual.pk)]
+        self.assertEqual([(r.offset_minutes, r.remind_at) for r in new], [(1440, self.due)])
+
+    def test_reminders_in_the_past_are_dropped(self):
+        self.task.due_date = timezone.now() + timedelta(hours=3)
+        self.task.save()
+        self.assertEqual([r.offset_minutes for r in self.reminders()], [60])
+
+    def test_other_changes_leave_reminders_alone(self):
+        before = [(r.pk, r.updated_at) for r in self.reminders()]
+        self.task.title = 'Renamed'
+        self.task.save()
+        self.assertEqual([(r.pk, r.updated_at) for r in self.reminders()], before)
+
+    def test_completion_purges_and_reopening_replans(self):
+        Reminder.objects.create(task=self.task, remind_at=self.due - timedelta(days=2))
+        self.task.is_completed = True
+        self.task.save()
+        self.assertEqual(self.reminders(), [])
+
+        self.task.is_completed = False
+        self.task.save()
+        self.assertEqual([r.offset_minutes for r in self.reminders()], [1440, 60])
+
+    def test_bulk_update_replans(self):
+        due = (self.due + timedelta(days=2)).isoformat()
+        response = self.api.patch(reverse('task-bulk'), [{'id': self.task.id, 'due_date': due}], format='json')
+        self.assertEqual(response.status_code, 200)
+        self.task.refresh_from_db()
+        self.assertEqual(
+            [r.remind_at for r in self.reminders()],
+            [self.task.due_date - timedelta(days=1), self.task.due_date - timedelta(hours=1)]
+        )
+
+    def test_bulk_completed_tasks_are_not_reminded(self):
+        Reminder.objects.filter(task=self.task).update(remind_at=timezone.now() - timedelta(minutes=1))
+        self.api.post(reverse('task-bulk-complete'), {'ids': [self.task.id]}, format='json')
+        check_and_send_reminders()
+        self.assertEqual(len(mail.outbox), 0)
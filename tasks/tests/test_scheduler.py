@@ -0,0 +1,95 @@
+from datetime import timedelta
+from unittest import mock
+from django.db import OperationalError
+from django.test import TestCase
+from django.core import mail
+from django.contrib.auth.models import User
+from django.utils import timezone
+from ..models import Task, Reminder
+from ..scheduler import ReminderScheduler
+
+class ReminderSchedulerTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='scheduser',
+            email='sched@example.com',
+            password='testpass123'
+        )
+        self.task = Task.objects.create(
+            user=self.user,
+            title='Scheduled Task',
+            due_date=timezone.now() + timedelta(days=7)
+        )
+        Reminder.objects.all().delete()
+        self.now = timezone.now()
+        self.scheduler = ReminderScheduler(lookahead=timedelta(hours=1))
+
+    def test_load_only_keeps_lookahead_window(self):
+        """Test that only reminders inside the lookahead window are held"""
+        soon = Reminder.objects.create(task=self.task, remind_at=self.now + timedelta(minutes=10))
+        Reminder.objects.create(task=self.task, remind_at=self.now + timedelta(days=2))
+
+        self.scheduler.load(self.now)
+
+        self.assertEqual(list(self.scheduler.scheduled), [soon.id])
+
+    def test_pop_due_returns_reminders_in_order(self):
+        """Test that due reminders come off the heap and future ones stay"""
+        first = Reminder.objects.create(task=self.task, remind_at=self.now - timedelta(minutes=2))
+        second = Reminder.objects.create(task=self.task, remind_at=self.now - timedelta(minutes=1))
+        later = Reminder.objects.create(task=self.task, remind_at=self.now + timedelta(minutes=5))
+        self.scheduler.load(self.now)
+
+        self.assertEqual(self.scheduler.pop_due(self.now), [first.id, second.id])
+        self.assertEqual(list(self.scheduler.scheduled), [later.id])
+        self.assertAlmostEqual(self.scheduler.seconds_until_next(self.now), 1.0)
+
+    def test_poll_picks_up_new_and_moved_reminders(self):
+        """Test that polling updated_at applies inserts and reschedules"""
+        moved = Reminder.objects.create(task=self.task, remind_at=self.now + timedelta(minutes=30))
+        self.scheduler.load(self.now)
+
+        added = Reminder.objects.create(task=self.task, remind_at=self.now + timedelta(minutes=20))
+        moved.remind_at = self.now + timedelta(minutes=40)
+        moved.save()
+        self.scheduler.poll_changes()
+
+        self.assertEqual(self.scheduler.scheduled[added.id], added.remind_at)
+        self.assertEqual(self.scheduler.scheduled[moved.id], moved.remind_at)
+        # The stale heap entry for the old time is skipped
+        self.assertEqual(self.scheduler.pop_due(self.now + timedelta(minutes=35)), [added.id])
+
+    def test_tick_sends_only_due_reminders(self):
+        """Test that a tick dispatches exactly the reminders that are due"""
+        Reminder.objects.create(task=self.task, remind_at=self.now + timedelta(minutes=5))
+        self.scheduler.load(self.now)
+        # The first tick runs the catch-up sweep
+        self.scheduler.tick(self.now)
+        self.assertEqual(len(mail.outbox), 0)
+
+        due = Reminder.objects.create(task=self.task, remind_at=timezone.now())
+        stats = self.scheduler.tick(timezone.now())
+
+        self.assertEqual(stats['sent'], 1)
+        self.assertEqual(len(mail.outbox), 1)
+        due.refresh_from_db()
+        self.assertTrue(due.sent)
+
+    def test_run_survives_failed_steps(self):
+        """Test that a failing step is logged and retried instead of ending the scheduler"""
+        scheduler = ReminderScheduler(poll_interval=0)
+        steps = []
+
+        def tick():
+            steps.append(timezone.now())
+            if len(steps) == 1:
+                raise OperationalError('database is locked')
+            scheduler.stop()
+
+        scheduler.tick = tick
+        with mock.patch('tasks.scheduler.close_old_connections') as close_old_connections:
+            with self.assertLogs('tasks.scheduler', 'ERROR'):
+                scheduler.run()
+        self.assertEqual(len(steps), 2)
+        # Before and after each step
+        self.assertEqual(close_old_connections.call_count, 4)
@@ -0,0 +1,90 @@
+from datetime import timedelta
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.contrib.auth.models import User
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+from ..models import Task
+from ..search import has_fts_index
+
+@override_settings(TASK_CACHE_TTL=0)
+class FullTextSearchTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='searchuser',
+            email='search@example.com',
+            password='testpass123'
+        )
+        other = User.objects.create_user(
+            username='othersearch',
+            email='othersearch@example.com',
+            password='testpass123'
+        )
+        self.api = APIClient()
+        self.api.force_authenticate(self.user)
+        due = timezone.now() + timedelta(days=1)
+        self.budget = Task.objects.create(
+            user=self.user, title='Quarterly budget', description='Budget review with finance', due_date=due
+        )
+        self.report = Task.objects.create(
+            user=self.user, title='Write report', description='Include the budget numbers', due_date=due
+        )
+        Task.objects.create(user=self.user, title='Groceries', description='Milk and eggs', due_date=due)
+        Task.objects.create(user=other, title='Budget of someone else', due_date=due)
+
+    def search(self, text, **params):
+        response = self.api.get(reverse('task-list'), {'search': text, **params})
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def titles(self, text, **params):
+        return [task['title'] for task in self.search(text, **params)['results']]
+
+    def test_results_are_ranked(self):
+        # Two hits in the budget task, one in the report
+        self.assertEqual(self.titles('budget'), ['Quarterly budget', 'Write report'])
+
+    def test_prefix_matching(self):
+        self.assertEqual(self.titles('quart'), ['Quarterly budget'])
+        self.assertEqual(self.titles('gro'), ['Groceries'])
+
+    def test_all_words_must_match(self):
+        self.assertEqual(self.titles('budget finance'), ['Quarterly budget'])
+
+    def test_query_syntax_is_escaped(self):
+        self.assertEqual(self.titles('"budget" OR -milk*'), [])
+        self.assertEqual(self.titles('***'), [])
+
+    def test_explicit_ordering_wins_over_rank(self):
+        self.report.due_date = self.budget.due_date - timedelta(hours=1)
+        self.report.save()
+        self.assertEqual(self.titles('budget', ordering='due_date'), ['Write report', 'Quarterly budget'])
+
+    def test_index_follows_updates_and_deletes(self):
+        self.report.title = 'Write summary'
+        self.report.description = 'Numbers for finance'
+        self.report.save()
+        self.assertEqual(self.titles('report'), [])
+        self.assertEqual(self.titles('summary'), ['Write summary'])
+
+        self.report.delete()
+        self.assertEqual(self.titles('summary'), [])
+
+    def test_ranked_results_paginate(self):
+        due = timezone.now() + timedelta(days=2)
+        Task.objects.bulk_create(
+            Task(user=self.user, title=f'Budget item {i}', due_date=due) for i in range(9)
+        )
+        page = self.search('budget', page_size=4)
+        seen = [task['id'] for task in page['results']]
+        while page['next']:
+            page = self.api.get(page['next']).json()
+            seen += [task['id'] for task in page['results']]
+        self.assertEqual(len(seen), 11)
+        self.assertEqual(len(set(seen)), 11)
+
+    def test_sqlite_uses_fts_index(self):
+        if connection.vendor != 'sqlite':
+            self.skipTest('SQLite only')
+        self.assertTrue(has_fts_index(connection))
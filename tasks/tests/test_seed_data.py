@@ -0,0 +1,46 @@
+from datetime import timedelta
+from io import StringIO
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase, override_settings
+from ..models import Task, SubTask, Reminder, Category
+
+@override_settings(DEFAULT_TASK_REMINDER_TIMES=[30, 1440])
+class SeedDataTests(TestCase):
+    def seed(self, prefix, seed=0):
+        out = StringIO()
+        call_command('seed_data', users=3, tasks=5, subtasks=2, categories=4, prefix=prefix, seed=seed, stdout=out)
+        return out.getvalue()
+
+    def rows(self, prefix):
+        return list(
+            Task.objects.filter(user__username__startswith=prefix)
+            .order_by('id').values_list('title', 'priority', 'is_completed', 'category__name')
+        )
+
+    def test_creates_the_requested_rows(self):
+        output = self.seed('alpha')
+        self.assertIn('Created 3 users, 15 tasks, 30 subtasks, 30 reminders and 4 categories', output)
+        self.assertEqual(User.objects.filter(username__startswith='alpha').count(), 3)
+        self.assertEqual(SubTask.objects.filter(task__user__username__startswith='alpha').count(), 30)
+        self.assertEqual(Category.objects.filter(name__startswith='alpha ').count(), 4)
+
+        user = User.objects.get(username='alpha0')
+        self.assertTrue(user.check_password('seedpass123'))
+        for reminder in Reminder.objects.filter(task__user=user).select_related('task'):
+            self.assertIn(reminder.offset_minutes, [30, 1440])
+            self.assertEqual(reminder.remind_at, reminder.task.due_date - timedelta(minutes=reminder.offset_minutes))
+
+    def test_same_seed_same_data(self):
+        self.seed('alpha')
+        self.seed('beta')
+        self.seed('gamma', seed=1)
+        alpha = self.rows('alpha')
+        self.assertEqual([row[:3] for row in alpha], [row[:3] for row in self.rows('beta')])
+        self.assertNotEqual(alpha, self.rows('gamma'))
+
+    def test_refuses_existing_prefix(self):
+        self.seed('alpha')
+        with self.assertRaises(CommandError):
+            self.seed('alpha')
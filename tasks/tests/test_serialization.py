@@ -0,0 +1,60 @@
+from datetime import timedelta
+from django.test import TestCase, override_settings
+from django.contrib.auth.models import User
+from django.utils import timezone
+from rest_framework import serializers
+from rest_framework.renderers import JSONRenderer
+from ..models import Task, SubTask, Category, Reminder
+from ..renderers import ORJSONRenderer
+from ..serializers import TaskSerializer, SubTaskSerializer, ReminderSerializer, ValuesSerializer
+
+class ValuesSerializerTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='fastuser', password='testpass123')
+        category = Category.objects.create(name='Work')
+        now = timezone.now().replace(microsecond=123456)
+        tasks = [
+            Task.objects.create(user=self.user, title='Plain', due_date=now, category=category),
+            Task.objects.create(user=self.user, title='Ünïcødé ✓ "quoted" \\ slash', description='line\u2028separator\u2029end',
+                                due_date=now.replace(microsecond=0), priority='High'),
+            Task.objects.create(user=self.user, title='Done', description='', due_date=now, is_completed=True),
+        ]
+        SubTask.objects.create(task=tasks[0], title='Step', minutes=45)
+
+    def assertSameOutput(self, serializer_class, queryset):
+        expected = JSONRenderer().render(serializer_class(queryset, many=True).data)
+        fast = ValuesSerializer.for_serializer(serializer_class).serialize(queryset)
+        self.assertEqual(ORJSONRenderer().render(fast), expected)
+
+    def test_byte_identical_output(self):
+        """Test that the fast path renders exactly what the model serializers do"""
+        self.assertSameOutput(TaskSerializer, Task.objects.order_by('id'))
+        self.assertSameOutput(SubTaskSerializer, SubTask.objects.all())
+        self.assertSameOutput(ReminderSerializer, Reminder.objects.order_by('id'))
+
+    @override_settings(TIME_ZONE='Asia/Kolkata')
+    def test_byte_identical_in_other_time_zone(self):
+        """Test that datetimes are converted to the current time zone like DateTimeField"""
+        self.assertSameOutput(TaskSerializer, Task.objects.order_by('id'))
+
+    def test_unsupported_serializer(self):
+        """Test that serializers with computed fields are not handled by the fast path"""
+        class ComputedSerializer(serializers.ModelSerializer):
+            overdue = serializers.SerializerMethodField()
+
+            class Meta:
+                model = Task
+                fields = ['id', 'overdue']
+
+            def get_overdue(self, task):
+                return task.due_date < timezone.now()
+
+        self.assertIsNone(ValuesSerializer.for_serializer(ComputedSerializer))
+
+    def test_renderer_indent_falls_back(self):
+        """Test that indented output is left to JSONRenderer"""
+        data = {'a': [1, 2], 'when': timezone.now()}
+        self.assertEqual(
+            ORJSONRenderer().render(data, 'application/json; indent=2'),
+            JSONRenderer().render(data, 'application/json; indent=2')
+        )
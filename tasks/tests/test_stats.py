@@ -0,0 +1,88 @@
+from datetime import timedelta
+from unittest import mock
+from django.test import TestCase, override_settings
+from django.contrib.auth.models import User
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+from ..models import Task, SubTask, Category
+
+@override_settings(TASK_CACHE_TTL=0)
+class TaskStatsTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='statsuser',
+            email='stats@example.com',
+            password='testpass123'
+        )
+        other = User.objects.create_user(
+            username='otherstats',
+            email='otherstats@example.com',
+            password='testpass123'
+        )
+        self.api = APIClient()
+        self.api.force_authenticate(self.user)
+
+        work = Category.objects.create(name='Work')
+        home = Category.objects.create(name='Home')
+        past = timezone.now() - timedelta(days=1)
+        future = timezone.now() + timedelta(days=1)
+        tasks = Task.objects.bulk_create([
+            Task(user=self.user, title='Overdue', due_date=past, priority='High', category=work),
+            Task(user=self.user, title='Done late', due_date=past, priority='High', category=work, is_completed=True),
+            Task(user=self.user, title='Upcoming', due_date=future, priority='Low', category=home),
+            Task(user=self.user, title='Loose', due_date=future),
+            Task(user=other, title='Not mine', due_date=past, category=work),
+        ])
+        SubTask.objects.bulk_create([
+            SubTask(task=tasks[0], title='Step 1', minutes=20, is_completed=True),
+            SubTask(task=tasks[0], title='Step 2', minutes=45),
+            SubTask(task=tasks[2], title='Step 3', minutes=15),
+            SubTask(task=tasks[4], title='Not mine', minutes=90),
+        ])
+
+    def test_stats(self):
+        # One grouped task query and one subtask aggregate
+        with self.assertNumQueries(2):
+            response = self.api.get(reverse('task-stats'))
+        self.assertEqual(response.status_code, 200)
+        stats = response.json()
+
+        self.assertEqual(stats['total'], 4)
+        self.assertEqual(stats['completed'], 1)
+        self.assertEqual(stats['pending'], 3)
+        self.assertEqual(stats['overdue'], 1)
+        self.assertEqual(stats['by_priority'], {'High': 2, 'Normal': 1, 'Low': 1})
+        self.assertEqual(
+            [(c['name'], c['total'], c['completed']) for c in stats['by_category']],
+            [('Home', 1, 0), ('Work', 2, 1), (None, 1, 0)]
+        )
+        self.assertEqual(stats['subtasks'], {
+            'total': 3,
+            'completed': 1,
+            'remaining_minutes': 60,
+            'completion_ratio': 0.3333,
+        })
+
+    def test_stats_without_tasks(self):
+        Task.objects.filter(user=self.user).delete()
+        stats = self.api.get(reverse('task-stats')).json()
+
+        self.assertEqual(stats['total'], 0)
+        self.assertEqual(stats['by_category'], [])
+        self.assertIsNone(stats['subtasks']['completion_ratio'])
+        self.assertEqual(stats['subtasks']['remaining_minutes'], 0)
+
+    @override_settings(TASK_CACHE_TTL=60)
+    def test_cached_stats_expire_when_a_task_falls_due(self):
+        url = reverse('task-stats')
+        response = self.api.get(url)
+        self.assertEqual(response.json()['overdue'], 1)
+        etag = response['ETag']
+        self.assertEqual(self.api.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        later = timezone.now() + timedelta(days=2)
+        with mock.patch('django.utils.timezone.now', return_value=later):
+            response = self.api.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['overdue'], 3)
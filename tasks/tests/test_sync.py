@@ -0,0 +1,120 @@
+from datetime import timedelta
+from unittest import mock
+from django.test import TestCase, override_settings
+from django.contrib.auth.models import User
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+from ..models import Task, SubTask, Reminder, Category, Tombstone
+from ..sync import prune_tombstones
+
+@override_settings(SYNC_WATERMARK_LAG=0)
+class DeltaSyncTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='syncuser',
+            email='sync@example.com',
+            password='testpass123'
+        )
+        self.other = User.objects.create_user(username='othersync', password='testpass123')
+        self.api = APIClient()
+        self.api.force_authenticate(self.user)
+        self.due = timezone.now() + timedelta(days=5)
+        self.task = Task.objects.create(user=self.user, title='Synced', due_date=self.due)
+        self.subtask = SubTask.objects.create(task=self.task, title='Step')
+        Task.objects.create(user=self.other, title='Not mine', due_date=self.due)
+
+    def sync(self, since=None, at=None):
+        """GET /api/sync/ as of `at` (default: one second from now)"""
+        at = at or timezone.now() + timedelta(seconds=1)
+        with mock.patch('tasks.sync.timezone.now', return_value=at):
+            response = self.api.get(reverse('sync'), {'since': since} if since else {})
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_full_sync(self):
+        data = self.sync()
+        self.assertTrue(data['reset'])
+        self.assertEqual([task['title'] for task in data['tasks']], ['Synced'])
+        self.assertEqual([subtask['id'] for subtask in data['subtasks']], [self.subtask.id])
+        self.assertEqual(len(data['reminders']), 4)
+        self.assertEqual(data['deleted'], {'tasks': [], 'subtasks': [], 'reminders': []})
+
+    def test_delta_returns_only_changes(self):
+        watermark = self.sync()['watermark']
+        data = self.sync(watermark, at=timezone.now() + timedelta(seconds=2))
+        self.assertFalse(data['reset'])
+        self.assertEqual((data['tasks'], data['subtasks'], data['reminders']), ([], [], []))
+
+        with mock.patch('django.utils.timezone.now', return_value=timezone.now() + timedelta(seconds=3)):
+            self.subtask.title = 'Renamed'
+            self.subtask.save()
+            gone = SubTask.objects.create(task=self.task, title='Gone')
+            gone_id = gone.id
+            gone.delete()
+        data = self.sync(watermark, at=timezone.now() + timedelta(seconds=4))
+        self.assertEqual([subtask['title'] for subtask in data['subtasks']], ['Renamed'])
+        self.assertEqual(data['tasks'], [])
+        self.assertEqual(data['deleted']['subtasks'], [gone_id])
+
+    def test_bulk_updates_move_the_watermark(self):
+        """Test that update() based endpoints stamp the rows they change"""
+        watermark = self.sync()['watermark']
+        with mock.patch('django.utils.timezone.now', return_value=timezone.now() + timedelta(seconds=3)):
+            response = self.api.post(reverse('task-bulk-complete'), {'ids': [self.task.id]}, format='json')
+        self.assertEqual(response.status_code, 200)
+
+        data = self.sync(watermark, at=timezone.now() + timedelta(seconds=4))
+        self.assertTrue(data['tasks'][0]['is_completed'])
+        self.assertTrue(data['subtasks'][0]['is_completed'])
+
+    def test_task_deletion_tombstones(self):
+        """Test that a deleted task leaves one tombstone and its children none"""
+        watermark = self.sync()['watermark']
+        task_id = self.task.id
+        with mock.patch('django.utils.timezone.now', return_value=timezone.now() + timedelta(seconds=3)):
+            self.task.delete()
+        data = self.sync(watermark, at=timezone.now() + timedelta(seconds=4))
+        self.assertEqual(data['deleted'], {'tasks': [task_id], 'subtasks': [], 'reminders': []})
+        self.assertEqual(Tombstone.objects.count(), 1)
+
+        # Deleting the user cascades without logging anything
+        self.user.delete()
+        self.assertEqual(Tombstone.objects.count(), 0)
+
+    def test_bulk_delete_costs_fixed_queries(self):
+        """Test that deleting many rows logs their tombstones with one INSERT"""
+        reminders = Reminder.objects.bulk_create(
+            Reminder(task=self.task, remind_at=self.due - timedelta(hours=i)) for i in range(1, 25)
+        )
+        # Reminder SELECT, DELETE, owner SELECT and tombstone INSERT
+        with self.assertNumQueries(4):
+            Reminder.objects.filter(pk__in=[reminder.pk for reminder in reminders]).delete()
+        self.assertEqual(
+            set(Tombstone.objects.filter(model='reminder').values_list('user_id', 'object_id')),
+            {(self.user.id, reminder.pk) for reminder in reminders}
+        )
+
+    def test_category_deletion_touches_its_tasks(self):
+        """Test that tasks losing their category through SET_NULL show up in the delta"""
+        category = Category.objects.create(name='Doomed')
+        self.task.category = category
+        self.task.save()
+        watermark = self.sync()['watermark']
+        with mock.patch('django.utils.timezone.now', return_value=timezone.now() + timedelta(seconds=3)):
+            category.delete()
+        data = self.sync(watermark, at=timezone.now() + timedelta(seconds=4))
+        self.assertEqual([(task['id'], task['category']) for task in data['tasks']], [(self.task.id, None)])
+
+    def test_expired_watermark_resets(self):
+        old = (timezone.now() - timedelta(days=60)).isoformat()
+        data = self.sync(old)
+        self.assertTrue(data['reset'])
+        self.assertEqual(len(data['tasks']), 1)
+
+        Tombstone.objects.create(user=self.user, model='task', object_id=999)
+        self.assertEqual(prune_tombstones(now=timezone.now() + timedelta(days=31)), 1)
+
+    def test_invalid_watermark(self):
+        response = self.api.get(reverse('sync'), {'since': 'yesterday'})
+        self.assertEqual(response.status_code, 400)
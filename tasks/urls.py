@@ -1,6 +1,6 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from . import views
+from . import views, async_views
 
 router = DefaultRouter()
 router.register(r'tasks', views.TaskViewSet, basename='task')
@@ -12,6 +12,9 @@ urlpatterns = [
     path('', include(router.urls)),
     path('register/', views.register_user, name='register'),
     path('login/', views.login_user, name='login'),
+    path('sync/', views.sync, name='sync'),
+    path('metrics/', views.metrics, name='metrics'),
     path('tasks/<int:pk>/subtasks/', views.TaskViewSet.as_view({'get': 'subtasks'}), name='task-subtasks'),
+    path('tasks/<int:pk>/subtasks/stream/', async_views.stream_task_subtasks, name='task-subtasks-stream'),
     path('subtasks/<int:pk>/complete/', views.SubTaskViewSet.as_view({'put': 'complete'}), name='subtask-complete'),
 ]
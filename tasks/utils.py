@@ -1,12 +1,24 @@
-import os
-from django.core.mail import send_mail
+import logging
+import queue
+import threading
+import time
+import uuid
+from itertools import groupby
+from django.core.mail import EmailMessage, get_connection
 from django.conf import settings
-from datetime import datetime, timedelta
-from .models import Task, Reminder
+from django.db.models import Q
+from django.utils import timezone
+from datetime import timedelta
+from .cache import invalidate_user_cache
+from .metrics import outbound
+from .push import publish_changed
+from .models import Task, Reminder, ReminderPreference
 
-def send_task_reminder(reminder):
+logger = logging.getLogger(__name__)
+
+def build_reminder_email(reminder, connection=None):
     """
-    Send an email reminder for a task
+    Build the email message for a task reminder
     """
     task = reminder.task
     user = task.user
@@ -32,33 +44,333 @@ def send_task_reminder(reminder):
     Best regards,
     TaskNinja Team
     """
-    
+
+    return EmailMessage(
+        subject=subject,
+        body=message,
+        from_email=settings.EMAIL_HOST_USER,
+        to=[user.email],
+        connection=connection,
+    )
+
+def build_digest_email(reminders, connection=None):
+    """
+    Build one email for a user's reminders (all of the same user), listing
+    each of their tasks once, soonest due first
+    """
+    user = reminders[0].task.user
+    tasks = sorted({reminder.task_id: reminder.task for reminder in reminders}.values(), key=lambda task: task.due_date)
+    subject = f"Reminder: {len(tasks)} task{'s' if len(tasks) != 1 else ''} due soon"
+
+    task_lines = '\n'.join(
+        f"    - {task.title}: due {task.due_date.strftime('%B %d, %Y at %I:%M %p')}, "
+        f"priority {task.priority}, category {task.category.name if task.category else 'None'}"
+        for task in tasks
+    )
+    message = f"""
+    Hello {user.username},
+
+    These tasks are coming up:
+
+{task_lines}
+
+    Please make sure to complete them on time.
+
+    Best regards,
+    TaskNinja Team
+    """
+
+    return EmailMessage(
+        subject=subject,
+        body=message,
+        from_email=settings.EMAIL_HOST_USER,
+        to=[user.email],
+        connection=connection,
+    )
+
+def send_task_reminder(reminder):
+    """
+    Send an email reminder for a task right away. The result is recorded
+    like a batch of one (record_reminder_batch()); returns whether the
+    reminder was delivered.
+    """
+    stats = {'sent': 0, 'failed': 0, 'dead_lettered': 0, 'batches': 0}
+    connection = get_connection(fail_silently=False)
     try:
-        send_mail(
-            subject=subject,
-            message=message,
-            from_email=settings.EMAIL_HOST_USER,
-            recipient_list=[user.email],
-            fail_silently=False,
+        sent_ids = send_reminder_batch([reminder], connection)
+    finally:
+        connection.close()
+    record_reminder_batch([reminder], sent_ids, stats)
+    # record_reminder_batch() marks sent reminders with an UPDATE
+    reminder.sent = bool(sent_ids)
+    return reminder.sent
+
+def send_reminder_batch(reminders, connection):
+    """
+    Send a batch of reminders over an already open connection.
+    Returns the ids of the reminders that were delivered; the others keep
+    their error in `send_error`.
+    """
+    sent_ids = []
+    for reminder in reminders:
+        try:
+            message = build_reminder_email(reminder, connection)
+            with outbound('smtp'):
+                # No-op while the session is alive, reconnects after a failure
+                connection.open()
+                connection.send_messages([message])
+            sent_ids.append(reminder.id)
+        except Exception as e:
+            logger.warning('Failed to send email reminder %s: %s', reminder.id, e)
+            reminder.send_error = e
+            # Drop the (possibly broken) session, the next send reopens it
+            connection.close()
+    return sent_ids
+
+def send_digest_batch(reminders, connection):
+    """
+    Send one digest email per user of a batch ordered by user, over an
+    already open connection. Returns the ids of the reminders included in
+    delivered digests; the others keep their digest's error in `send_error`.
+    """
+    sent_ids = []
+    for user_id, group in groupby(reminders, key=lambda reminder: reminder.task.user_id):
+        group = list(group)
+        try:
+            message = build_digest_email(group, connection)
+            with outbound('smtp'):
+                connection.open()
+                connection.send_messages([message])
+            sent_ids.extend(reminder.id for reminder in group)
+        except Exception as e:
+            logger.warning('Failed to send reminder digest to user %s: %s', user_id, e)
+            for reminder in group:
+                reminder.send_error = e
+            connection.close()
+    return sent_ids
+
+def claimable_reminders(current_time):
+    """Pending reminders of open tasks that no live claim holds"""
+    return Reminder.objects.pending().filter(
+        # Completion drops unsent reminders, but rows from before that, or tasks
+        # completed by raw update()s, can still have some
+        task__is_completed=False
+    ).filter(
+        Q(claimed_at__isnull=True) |
+        Q(claimed_at__lt=current_time - timedelta(seconds=settings.REMINDER_CLAIM_TIMEOUT))
+    )
+
+def digest_users():
+    """Subquery of the ids of the users who get their reminders as digests"""
+    return ReminderPreference.objects.filter(digest=True).values('user_id')
+
+def claim_digest_batch(batch_size, after=None, reminder_ids=None):
+    """
+    Claim the reminders of the next `batch_size` digest users (see
+    ReminderPreference.digest) that have a due reminder. For each such user
+    every pending reminder due within REMINDER_DIGEST_WINDOW from now is
+    claimed too, so it goes out in the same digest instead of in the next
+    one; reminders waiting for a retry are not sent early. Users are walked
+    by id; returns the claimed reminders, ordered by
+    user, and the cursor to pass for the next batch.
+    """
+    current_time = timezone.now()
+    digest = claimable_reminders(current_time).filter(task__user_id__in=digest_users())
+    due = digest.filter(due_at__lte=current_time)
+    if reminder_ids is not None:
+        due = due.filter(id__in=reminder_ids)
+    window_end = current_time + timedelta(seconds=settings.REMINDER_DIGEST_WINDOW)
+
+    while True:
+        users = due if after is None else due.filter(task__user_id__gt=after)
+        user_ids = list(
+            users.order_by('task__user_id').values_list('task__user_id', flat=True).distinct()[:batch_size]
+        )
+        if not user_ids:
+            return [], after
+        after = user_ids[-1]
+
+        token = uuid.uuid4().hex
+        upcoming = Q(due_at__lte=current_time) | Q(next_attempt_at__isnull=True, due_at__lte=window_end)
+        if digest.filter(upcoming, task__user_id__in=user_ids).update(
+            claimed_by=token, claimed_at=current_time
+        ):
+            batch = Reminder.objects.filter(
+                claimed_by=token
+            ).select_related('task', 'task__user', 'task__category').order_by('task__user_id', 'remind_at', 'id')
+            return list(batch), after
+
+def claim_reminder_batch(batch_size, after=None, reminder_ids=None):
+    """
+    Claim the next batch of due reminders for this sender.
+    When reminder_ids is given only those reminders are considered.
+
+    Claiming is a conditional UPDATE, so when two runs race for the same
+    rows only one of them wins each reminder. Claims older than
+    REMINDER_CLAIM_TIMEOUT are considered abandoned and can be taken over.
+    Reminders are walked oldest first with a (due_at, id) cursor, which
+    keeps the scan on the pending-reminder index: reminders waiting for a
+    retry, and dead-lettered ones, are never read. Reminders of users who
+    get digests are left to claim_digest_batch(). Returns the claimed
+    reminders and the cursor to pass for the next batch.
+    """
+    current_time = timezone.now()
+    claimable = claimable_reminders(current_time).filter(
+        due_at__lte=current_time
+    ).exclude(task__user_id__in=digest_users())
+    if reminder_ids is not None:
+        claimable = claimable.filter(id__in=reminder_ids)
+
+    while True:
+        candidates = claimable
+        if after is not None:
+            candidates = candidates.filter(due_at__gte=after[0]).exclude(
+                due_at=after[0], id__lte=after[1]
+            )
+        candidates = list(
+            candidates.order_by('due_at', 'id').values_list('due_at', 'id')[:batch_size]
         )
-        # Mark reminder as sent
-        reminder.sent = True
-        reminder.save()
-        return True
-    except Exception as e:
-        print(f"Failed to send email reminder: {str(e)}")
-        return False
-
-def check_and_send_reminders():
-    """
-    Check for due reminders and send them
-    """
-    # Get all unsent reminders that are due
-    current_time = datetime.now()
-    due_reminders = Reminder.objects.filter(
-        sent=False,
-        remind_at__lte=current_time
-    ).select_related('task', 'task__user', 'task__category')
-
-    for reminder in due_reminders:
-        send_task_reminder(reminder)
+        if not candidates:
+            return [], after
+        after = candidates[-1]
+        candidate_ids = [reminder_id for _, reminder_id in candidates]
+
+        token = uuid.uuid4().hex
+        if claimable.filter(id__in=candidate_ids).update(claimed_by=token, claimed_at=current_time):
+            batch = Reminder.objects.filter(
+                claimed_by=token
+            ).select_related('task', 'task__user', 'task__category').order_by('remind_at', 'id')
+            return list(batch), after
+        # Another run claimed all of them first, move on to the next ones
+
+def record_reminder_batch(batch, sent_ids, stats):
+    """
+    Mark delivered reminders as sent and schedule a retry (or dead-letter)
+    for the failed ones
+    """
+    sent_ids = set(sent_ids)
+    failed = [reminder for reminder in batch if reminder.id not in sent_ids]
+    if sent_ids:
+        Reminder.objects.filter(id__in=sent_ids).update(sent=True, updated_at=timezone.now())
+        # update() skips the model signals; cached tasks embed their reminders
+        for user_id in {reminder.task.user_id for reminder in batch if reminder.id in sent_ids}:
+            invalidate_user_cache(user_id)
+            publish_changed(user_id)
+    if failed:
+        now = timezone.now()
+        for reminder in failed:
+            reminder.record_failure(getattr(reminder, 'send_error', 'Not sent'), now)
+        Reminder.objects.bulk_update(failed, Reminder.RETRY_FIELDS)
+
+    stats['batches'] += 1
+    stats['sent'] += len(sent_ids)
+    stats['failed'] += len(failed)
+    stats['dead_lettered'] += sum(reminder.dead_lettered for reminder in failed)
+
+class ReminderWorker(threading.Thread):
+    """
+    Sends reminder batches taken from a queue over its own SMTP session.
+
+    Workers never touch the database; the dispatching thread claims the
+    batches and records the results.
+    """
+    def __init__(self, jobs, results):
+        super().__init__(daemon=True)
+        self.jobs = jobs
+        self.results = results
+
+    def run(self):
+        connection = get_connection(fail_silently=False)
+        try:
+            while True:
+                batch = self.jobs.get()
+                if batch is None:
+                    break
+                try:
+                    sent_ids = send_reminder_batch(batch, connection)
+                except Exception as e:
+                    logger.exception('Reminder worker failed: %s', e)
+                    for reminder in batch:
+                        reminder.send_error = e
+                    sent_ids = []
+                self.results.put((batch, sent_ids))
+        finally:
+            connection.close()
+
+def check_and_send_reminders(batch_size=None, workers=1, reminder_ids=None):
+    """
+    Check for due reminders and send them in batches.
+
+    Users who asked for digests get theirs first, in batches of batch_size
+    users. Then each batch of the other reminders is claimed, sent over a
+    shared SMTP connection and marked as sent with a single UPDATE; failed
+    reminders are given their next attempt (Reminder.record_failure()) in
+    one bulk update. With more than one worker the individual batches are
+    handed to a pool of threads, each holding its own SMTP connection,
+    through a bounded queue. Pass reminder_ids to only send those reminders
+    (if they are due), plus the rest of their digests. Returns a dict with
+    the run statistics.
+    """
+    batch_size = batch_size or settings.REMINDER_BATCH_SIZE
+    started = time.monotonic()
+    stats = {'sent': 0, 'failed': 0, 'dead_lettered': 0, 'batches': 0, 'digests': 0}
+
+    connection = get_connection(fail_silently=False)
+    try:
+        cursor = None
+        while True:
+            batch, cursor = claim_digest_batch(batch_size, cursor, reminder_ids)
+            if not batch:
+                break
+            sent_ids = send_digest_batch(batch, connection)
+            record_reminder_batch(batch, sent_ids, stats)
+            sent_ids = set(sent_ids)
+            stats['digests'] += len({reminder.task.user_id for reminder in batch if reminder.id in sent_ids})
+
+        if workers > 1:
+            connection.close()
+            _dispatch_with_workers(batch_size, workers, stats, reminder_ids)
+        else:
+            cursor = None
+            while True:
+                batch, cursor = claim_reminder_batch(batch_size, cursor, reminder_ids)
+                if not batch:
+                    break
+                sent_ids = send_reminder_batch(batch, connection)
+                record_reminder_batch(batch, sent_ids, stats)
+    finally:
+        connection.close()
+
+    stats['elapsed'] = time.monotonic() - started
+    return stats
+
+def _dispatch_with_workers(batch_size, workers, stats, reminder_ids):
+    # The bounded job queue blocks claiming once every worker is busy
+    jobs = queue.Queue(maxsize=workers * 2)
+    results = queue.Queue()
+    pool = [ReminderWorker(jobs, results) for _ in range(workers)]
+    for worker in pool:
+        worker.start()
+
+    def drain():
+        while True:
+            try:
+                batch, sent_ids = results.get_nowait()
+            except queue.Empty:
+                return
+            record_reminder_batch(batch, sent_ids, stats)
+
+    try:
+        cursor = None
+        while True:
+            batch, cursor = claim_reminder_batch(batch_size, cursor, reminder_ids)
+            if not batch:
+                break
+            jobs.put(batch)
+            drain()
+    finally:
+        for _ in pool:
+            jobs.put(None)
+        for worker in pool:
+            worker.join()
+        drain()
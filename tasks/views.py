@@ -1,38 +1,372 @@
 from rest_framework import viewsets, filters, status
+from rest_framework.exceptions import ValidationError
+from rest_framework.fields import BooleanField, IntegerField
 from rest_framework.decorators import api_view, permission_classes, authentication_classes, action
-from rest_framework.permissions import IsAuthenticated, AllowAny
+from rest_framework.permissions import IsAuthenticated, IsAdminUser, AllowAny
 from rest_framework.response import Response
 from rest_framework.authentication import BasicAuthentication
 from django.contrib.auth import authenticate
 from django.contrib.auth.models import User
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Prefetch, Q, Sum
+from django.http import HttpResponse
 from django.utils import timezone
-from .models import Task, SubTask, Category, Reminder
-from .serializers import TaskSerializer, SubTaskSerializer, CategorySerializer, ReminderSerializer
+from .models import Task, SubTask, Category, Reminder, ReminderPlanner, ReminderPreference
+from .serializers import (
+    TaskSerializer, SubTaskSerializer, CategorySerializer, ReminderSerializer,
+    ReminderPreferenceSerializer, ValuesSerializer
+)
+from .pagination import KeysetCursorPagination
+from .authentication import issue_token
+from .cache import CachedResponseMixin, invalidate_user_cache
+from .push import publish_changed
+from .search import FullTextSearchFilter
+from .ai_utils import create_generated_subtasks
+from .sync import get_changes, parse_watermark
+from .metrics import PROMETHEUS_CONTENT_TYPE, registry
 
-class TaskViewSet(viewsets.ModelViewSet):
+class BulkModelMixin:
+    """
+    Helpers for endpoints that create or update a list of objects at once.
+
+    Every item is validated first; if any item is invalid nothing is written
+    and a 400 is returned with one error entry per item, in request order.
+    """
+    def get_bulk_items(self, request):
+        """Return (items, error_response) for a body that is a list of objects"""
+        items = request.data
+        if isinstance(items, dict):
+            items = items.get('items')
+        if not isinstance(items, list) or not items:
+            return None, Response(
+                {'error': 'Expected a non-empty list of items'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        return self._check_bulk_size(items)
+
+    def get_bulk_ids(self, request):
+        """Return (ids, error_response) for a body like {"ids": [1, 2, 3]}"""
+        ids = request.data.get('ids') if isinstance(request.data, dict) else None
+        error = Response({'error': 'Please provide a list of ids'}, status=status.HTTP_400_BAD_REQUEST)
+        if not isinstance(ids, list) or not ids:
+            return None, error
+        id_field = IntegerField()
+        try:
+            # Strict like a serializer field: rejects booleans, lists and the like
+            ids = [id_field.to_internal_value(pk) for pk in ids]
+        except ValidationError:
+            return None, error
+        if len(set(ids)) != len(ids):
+            return None, Response({'error': 'Duplicate ids'}, status=status.HTTP_400_BAD_REQUEST)
+        return self._check_bulk_size(ids)
+
+    def _check_bulk_size(self, items):
+        if len(items) > settings.API_MAX_BULK_SIZE:
+            return None, Response(
+                {'error': f'At most {settings.API_MAX_BULK_SIZE} items per request'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        return items, None
+
+    def validate_bulk_create(self, items):
+        """Return (validated_data, errors) for a list of new objects"""
+        validated, errors = [], []
+        for item in items:
+            serializer = self.get_serializer(data=item)
+            serializer.is_valid()
+            validated.append(serializer.validated_data)
+            errors.append(serializer.errors)
+        return validated, errors
+
+    def validate_bulk_update(self, items):
+        """Return (serializers, errors) for a list of partial updates keyed by id"""
+        id_field = IntegerField()
+        ids = []
+        for item in items:
+            try:
+                ids.append(id_field.to_internal_value(item.get('id')) if isinstance(item, dict) else None)
+            except ValidationError as e:
+                ids.append(e.detail)
+        instances = self.get_queryset().in_bulk([pk for pk in ids if isinstance(pk, int)])
+
+        serializers, errors = [], []
+        seen = set()
+        for item, pk in zip(items, ids):
+            if isinstance(pk, list):
+                serializers.append(None)
+                errors.append({'id': pk})
+                continue
+            if pk in seen:
+                serializers.append(None)
+                errors.append({'id': ['Duplicate id.']})
+                continue
+            seen.add(pk)
+            instance = instances.get(pk)
+            if instance is None:
+                serializers.append(None)
+                errors.append({'id': ['Not found.']})
+                continue
+            serializer = self.get_serializer(instance, data=item, partial=True)
+            serializer.is_valid()
+            serializers.append(serializer)
+            errors.append(serializer.errors)
+        return serializers, errors
+
+    def apply_bulk_update(self, serializers):
+        """Copy validated data onto the instances and save them with one bulk_update"""
+        model = self.get_queryset().model
+        fields = {'updated_at'} if hasattr(model, 'updated_at') else set()
+        instances = []
+        now = timezone.now()
+        for serializer in serializers:
+            instance = serializer.instance
+            for field, value in serializer.validated_data.items():
+                setattr(instance, field, value)
+                fields.add(field)
+            if 'updated_at' in fields:
+                instance.updated_at = now
+            instances.append(instance)
+        if fields:
+            model.objects.bulk_update(instances, list(fields))
+        return instances
+
+class ValuesListMixin:
+    """
+    list() that reads rows with .values() and serializes them with
+    ValuesSerializer instead of building a model instance and a serializer
+    field call per value. The output is identical; serializers the fast
+    path cannot reproduce use the regular list().
+    """
+    def get_values_serializer(self):
+        return ValuesSerializer.for_serializer(self.get_serializer_class())
+
+    def list(self, request, *args, **kwargs):
+        values_serializer = self.get_values_serializer()
+        if values_serializer is None:
+            return super().list(request, *args, **kwargs)
+
+        queryset = values_serializer.values(self.filter_queryset(self.get_queryset()))
+        page = self.paginate_queryset(queryset)
+        if page is None:
+            return Response(values_serializer.to_representation(queryset))
+        return self.get_paginated_response(values_serializer.to_representation(page))
+
+class TaskViewSet(CachedResponseMixin, BulkModelMixin, ValuesListMixin, viewsets.ModelViewSet):
     serializer_class = TaskSerializer
     permission_classes = [IsAuthenticated]
-    filter_backends = [filters.SearchFilter, filters.OrderingFilter]
+    filter_backends = [FullTextSearchFilter, filters.OrderingFilter]
     search_fields = ['title', 'description']
     ordering_fields = ['due_date', 'priority', 'created_at']
+    ordering = ['due_date']
+    pagination_class = KeysetCursorPagination
+    expand_param = 'expand'
 
     def get_queryset(self):
-        return Task.objects.filter(user=self.request.user)
+        queryset = Task.objects.filter(user=self.request.user)
+        expand = self.get_expand()
+        if 'category' in expand:
+            queryset = queryset.select_related('category')
+        if 'subtasks' in expand:
+            queryset = queryset.prefetch_related(
+                Prefetch('subtasks', queryset=SubTask.objects.order_by('created_at', 'id'))
+            )
+        if 'reminders' in expand:
+            queryset = queryset.prefetch_related(
+                Prefetch('reminders', queryset=Reminder.objects.order_by('remind_at', 'id'))
+            )
+        return queryset
+
+    def get_expand(self):
+        """The related objects to embed in list and detail responses, from ?expand=subtasks,reminders"""
+        if self.action not in ('list', 'retrieve') or self.request is None:
+            return set()
+        value = self.request.query_params.get(self.expand_param, '')
+        expand = {name.strip() for name in value.split(',') if name.strip()}
+        unknown = expand - set(TaskSerializer.expandable_fields)
+        if unknown:
+            raise ValidationError({self.expand_param: [
+                f'Unknown field {name!r}; expected one of: {", ".join(TaskSerializer.expandable_fields)}'
+                for name in sorted(unknown)
+            ]})
+        return expand
+
+    def get_serializer_context(self):
+        return {**super().get_serializer_context(), 'expand': self.get_expand()}
+
+    def get_values_serializer(self):
+        # Nested objects need the model instances and their prefetched relations
+        if self.get_expand():
+            return None
+        return super().get_values_serializer()
 
     def perform_create(self, serializer):
         serializer.save(user=self.request.user)
 
+    def list(self, request, *args, **kwargs):
+        return self.cached_response(request, lambda: super(TaskViewSet, self).list(request, *args, **kwargs))
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.cached_response(request, lambda: super(TaskViewSet, self).retrieve(request, *args, **kwargs))
+
     @action(detail=True, methods=['get'])
     def subtasks(self, request, pk=None):
         """Get all subtasks for a specific task"""
         task = self.get_object()
         subtasks = SubTask.objects.filter(task=task)
-        serializer = SubTaskSerializer(subtasks, many=True)
-        return Response(serializer.data)
+        return Response(ValuesSerializer.for_serializer(SubTaskSerializer).serialize(subtasks))
+
+    @action(detail=False, methods=['get'])
+    def stats(self, request):
+        """Task and subtask counts computed in the database"""
+        now = timezone.now()
+        next_due = None
+        if settings.TASK_CACHE_TTL:
+            # The overdue count changes when the next open task falls due, so
+            # that due date is part of the cache key and ETag
+            next_due = self.get_queryset().filter(is_completed=False, due_date__gte=now).order_by(
+                'due_date'
+            ).values_list('due_date', flat=True).first()
+        return self.cached_response(request, lambda: Response(self.compute_stats(now)), variant=next_due)
+
+    def compute_stats(self, now):
+        priorities = [choice for choice, _ in Task.PRIORITY_CHOICES]
+        # One grouped query; the overall totals are the sum of the category rows
+        rows = self.get_queryset().order_by().values('category', 'category__name').annotate(
+            total=Count('id'),
+            completed=Count('id', filter=Q(is_completed=True)),
+            overdue=Count('id', filter=Q(is_completed=False, due_date__lt=now)),
+            **{f'priority_{p}': Count('id', filter=Q(priority=p)) for p in priorities}
+        )
+
+        stats = {
+            'total': 0,
+            'completed': 0,
+            'overdue': 0,
+            'by_priority': dict.fromkeys(priorities, 0),
+            'by_category': [],
+        }
+        for row in rows:
+            stats['total'] += row['total']
+            stats['completed'] += row['completed']
+            stats['overdue'] += row['overdue']
+            for priority in priorities:
+                stats['by_priority'][priority] += row[f'priority_{priority}']
+            stats['by_category'].append({
+                'id': row['category'],
+                'name': row['category__name'],
+                'total': row['total'],
+                'completed': row['completed'],
+            })
+        stats['pending'] = stats['total'] - stats['completed']
+        stats['by_category'].sort(key=lambda category: (category['name'] is None, category['name'] or ''))
 
-class SubTaskViewSet(viewsets.ModelViewSet):
+        subtasks = SubTask.objects.filter(task__user=self.request.user).aggregate(
+            total=Count('id'),
+            completed=Count('id', filter=Q(is_completed=True)),
+            remaining_minutes=Sum('minutes', filter=Q(is_completed=False), default=0),
+        )
+        subtasks['completion_ratio'] = (
+            round(subtasks['completed'] / subtasks['total'], 4) if subtasks['total'] else None
+        )
+        stats['subtasks'] = subtasks
+        stats['generated_at'] = now
+        return stats
+
+    @action(detail=False, methods=['post', 'patch'])
+    def bulk(self, request):
+        """Create (POST) or partially update (PATCH) many tasks in one transaction"""
+        items, error = self.get_bulk_items(request)
+        if error:
+            return error
+
+        if request.method == 'PATCH':
+            serializers, errors = self.validate_bulk_update(items)
+            if any(errors):
+                return Response(errors, status=status.HTTP_400_BAD_REQUEST)
+            with transaction.atomic():
+                invalidate_user_cache(request.user.id)
+                publish_changed(request.user.id)
+                tasks = self.apply_bulk_update(serializers)
+                ReminderPlanner().replan(task for task in tasks if task.reminder_state_changed())
+                completed = [task for task in tasks if task.is_completed]
+                if completed:
+                    SubTask.objects.filter(task__in=completed, is_completed=False).update(
+                        is_completed=True, updated_at=timezone.now()
+                    )
+            return Response(self.get_serializer(tasks, many=True).data)
+
+        validated, errors = self.validate_bulk_create(items)
+        if any(errors):
+            return Response(errors, status=status.HTTP_400_BAD_REQUEST)
+        now = timezone.now()
+        with transaction.atomic():
+            invalidate_user_cache(request.user.id)
+            publish_changed(request.user.id)
+            tasks = Task.objects.bulk_create(
+                Task(user=request.user, **data) for data in validated
+            )
+            # bulk_create skips post_save, so create all default reminders in one INSERT
+            ReminderPlanner(now).create(tasks)
+        return Response(self.get_serializer(tasks, many=True).data, status=status.HTTP_201_CREATED)
+
+    @action(detail=False, methods=['post'])
+    def bulk_complete(self, request):
+        """
+        Mark many tasks (and their subtasks) as complete. Like completing a
+        single task (ReminderPlanner.replan()), this drops their unsent
+        reminders.
+        """
+        ids, error = self.get_bulk_ids(request)
+        if error:
+            return error
+
+        with transaction.atomic():
+            invalidate_user_cache(request.user.id)
+            publish_changed(request.user.id)
+            found = set(self.get_queryset().filter(id__in=ids).values_list('id', flat=True))
+            now = timezone.now()
+            self.get_queryset().filter(id__in=found).update(is_completed=True, updated_at=now)
+            SubTask.objects.filter(task__in=found, is_completed=False).update(is_completed=True, updated_at=now)
+            Reminder.objects.filter(task__in=found, sent=False).delete()
+        return Response([
+            {'id': pk, 'status': 'completed' if pk in found else 'not_found'}
+            for pk in ids
+        ])
+
+    @action(detail=False, methods=['post'])
+    def generate_subtasks(self, request):
+        """Break many tasks down into AI-generated subtasks, several tasks per model call"""
+        ids, error = self.get_bulk_ids(request)
+        if error:
+            return error
+
+        tasks = self.get_queryset().in_bulk(ids)
+        created, failed = create_generated_subtasks(tasks.values())
+        failed = {task.id for task in failed}
+        by_task = {}
+        for subtask in created:
+            by_task.setdefault(subtask.task_id, []).append(subtask)
+
+        results = []
+        for pk in ids:
+            if pk not in tasks:
+                results.append({'id': pk, 'status': 'not_found'})
+            elif pk in failed:
+                results.append({'id': pk, 'status': 'failed'})
+            else:
+                results.append({
+                    'id': pk,
+                    'status': 'generated',
+                    'subtasks': SubTaskSerializer(by_task.get(pk, []), many=True).data,
+                })
+        return Response(results)
+
+class SubTaskViewSet(BulkModelMixin, ValuesListMixin, viewsets.ModelViewSet):
     serializer_class = SubTaskSerializer
     permission_classes = [IsAuthenticated]
+    ordering = ['created_at']
+    pagination_class = KeysetCursorPagination
 
     def get_queryset(self):
         return SubTask.objects.filter(task__user=self.request.user)
@@ -46,18 +380,119 @@ class SubTaskViewSet(viewsets.ModelViewSet):
         serializer = self.get_serializer(subtask)
         return Response(serializer.data)
 
+    @action(detail=False, methods=['post', 'patch'])
+    def bulk(self, request):
+        """Create (POST) or partially update (PATCH) many subtasks in one transaction"""
+        items, error = self.get_bulk_items(request)
+        if error:
+            return error
+
+        if request.method == 'PATCH':
+            serializers, errors = self.validate_bulk_update(items)
+            for serializer, item_errors in zip(serializers, errors):
+                task = serializer.validated_data.get('task') if serializer and not item_errors else None
+                if task is not None and task.user_id != request.user.id:
+                    item_errors['task'] = ['Task not found.']
+            if any(errors):
+                return Response(errors, status=status.HTTP_400_BAD_REQUEST)
+            with transaction.atomic():
+                invalidate_user_cache(request.user.id)
+                publish_changed(request.user.id)
+                subtasks = self.apply_bulk_update(serializers)
+            return Response(self.get_serializer(subtasks, many=True).data)
+
+        validated, errors = self.validate_bulk_create(items)
+        for data, item_errors in zip(validated, errors):
+            if not item_errors and data['task'].user_id != request.user.id:
+                item_errors['task'] = ['Task not found.']
+        if any(errors):
+            return Response(errors, status=status.HTTP_400_BAD_REQUEST)
+        with transaction.atomic():
+            invalidate_user_cache(request.user.id)
+            publish_changed(request.user.id)
+            subtasks = SubTask.objects.bulk_create(
+                SubTask(**data) for data in validated
+            )
+        return Response(self.get_serializer(subtasks, many=True).data, status=status.HTTP_201_CREATED)
+
+    @action(detail=False, methods=['put'])
+    def bulk_complete(self, request):
+        """Set the completion status of many subtasks (default: complete)"""
+        ids, error = self.get_bulk_ids(request)
+        if error:
+            return error
+        try:
+            is_completed = BooleanField().to_internal_value(request.data.get('is_completed', True))
+        except ValidationError as e:
+            return Response({'is_completed': e.detail}, status=status.HTTP_400_BAD_REQUEST)
+
+        with transaction.atomic():
+            invalidate_user_cache(request.user.id)
+            publish_changed(request.user.id)
+            found = set(self.get_queryset().filter(id__in=ids).values_list('id', flat=True))
+            SubTask.objects.filter(id__in=found).update(is_completed=is_completed, updated_at=timezone.now())
+        return Response([
+            {'id': pk, 'status': 'updated' if pk in found else 'not_found'}
+            for pk in ids
+        ])
+
 class CategoryViewSet(viewsets.ModelViewSet):
     serializer_class = CategorySerializer
     queryset = Category.objects.all()
     permission_classes = [IsAuthenticated]
 
-class ReminderViewSet(viewsets.ModelViewSet):
+class ReminderViewSet(ValuesListMixin, viewsets.ModelViewSet):
     serializer_class = ReminderSerializer
     permission_classes = [IsAuthenticated]
+    ordering = ['remind_at']
+    pagination_class = KeysetCursorPagination
 
     def get_queryset(self):
         return Reminder.objects.filter(task__user=self.request.user)
 
+    @action(detail=False, methods=['get', 'put', 'delete'])
+    def preferences(self, request):
+        """
+        The user's reminder times in minutes before the due date, and
+        whether due reminders come as one digest email. The times apply to
+        tasks created or rescheduled afterwards; DELETE restores
+        DEFAULT_TASK_REMINDER_TIMES and individual emails.
+        """
+        preference = ReminderPreference.objects.filter(user=request.user).first()
+        if request.method == 'DELETE':
+            if preference is not None:
+                preference.delete()
+            preference = None
+        elif request.method == 'PUT':
+            serializer = ReminderPreferenceSerializer(preference, data=request.data)
+            serializer.is_valid(raise_exception=True)
+            preference = serializer.save(user=request.user)
+
+        data = ReminderPreferenceSerializer(preference).data if preference else {'minutes_before': None, 'digest': False}
+        if data['minutes_before'] is None:
+            return Response({**data, 'minutes_before': settings.DEFAULT_TASK_REMINDER_TIMES, 'default': True})
+        return Response({**data, 'default': False})
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def sync(request):
+    """Tasks, subtasks and reminders changed since ?since=<watermark>, plus deleted ids"""
+    since = request.query_params.get('since')
+    if since:
+        since = parse_watermark(since)
+        if since is None:
+            return Response(
+                {'error': 'Invalid watermark'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+    return Response(get_changes(request.user, since or None))
+
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+def metrics(request):
+    """Request timings of this process in the Prometheus text format"""
+    return HttpResponse(registry.render(), content_type=PROMETHEUS_CONTENT_TYPE)
+
 @api_view(['POST'])
 @permission_classes([AllowAny])
 def register_user(request):
@@ -111,10 +546,13 @@ def login_user(request):
 
     user = authenticate(username=username, password=password)
     if user is not None:
+        token, expires_at = issue_token(user)
         return Response({
             'id': user.id,
             'username': user.username,
-            'email': user.email
+            'email': user.email,
+            'token': token,
+            'expires_at': expires_at
         })
     else:
         return Response(